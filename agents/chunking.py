@@ -0,0 +1,57 @@
+# agents/chunking.py
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from .parsing import record_service
+
+# Ways parsed records can be split for map-reduce analysis.
+CHUNK_MODES = ("time", "service")
+# Default number of parsed records per map-reduce chunk.
+DEFAULT_CHUNK_SIZE = 5000
+
+
+@dataclass
+class Chunk:
+    """A slice of an incident's parsed records analyzed on its own."""
+
+    label: str
+    records: List[Dict[str, Any]]
+
+
+def _time_label(records: List[Dict[str, Any]], start: int) -> str:
+    first, last = records[0].get("timestamp"), records[-1].get("timestamp")
+    if first and last:
+        return f"{first} to {last}"
+    return f"records {start + 1}-{start + len(records)}"
+
+
+def chunk_records(
+    records: List[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE, by: str = "time"
+) -> List[Chunk]:
+    """Splits parsed records into chunks of at most `chunk_size` records.
+
+    With by="time" each chunk is a consecutive run of the incident, so it
+    covers one time range. With by="service" records are first grouped by
+    service (in order of first appearance) and each service is split on its own.
+    """
+    if by not in CHUNK_MODES:
+        raise ValueError(f"Unknown chunk mode {by!r}; expected one of {CHUNK_MODES}")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if by == "time":
+        return [
+            Chunk(_time_label(records[i:i + chunk_size], i), records[i:i + chunk_size])
+            for i in range(0, len(records), chunk_size)
+        ]
+
+    services: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for record in records:
+        services.setdefault(record_service(record), []).append(record)
+    chunks = []
+    for service, members in services.items():
+        parts = range(0, len(members), chunk_size)
+        for n, i in enumerate(parts, start=1):
+            label = f"service {service or 'unknown'}"
+            if len(parts) > 1:
+                label += f" (part {n} of {len(parts)})"
+            chunks.append(Chunk(label, members[i:i + chunk_size]))
+    return chunks
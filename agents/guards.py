@@ -1,31 +1,207 @@
 # agents/guards.py
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+
 class CircuitBreakerException(Exception):
     """Custom exception raised when system constraints are violated."""
     pass
 
+
+class WorkerTimeout(TimeoutError):
+    """Raised when a worker's model call runs past its wall-clock deadline."""
+
+    def __init__(self, worker: str, deadline: float):
+        super().__init__(f"{worker} worker exceeded its {deadline}s deadline")
+        self.worker = worker
+        self.deadline = deadline
+
+
+class InvalidReply(ValueError):
+    """A model call that completed but whose reply failed validation.
+
+    The upstream answered, so this is not a breaker error; callers count
+    invalid replies per incident instead.
+    """
+
+
 class ExecutionCircuitBreaker:
     """
-    Monitors system bounds to prevent infinite tool-use or self-correction loops.
+    Monitors system bounds to prevent infinite tool-use or self-correction loops,
+    and stops calling an upstream that keeps failing.
+
+    States: CLOSED (calls flow), OPEN (calls are rejected until `cooldown`
+    seconds have passed) and HALF_OPEN (up to `half_open_trials` trial calls;
+    a success closes the breaker, a failure opens it again; trials released
+    or outstanding for another `cooldown` free their slot). Errors count
+    within a rolling `window` of seconds: the breaker opens once
+    `error_threshold` errors fall in the window, or, with `max_error_rate`,
+    once at least `min_calls` calls in the window fail at that rate.
+
+    One breaker may be shared by threads; pass a fake `clock` to test it.
     """
-    def __init__(self, max_loops: int = 3, error_threshold: int = 2):
+    def __init__(
+        self,
+        max_loops: int = 3,
+        error_threshold: int = 2,
+        window: float = 60.0,
+        cooldown: float = 30.0,
+        half_open_trials: int = 1,
+        max_error_rate: Optional[float] = None,
+        min_calls: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self.max_loops = max_loops
         self.error_threshold = error_threshold
-        self.current_errors = 0
-        self.status = "CLOSED"  # CLOSED, OPEN
+        self.window = window
+        self.cooldown = cooldown
+        self.half_open_trials = half_open_trials
+        self.max_error_rate = max_error_rate
+        self.min_calls = min_calls
+        self.clock = clock
+        self.status = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
+
+        self._lock = threading.Lock()
+        self._calls: deque = deque()  # (time, failed) per finished call within the window
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_at = 0.0
+        # Lifetime counters for metrics()
+        self.successes = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.trips = 0
+
+    def clone(self) -> "ExecutionCircuitBreaker":
+        """A new, CLOSED breaker with the same settings (e.g. one per incident)."""
+        return ExecutionCircuitBreaker(
+            max_loops=self.max_loops,
+            error_threshold=self.error_threshold,
+            window=self.window,
+            cooldown=self.cooldown,
+            half_open_trials=self.half_open_trials,
+            max_error_rate=self.max_error_rate,
+            min_calls=self.min_calls,
+            clock=self.clock,
+        )
+
+    @property
+    def current_errors(self) -> int:
+        """Errors within the rolling window."""
+        with self._lock:
+            self._prune()
+            return sum(failed for _, failed in self._calls)
 
     def verify_bounds(self, current_loops: int):
-        """Checks if the system has broken execution bounds."""
+        """Checks if the system has broken execution bounds.
+
+        A runaway loop is a fault of one incident, not of the upstream, so
+        this does not open the breaker for other calls.
+        """
         if current_loops >= self.max_loops:
-            self.status = "OPEN"
             raise CircuitBreakerException(
                 f"Circuit Breaker Opened: Maximum execution loop count ({self.max_loops}) exceeded."
             )
 
-    def record_error(self):
-        """Tracks consecutive downstream errors."""
-        self.current_errors += 1
-        if self.current_errors >= self.error_threshold:
-            self.status = "OPEN"
-            raise CircuitBreakerException(
-                "Circuit Breaker Opened: Downstream tools exceeded maximum continuous error thresholds."
-            )
+    def before_call(self):
+        """Admits one upstream call, or raises if the breaker is open."""
+        with self._lock:
+            if self.status == "OPEN":
+                if self.clock() - self._opened_at < self.cooldown:
+                    self.rejected += 1
+                    raise CircuitBreakerException(
+                        "Circuit Breaker Open: Upstream calls are paused while the breaker cools down."
+                    )
+                self.status, self._trials = "HALF_OPEN", 0
+            if self.status == "HALF_OPEN":
+                if self._trials >= self.half_open_trials and self.clock() - self._trial_at < self.cooldown:
+                    self.rejected += 1
+                    raise CircuitBreakerException(
+                        "Circuit Breaker Half-Open: Waiting on trial calls before admitting more."
+                    )
+                if self._trials >= self.half_open_trials:
+                    # Trials outstanding for a whole cooldown are presumed lost
+                    self._trials = 0
+                self._trials += 1
+                self._trial_at = self.clock()
+
+    def release(self):
+        """Hands back a call admitted by before_call that ended without an outcome.
+
+        Call it when an admitted call is cancelled or abandoned (e.g. a closed
+        stream), so a half-open breaker does not wait on a trial forever.
+        """
+        with self._lock:
+            if self.status == "HALF_OPEN" and self._trials > 0:
+                self._trials -= 1
+
+    def record_success(self):
+        """Records a call that completed; closes a half-open breaker."""
+        with self._lock:
+            self.successes += 1
+            if self.status == "HALF_OPEN":
+                self.status = "CLOSED"
+                self._calls.clear()
+                return
+            self._calls.append((self.clock(), False))
+            self._prune()
+
+    def record_error(self, error: Optional[BaseException] = None):
+        """Tracks downstream errors within the rolling window."""
+        with self._lock:
+            self.errors += 1
+            if isinstance(error, TimeoutError):
+                self.timeouts += 1
+            if self.status == "HALF_OPEN":
+                self._open()
+                raise CircuitBreakerException(
+                    "Circuit Breaker Opened: Trial call failed while half-open."
+                )
+            self._calls.append((self.clock(), True))
+            self._prune()
+            failures = sum(failed for _, failed in self._calls)
+            if failures >= self.error_threshold:
+                self._open()
+                raise CircuitBreakerException(
+                    "Circuit Breaker Opened: Downstream tools exceeded maximum continuous error thresholds."
+                )
+            if self.max_error_rate is None or len(self._calls) < self.min_calls:
+                return
+            rate = failures / len(self._calls)
+            if rate >= self.max_error_rate:
+                self._open()
+                raise CircuitBreakerException(
+                    f"Circuit Breaker Opened: Error rate {rate:.0%} over the last {self.window}s."
+                )
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of the breaker's state and counters."""
+        with self._lock:
+            self._prune()
+            calls = len(self._calls)
+            failures = sum(failed for _, failed in self._calls)
+            return {
+                "status": self.status,
+                "window_calls": calls,
+                "window_errors": failures,
+                "error_rate": failures / calls if calls else 0.0,
+                "successes": self.successes,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+                "trips": self.trips,
+            }
+
+    def _open(self):
+        if self.status != "OPEN":
+            self.trips += 1
+        self.status = "OPEN"
+        self._opened_at = self.clock()
+
+    def _prune(self):
+        horizon = self.clock() - self.window
+        while self._calls and self._calls[0][0] <= horizon:
+            self._calls.popleft()
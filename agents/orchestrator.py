@@ -1,108 +1,785 @@
 # agents/orchestrator.py
+import asyncio
 import os
 import json
-from anthropic import Anthropic
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from anthropic import Anthropic, APITimeoutError, AsyncAnthropic
 from .state import AgentState
-from .guards import ExecutionCircuitBreaker, CircuitBreakerException
+from .cache import ResponseCache, cache_key
+from .parsing import decode_model_reply, merge_model_records, model_batches, structure_logs
+from .reduction import DEFAULT_TOKEN_BUDGET, estimate_tokens, reduce_records
+from .chunking import DEFAULT_CHUNK_SIZE, Chunk, chunk_records
+from .guards import ExecutionCircuitBreaker, CircuitBreakerException, InvalidReply, WorkerTimeout
+
+MODEL = "claude-3-5-sonnet-20241022"
+
+PARSER_SYSTEM_PROMPT = (
+    "You are a strict Log Parsing Subsystem. Your sole job is to transform chaotic, "
+    "unstructured system logs into a clean structured JSON array. Never output conversational prose."
+)
+# Output budget for one batch of unrecognised lines (see agents.parsing.MODEL_BATCH_SIZE).
+PARSER_MAX_TOKENS = 1500
+ANALYSIS_SYSTEM_PROMPT = (
+    "You are an expert Reliability Engineer specializing in system telemetry analysis. "
+    "Identify anomalies, trace root causes, and explicitly point out security concerns."
+)
+REMEDIATION_SYSTEM_PROMPT = "You are a DevOps Automation Agent. Generate standard operating procedures (SOPs) and runbooks based on failure reports."
+ANALYSIS_MAX_TOKENS = 2000
+# Partial findings merged per reduce call; more chunks are merged in several rounds.
+REDUCE_FANOUT = 8
+
+# Default number of incidents process_many keeps in flight at once.
+DEFAULT_CONCURRENCY = 8
+# Wall-clock seconds one model call of each worker may take before it is
+# cancelled and counted as a breaker error. Chunk and merge calls are "analysis".
+DEFAULT_WORKER_TIMEOUTS = {"parser": 30.0, "analysis": 60.0, "remediation": 60.0}
+
+
+def without_retries(client):
+    """The client with the SDK's own retries turned off, sharing its connection pool.
+
+    The sync path bounds a call with the SDK's request timeout, which applies
+    to each attempt; SDK retries would run a call to several times its worker
+    deadline. Failed calls are retried by the pipeline under its breaker
+    instead. Clients without `with_options` (fakes, proxies) are returned as is.
+    """
+    with_options = getattr(client, "with_options", None)
+    return with_options(max_retries=0) if with_options is not None else client
+
+
+@dataclass
+class PipelineEvent:
+    """One progress update from stream_incident.
+
+    kind is "step" (a new execution trace line in `text`), "delta" (a chunk of
+    the `worker`'s reply as it streams in) or "done" (the final `state`).
+    """
+
+    kind: str
+    text: str = ""
+    worker: Optional[str] = None
+    state: Optional[AgentState] = None
+
 
 class LogSightOrchestrator:
     """
-    Main Orchestrator engine coordinating specialized worker layers 
+    Main Orchestrator engine coordinating specialized worker layers
     using defensive system patterns and immutable states.
     """
-    def __init__(self):
+    def __init__(
+        self,
+        client=None,
+        async_client=None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        cache: Optional[ResponseCache] = None,
+        map_reduce: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_by: str = "time",
+        map_concurrency: int = 4,
+        breaker: Optional[ExecutionCircuitBreaker] = None,
+        worker_timeouts: Optional[Dict[str, float]] = None,
+    ):
         # Fallback to a placeholder if the key isn't loaded yet to prevent initialization crashes
         api_key = os.environ.get("ANTHROPIC_API_KEY", "mock-key-for-dev")
-        self.client = Anthropic(api_key=api_key)
-        self.breaker = ExecutionCircuitBreaker(max_loops=3, error_threshold=2)
+        self.client = without_retries(client or Anthropic(api_key=api_key))
+        self.async_client = async_client or AsyncAnthropic(api_key=api_key)
+        # Shared by sync incidents, so an upstream failing across incidents stays
+        # paused for the breaker's cooldown; async incidents and chunks get clones
+        self.breaker = breaker or ExecutionCircuitBreaker(max_loops=3, error_threshold=2)
+        self.worker_timeouts = {**DEFAULT_WORKER_TIMEOUTS, **(worker_timeouts or {})}
+        self.token_budget = token_budget
+        # Optional content-addressed cache of model responses, shared by all incidents
+        self.cache = cache
+        # Map-reduce mode: incidents with more than chunk_size parsed records are
+        # analyzed chunk by chunk, map_concurrency chunks at a time
+        if map_concurrency < 1:
+            raise ValueError("map_concurrency must be at least 1")
+        self.map_reduce = map_reduce
+        self.chunk_size = chunk_size
+        self.chunk_by = chunk_by
+        self.map_concurrency = map_concurrency
 
     def process_incident(self, raw_log_data: str) -> AgentState:
         """Runs the raw logs through the structured Orchestration-Worker Pipeline."""
         state = AgentState(raw_logs=raw_log_data)
         state = state.log_step("Initializing Orchestrator Core Execution Pipeline.")
+        breaker = self.breaker
 
         try:
             # 1. Structure Layer (Worker 1)
-            state = self._run_parser_worker(state)
-            
+            state = self._run_parser_worker(state, breaker)
+            if self._use_map_reduce(state):
+                state = self._run_map_reduce_analysis(state, breaker)
+            else:
+                state = self._run_reduction_stage(state)
+
             # 2. Iterative Reason/Triage Loop (Worker 2)
             while state.root_cause_analysis is None:
-                self.breaker.verify_bounds(state.loop_count)
-                
-                state = self._run_analysis_worker(state)
-                state.loop_count += 1
+                breaker.verify_bounds(state.loop_count)
+
+                state = self._run_analysis_worker(state, breaker)
+                state = state.model_copy(update={"loop_count": state.loop_count + 1})
                 state = state.log_step(f"Completed Triage Iteration Cycle {state.loop_count}")
 
             # 3. Mitigation/Resolution Synthesis (Worker 3)
-            state = self._run_remediation_worker(state)
+            attempts = 0
+            while state.recommended_actions is None:
+                breaker.verify_bounds(attempts)
+                state = self._run_remediation_worker(state, breaker)
+                attempts += 1
+            state = self._log_cache_usage(state)
             state = state.log_step("Pipeline execution finished successfully.")
-            return state
+            return self._with_metrics(state, breaker)
 
         except CircuitBreakerException as cbe:
-            # Catch systemic loops/errors and gracefully degrade execution state
-            state.circuit_tripped = True
-            state.failure_reason = str(cbe)
-            state = state.log_step(f"CRITICAL FAULT: {str(cbe)}")
-            return self._handle_graceful_degradation(state)
+            return self._with_metrics(self._trip(state, cbe), breaker)
 
-    def _run_parser_worker(self, state: AgentState) -> AgentState:
-        state = state.log_step("Invoking Log Parser Worker.")
-        
-        system_prompt = (
-            "You are a strict Log Parsing Subsystem. Your sole job is to transform chaotic, "
-            "unstructured system logs into a clean structured JSON array. Never output conversational prose."
-        )
-        user_prompt = f"Convert the following raw logs into a valid JSON array matching keys [timestamp, level, service, message]:\n{state.raw_logs}"
+    def stream_incident(self, raw_log_data: str) -> Iterator[PipelineEvent]:
+        """Runs process_incident's pipeline, yielding progress as it happens.
+
+        Trace lines are yielded as "step" events and the analysis and
+        remediation replies as "delta" events while the model streams them;
+        the last event is "done" and carries the final state.
+        """
+        state = AgentState(raw_logs=raw_log_data)
+        state = state.log_step("Initializing Orchestrator Core Execution Pipeline.")
+        breaker = self.breaker
+        emitted = 0
+
+        def new_steps(state: AgentState) -> Iterator[PipelineEvent]:
+            nonlocal emitted
+            for step in state.execution_steps[emitted:]:
+                yield PipelineEvent("step", step)
+            emitted = len(state.execution_steps)
 
+        try:
+            yield from new_steps(state)
+            state = self._run_parser_worker(state, breaker)
+            yield from new_steps(state)
+            if self._use_map_reduce(state):
+                state = self._run_map_reduce_analysis(state, breaker)
+                yield from new_steps(state)
+                yield PipelineEvent("delta", state.root_cause_analysis, "analysis")
+            else:
+                state = self._run_reduction_stage(state)
+
+            while state.root_cause_analysis is None:
+                breaker.verify_bounds(state.loop_count)
+
+                state = state.log_step("Invoking Infrastructure Root-Cause Analysis Worker.")
+                yield from new_steps(state)
+                try:
+                    text, cached = yield from self._stream(
+                        "analysis", ANALYSIS_SYSTEM_PROMPT, self._analysis_prompt(state), ANALYSIS_MAX_TOKENS, breaker
+                    )
+                    state = state.model_copy(update={"root_cause_analysis": text, **self._count_cache(state, cached)})
+                except CircuitBreakerException:
+                    raise
+                except Exception as e:
+                    state = self._worker_failed(state, breaker, "Analysis", e)
+                state = state.model_copy(update={"loop_count": state.loop_count + 1})
+                state = state.log_step(f"Completed Triage Iteration Cycle {state.loop_count}")
+
+            attempts = 0
+            while state.recommended_actions is None:
+                breaker.verify_bounds(attempts)
+                state = state.log_step("Invoking Remediation Synthesis Worker.")
+                yield from new_steps(state)
+                try:
+                    text, cached = yield from self._stream(
+                        "remediation", REMEDIATION_SYSTEM_PROMPT, self._remediation_prompt(state), 1500, breaker
+                    )
+                    state = state.model_copy(update={"recommended_actions": text, **self._count_cache(state, cached)})
+                except CircuitBreakerException:
+                    raise
+                except Exception as e:
+                    state = self._worker_failed(state, breaker, "Remediation", e)
+                attempts += 1
+            state = self._log_cache_usage(state)
+            state = state.log_step("Pipeline execution finished successfully.")
+
+        except CircuitBreakerException as cbe:
+            state = self._trip(state, cbe)
+
+        state = self._with_metrics(state, breaker)
+        yield from new_steps(state)
+        yield PipelineEvent("done", state=state)
+
+    async def process_incident_async(
+        self, raw_log_data: str, timeout: Optional[float] = None
+    ) -> AgentState:
+        """Async variant of process_incident using the async client.
+
+        Each incident gets its own circuit breaker so concurrent incidents do not
+        trip each other. If the pipeline takes longer than `timeout` seconds it is
+        cancelled and the degraded fallback state is returned.
+        """
+        state = AgentState(raw_logs=raw_log_data)
+        state = state.log_step("Initializing Orchestrator Core Execution Pipeline.")
+        breaker = self._new_breaker()
+        try:
+            return await asyncio.wait_for(self._run_pipeline_async(state, breaker), timeout)
+        except asyncio.TimeoutError:
+            state = state.model_copy(
+                update={"failure_reason": f"Incident processing timed out after {timeout}s."}
+            )
+            state = state.log_step(f"TIMEOUT: Pipeline cancelled after {timeout}s.")
+            return self._with_metrics(self._handle_graceful_degradation(state), breaker)
+
+    async def process_many(
+        self,
+        raw_log_batches: Iterable[str],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: Optional[float] = None,
+    ) -> List[AgentState]:
+        """Process several incidents concurrently, returning their states in input order.
+
+        At most `concurrency` incidents are in flight at once; `timeout` applies to
+        each incident separately.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(raw_log_data: str) -> AgentState:
+            async with semaphore:
+                return await self.process_incident_async(raw_log_data, timeout)
+
+        return list(await asyncio.gather(*(bounded(raw) for raw in raw_log_batches)))
+
+    async def _run_pipeline_async(
+        self, state: AgentState, breaker: ExecutionCircuitBreaker
+    ) -> AgentState:
+        try:
+            # 1. Structure Layer (Worker 1)
+            state = await self._run_parser_worker_async(state, breaker)
+            if self._use_map_reduce(state):
+                state = await self._run_map_reduce_analysis_async(state, breaker)
+            else:
+                state = self._run_reduction_stage(state)
+
+            # 2. Iterative Reason/Triage Loop (Worker 2)
+            while state.root_cause_analysis is None:
+                breaker.verify_bounds(state.loop_count)
+
+                state = await self._run_analysis_worker_async(state, breaker)
+                state = state.model_copy(update={"loop_count": state.loop_count + 1})
+                state = state.log_step(f"Completed Triage Iteration Cycle {state.loop_count}")
+
+            # 3. Mitigation/Resolution Synthesis (Worker 3)
+            attempts = 0
+            while state.recommended_actions is None:
+                breaker.verify_bounds(attempts)
+                state = await self._run_remediation_worker_async(state, breaker)
+                attempts += 1
+            state = self._log_cache_usage(state)
+            state = state.log_step("Pipeline execution finished successfully.")
+            return self._with_metrics(state, breaker)
+
+        except CircuitBreakerException as cbe:
+            return self._with_metrics(self._trip(state, cbe), breaker)
+
+    # --- Model calls -----------------------------------------------------
+
+    def _create(
+        self,
+        worker: str,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int,
+        breaker: ExecutionCircuitBreaker,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> Tuple[str, bool]:
+        """Returns the model's reply and whether it came from the response cache.
+
+        Cache hits bypass the breaker. Otherwise the call must be admitted by
+        `breaker` and is cancelled with WorkerTimeout after the worker's deadline.
+        With `validate`, a reply is cached only once `validate(reply)` returns,
+        and a cached reply it rejects is evicted and fetched again.
+        """
+        key = self._cache_lookup_key(system_prompt, user_prompt)
+        cached = self._cached(key, validate)
+        if cached is not None:
+            return cached, True
+        breaker.before_call()
+        deadline = self.worker_timeouts[worker]
         try:
             response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=1500,
+                model=MODEL,
+                max_tokens=max_tokens,
                 system=system_prompt,
-                messages=[{"role": "user", "content": user_prompt}]
+                messages=[{"role": "user", "content": user_prompt}],
+                timeout=deadline,
             )
-            
-            # Basic validation check to keep downstream workers clean
-            parsed_data = json.loads(response.content[0].text)
-            return state.model_copy(update={"parsed_json": parsed_data}).log_step("Log parsing complete.")
-        except Exception as e:
-            self.breaker.record_error()
-            # If JSON parsing fails, fall back to string encapsulation and continue path
-            fallback_json = [{"level": "UNKNOWN", "message": state.raw_logs}]
-            return state.model_copy(update={"parsed_json": fallback_json}).log_step(f"Parser warning: {str(e)}. Using fallback format.")
+        except (APITimeoutError, TimeoutError) as e:
+            raise WorkerTimeout(worker, deadline) from e
+        except BaseException as e:
+            if not isinstance(e, Exception):
+                # Cancelled or abandoned: there is no outcome to record
+                breaker.release()
+            raise
+        breaker.record_success()
+        return self._store(key, response.content[0].text, validate), False
 
-    def _run_analysis_worker(self, state: AgentState) -> AgentState:
-        state = state.log_step("Invoking Infrastructure Root-Cause Analysis Worker.")
-        
-        system_prompt = (
-            "You are an expert Reliability Engineer specializing in system telemetry analysis. "
-            "Identify anomalies, trace root causes, and explicitly point out security concerns."
+    async def _create_async(
+        self,
+        worker: str,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int,
+        breaker: ExecutionCircuitBreaker,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> Tuple[str, bool]:
+        key = self._cache_lookup_key(system_prompt, user_prompt)
+        cached = self._cached(key, validate)
+        if cached is not None:
+            return cached, True
+        breaker.before_call()
+        deadline = self.worker_timeouts[worker]
+        try:
+            response = await asyncio.wait_for(
+                self.async_client.messages.create(
+                    model=MODEL,
+                    max_tokens=max_tokens,
+                    system=system_prompt,
+                    messages=[{"role": "user", "content": user_prompt}],
+                ),
+                deadline,
+            )
+        except asyncio.TimeoutError as e:
+            raise WorkerTimeout(worker, deadline) from e
+        except BaseException as e:
+            if not isinstance(e, Exception):
+                # Cancelled or abandoned: there is no outcome to record
+                breaker.release()
+            raise
+        breaker.record_success()
+        return self._store(key, response.content[0].text, validate), False
+
+    def _stream(
+        self,
+        worker: str,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int,
+        breaker: ExecutionCircuitBreaker,
+    ) -> Iterator[PipelineEvent]:
+        """Yields the reply as "delta" events; the generator returns (text, cached).
+
+        The deadline covers the whole reply: a stream still running past it is
+        closed and WorkerTimeout raised.
+        """
+        key = self._cache_lookup_key(system_prompt, user_prompt)
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            yield PipelineEvent("delta", cached, worker)
+            return cached, True
+        breaker.before_call()
+        deadline = self.worker_timeouts[worker]
+        started = time.monotonic()
+        parts = []
+        try:
+            with self.client.messages.stream(
+                model=MODEL,
+                max_tokens=max_tokens,
+                system=system_prompt,
+                messages=[{"role": "user", "content": user_prompt}],
+                timeout=deadline,
+            ) as stream:
+                for text in stream.text_stream:
+                    if time.monotonic() - started > deadline:
+                        raise WorkerTimeout(worker, deadline)
+                    parts.append(text)
+                    yield PipelineEvent("delta", text, worker)
+        except (APITimeoutError, TimeoutError) as e:
+            if isinstance(e, WorkerTimeout):
+                raise
+            raise WorkerTimeout(worker, deadline) from e
+        except BaseException as e:
+            if not isinstance(e, Exception):
+                # Cancelled or abandoned: there is no outcome to record
+                breaker.release()
+            raise
+        breaker.record_success()
+        return self._store(key, "".join(parts)), False
+
+    def _cache_lookup_key(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+        return cache_key(MODEL, system_prompt, user_prompt) if self.cache is not None else None
+
+    def _cached(self, key: Optional[str], validate: Optional[Callable[[str], Any]]) -> Optional[str]:
+        text = self.cache.get(key) if key else None
+        if text is None or validate is None:
+            return text
+        try:
+            validate(text)
+        except Exception:
+            self.cache.delete(key)
+            return None
+        return text
+
+    def _store(self, key: Optional[str], text: str, validate: Optional[Callable[[str], Any]] = None) -> str:
+        # Raised before the reply is stored, so a bad reply is never replayed
+        if validate is not None:
+            try:
+                validate(text)
+            except Exception as e:
+                raise InvalidReply(str(e)) from e
+        if key is not None:
+            self.cache.set(key, text)
+        return text
+
+    def _count_cache(self, state: AgentState, *cached: bool) -> dict:
+        """State updates recording the cache outcome of this incident's model calls."""
+        if self.cache is None or not cached:
+            return {}
+        hits = sum(cached)
+        return {
+            "cache_hits": state.cache_hits + hits,
+            "cache_misses": state.cache_misses + len(cached) - hits,
+        }
+
+    def _log_cache_usage(self, state: AgentState) -> AgentState:
+        if self.cache is None:
+            return state
+        return state.log_step(f"Response cache: {state.cache_hits} hits, {state.cache_misses} misses.")
+
+    # --- Workers ---------------------------------------------------------
+
+    def _run_parser_worker(self, state: AgentState, breaker: ExecutionCircuitBreaker) -> AgentState:
+        state = state.log_step("Invoking Log Parser Worker.")
+        # The local parser structures every recognised line; only free-text
+        # lines are sent to the model, a batch at a time.
+        records, unresolved = structure_logs(state.raw_logs)
+        batches = model_batches(unresolved)
+        invalid = 0
+        for batch in batches:
+            try:
+                text, cached = self._create(
+                    "parser", PARSER_SYSTEM_PROMPT, self._parser_prompt(batch), PARSER_MAX_TOKENS, breaker,
+                    partial(decode_model_reply, batch=batch),
+                )
+                state = state.model_copy(update=self._count_cache(state, cached))
+                records = merge_model_records(records, batch, json.loads(text))
+            except CircuitBreakerException:
+                raise
+            except InvalidReply as e:
+                invalid += 1
+                state = self._parser_warning(state, batch, e)
+                self._verify_replies(invalid, breaker)
+            except Exception as e:
+                breaker.record_error(e)
+                state = self._parser_warning(state, batch, e)
+        return self._parsed(state, records, unresolved, batches)
+
+    async def _run_parser_worker_async(
+        self, state: AgentState, breaker: ExecutionCircuitBreaker
+    ) -> AgentState:
+        state = state.log_step("Invoking Log Parser Worker.")
+        records, unresolved = structure_logs(state.raw_logs)
+        batches = model_batches(unresolved)
+
+        async def structure(batch):
+            return await self._create_async(
+                "parser", PARSER_SYSTEM_PROMPT, self._parser_prompt(batch), PARSER_MAX_TOKENS, breaker,
+                partial(decode_model_reply, batch=batch),
+            )
+
+        replies = await asyncio.gather(*map(structure, batches), return_exceptions=True)
+        invalid = 0
+        for batch, reply in zip(batches, replies):
+            try:
+                if isinstance(reply, Exception):
+                    raise reply
+                text, cached = reply
+                state = state.model_copy(update=self._count_cache(state, cached))
+                records = merge_model_records(records, batch, json.loads(text))
+            except CircuitBreakerException:
+                raise
+            except InvalidReply as e:
+                invalid += 1
+                state = self._parser_warning(state, batch, e)
+                self._verify_replies(invalid, breaker)
+            except Exception as e:
+                breaker.record_error(e)
+                state = self._parser_warning(state, batch, e)
+        return self._parsed(state, records, unresolved, batches)
+
+    def _parser_prompt(self, batch) -> str:
+        lines = "\n".join(line for _, line in batch)
+        return f"Convert each of the following {len(batch)} raw log lines into one object of a valid JSON array matching keys [timestamp, level, service, message]:\n{lines}"
+
+    def _parsed(self, state: AgentState, records, unresolved, batches) -> AgentState:
+        return state.model_copy(update={"parsed_json": records}).log_step(
+            f"Log parsing complete: {len(records) - len(unresolved)} lines parsed locally, "
+            f"{len(unresolved)} sent to the model in {len(batches)} batches."
         )
-        user_prompt = f"Analyze these structured log instances to pinpoint the core architectural fault:\n{json.dumps(state.parsed_json)}"
 
-        response = self.client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=2000,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_prompt}]
+    def _verify_replies(self, invalid: int, breaker: ExecutionCircuitBreaker):
+        # Invalid replies are the incident's problem, not the upstream's: they stop
+        # this incident without counting against the (possibly shared) breaker
+        if invalid >= breaker.error_threshold:
+            raise CircuitBreakerException(
+                f"Circuit Breaker Tripped: {invalid} parser replies failed validation in this incident."
+            )
+
+    def _parser_warning(self, state: AgentState, batch, error: Exception) -> AgentState:
+        # Unrecognised lines stay in the records as UNKNOWN free text
+        return state.log_step(f"Parser warning: {str(error)}. Keeping {len(batch)} lines as unstructured text.")
+
+    def _run_reduction_stage(self, state: AgentState) -> AgentState:
+        # Local, so shared by the sync and async pipelines
+        reduction = reduce_records(state.parsed_json or [], self.token_budget)
+        state = state.model_copy(update={
+            "context_json": reduction.records,
+            "compression_ratio": reduction.compression_ratio,
+        })
+        return state.log_step(
+            f"Reduced {reduction.input_records} records to {len(reduction.records)} "
+            f"({reduction.input_tokens} -> {reduction.output_tokens} tokens, "
+            f"{reduction.compression_ratio:.1f}x)."
         )
 
-        return state.model_copy(update={"root_cause_analysis": response.content[0].text})
+    def _run_analysis_worker(self, state: AgentState, breaker: ExecutionCircuitBreaker) -> AgentState:
+        state = state.log_step("Invoking Infrastructure Root-Cause Analysis Worker.")
+        try:
+            text, cached = self._create(
+                "analysis", ANALYSIS_SYSTEM_PROMPT, self._analysis_prompt(state), ANALYSIS_MAX_TOKENS, breaker
+            )
+        except CircuitBreakerException:
+            raise
+        except Exception as e:
+            return self._worker_failed(state, breaker, "Analysis", e)
+        return state.model_copy(update={"root_cause_analysis": text, **self._count_cache(state, cached)})
+
+    async def _run_analysis_worker_async(
+        self, state: AgentState, breaker: ExecutionCircuitBreaker
+    ) -> AgentState:
+        state = state.log_step("Invoking Infrastructure Root-Cause Analysis Worker.")
+        try:
+            text, cached = await self._create_async(
+                "analysis", ANALYSIS_SYSTEM_PROMPT, self._analysis_prompt(state), ANALYSIS_MAX_TOKENS, breaker
+            )
+        except CircuitBreakerException:
+            raise
+        except Exception as e:
+            return self._worker_failed(state, breaker, "Analysis", e)
+        return state.model_copy(update={"root_cause_analysis": text, **self._count_cache(state, cached)})
+
+    def _analysis_prompt(self, state: AgentState) -> str:
+        return f"Analyze these structured log instances to pinpoint the core architectural fault:\n{json.dumps(state.context_json if state.context_json is not None else state.parsed_json)}"
+
+    def _run_remediation_worker(self, state: AgentState, breaker: ExecutionCircuitBreaker) -> AgentState:
+        state = state.log_step("Invoking Remediation Synthesis Worker.")
+        try:
+            text, cached = self._create(
+                "remediation", REMEDIATION_SYSTEM_PROMPT, self._remediation_prompt(state), 1500, breaker
+            )
+        except CircuitBreakerException:
+            raise
+        except Exception as e:
+            return self._worker_failed(state, breaker, "Remediation", e)
+        return state.model_copy(update={"recommended_actions": text, **self._count_cache(state, cached)})
 
-    def _run_remediation_worker(self, state: AgentState) -> AgentState:
+    async def _run_remediation_worker_async(
+        self, state: AgentState, breaker: ExecutionCircuitBreaker
+    ) -> AgentState:
         state = state.log_step("Invoking Remediation Synthesis Worker.")
-        
-        system_prompt = "You are a DevOps Automation Agent. Generate standard operating procedures (SOPs) and runbooks based on failure reports."
-        user_prompt = f"Write clear mitigation steps for this issue:\n{state.root_cause_analysis}"
-
-        response = self.client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1500,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_prompt}]
+        try:
+            text, cached = await self._create_async(
+                "remediation", REMEDIATION_SYSTEM_PROMPT, self._remediation_prompt(state), 1500, breaker
+            )
+        except CircuitBreakerException:
+            raise
+        except Exception as e:
+            return self._worker_failed(state, breaker, "Remediation", e)
+        return state.model_copy(update={"recommended_actions": text, **self._count_cache(state, cached)})
+
+    def _remediation_prompt(self, state: AgentState) -> str:
+        return f"Write clear mitigation steps for this issue:\n{state.root_cause_analysis}"
+
+    # --- Map-reduce analysis ----------------------------------------------
+
+    def _use_map_reduce(self, state: AgentState) -> bool:
+        return self.map_reduce and len(state.parsed_json or []) > self.chunk_size
+
+    def _run_map_reduce_analysis(self, state: AgentState, breaker: ExecutionCircuitBreaker) -> AgentState:
+        chunks = chunk_records(state.parsed_json, self.chunk_size, self.chunk_by)
+        with ThreadPoolExecutor(max_workers=self.map_concurrency) as pool:
+            results = list(pool.map(self._analyze_chunk, chunks))
+            state, findings = self._collect_findings(state, chunks, results)
+
+            # Reduce: merge the partial findings, REDUCE_FANOUT at a time
+            while len(findings) > 1:
+                merged = list(pool.map(
+                    lambda group: self._merge(group, breaker), self._merge_groups(findings)
+                ))
+                state = state.model_copy(update=self._count_cache(state, *(c for _, c in merged)))
+                findings = [text for text, _ in merged]
+        return self._finish_map_reduce(state, findings)
+
+    async def _run_map_reduce_analysis_async(
+        self, state: AgentState, breaker: ExecutionCircuitBreaker
+    ) -> AgentState:
+        chunks = chunk_records(state.parsed_json, self.chunk_size, self.chunk_by)
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+
+        async def bounded(call, *args):
+            async with semaphore:
+                return await call(*args)
+
+        results = await asyncio.gather(*(bounded(self._analyze_chunk_async, c) for c in chunks))
+        state, findings = self._collect_findings(state, chunks, results)
+        while len(findings) > 1:
+            merged = await asyncio.gather(
+                *(bounded(self._merge_async, group, breaker) for group in self._merge_groups(findings)),
+                return_exceptions=True,
+            )
+            for result in merged:
+                if isinstance(result, BaseException):
+                    raise result
+            state = state.model_copy(update=self._count_cache(state, *(c for _, c in merged)))
+            findings = [text for text, _ in merged]
+        return self._finish_map_reduce(state, findings)
+
+    def _analyze_chunk(self, chunk: Chunk):
+        """Analyzes one chunk under its own breaker, retrying failed calls until it trips.
+
+        Returns (finding or None, cache flags, prompt tokens, failure reason).
+        """
+        breaker = self._new_breaker()
+        reduction = reduce_records(chunk.records, self.token_budget)
+        cached, attempts = [], 0
+        try:
+            while True:
+                breaker.verify_bounds(attempts)
+                try:
+                    text, hit = self._create(
+                        "analysis", ANALYSIS_SYSTEM_PROMPT, self._chunk_prompt(chunk, reduction.records),
+                        ANALYSIS_MAX_TOKENS, breaker,
+                    )
+                    cached.append(hit)
+                    return text, cached, reduction.output_tokens, None
+                except CircuitBreakerException:
+                    raise
+                except Exception as e:
+                    attempts += 1
+                    breaker.record_error(e)
+        except CircuitBreakerException as cbe:
+            return None, cached, reduction.output_tokens, str(cbe)
+
+    async def _analyze_chunk_async(self, chunk: Chunk):
+        breaker = self._new_breaker()
+        reduction = reduce_records(chunk.records, self.token_budget)
+        cached, attempts = [], 0
+        try:
+            while True:
+                breaker.verify_bounds(attempts)
+                try:
+                    text, hit = await self._create_async(
+                        "analysis", ANALYSIS_SYSTEM_PROMPT, self._chunk_prompt(chunk, reduction.records),
+                        ANALYSIS_MAX_TOKENS, breaker,
+                    )
+                    cached.append(hit)
+                    return text, cached, reduction.output_tokens, None
+                except CircuitBreakerException:
+                    raise
+                except Exception as e:
+                    attempts += 1
+                    breaker.record_error(e)
+        except CircuitBreakerException as cbe:
+            return None, cached, reduction.output_tokens, str(cbe)
+
+    def _merge(self, group: List[str], breaker: ExecutionCircuitBreaker) -> Tuple[str, bool]:
+        """Merges one group of findings under the incident's breaker, retrying failed calls.
+
+        Raises CircuitBreakerException once the breaker opens or the loop bound
+        is reached, which trips the incident.
+        """
+        attempts = 0
+        while True:
+            breaker.verify_bounds(attempts)
+            try:
+                return self._create(
+                    "analysis", ANALYSIS_SYSTEM_PROMPT, self._merge_prompt(group), ANALYSIS_MAX_TOKENS, breaker
+                )
+            except CircuitBreakerException:
+                raise
+            except Exception as e:
+                attempts += 1
+                breaker.record_error(e)
+
+    async def _merge_async(self, group: List[str], breaker: ExecutionCircuitBreaker) -> Tuple[str, bool]:
+        attempts = 0
+        while True:
+            breaker.verify_bounds(attempts)
+            try:
+                return await self._create_async(
+                    "analysis", ANALYSIS_SYSTEM_PROMPT, self._merge_prompt(group), ANALYSIS_MAX_TOKENS, breaker
+                )
+            except CircuitBreakerException:
+                raise
+            except Exception as e:
+                attempts += 1
+                breaker.record_error(e)
+
+    def _collect_findings(self, state: AgentState, chunks: List[Chunk], results):
+        state = state.log_step(
+            f"Map-reduce analysis: {len(chunks)} chunks by {self.chunk_by}, "
+            f"{self.map_concurrency} at a time."
         )
+        findings, sent_tokens = [], 0
+        for n, (chunk, (text, cached, tokens, failure)) in enumerate(zip(chunks, results), start=1):
+            state = state.model_copy(update=self._count_cache(state, *cached))
+            sent_tokens += tokens
+            if text is None:
+                state = state.log_step(f"Chunk {n}/{len(chunks)} ({chunk.label}) skipped: {failure}")
+            else:
+                findings.append(f"[{chunk.label}]\n{text}")
+        if not findings:
+            raise CircuitBreakerException("Circuit Breaker Opened: Every analysis chunk exceeded its error bounds.")
+        ratio = estimate_tokens(state.parsed_json) / max(sent_tokens, 1)
+        state = state.model_copy(update={"partial_analyses": findings, "compression_ratio": ratio})
+        return state, findings
+
+    def _merge_groups(self, findings: List[str]) -> List[List[str]]:
+        return [findings[i:i + REDUCE_FANOUT] for i in range(0, len(findings), REDUCE_FANOUT)]
+
+    def _finish_map_reduce(self, state: AgentState, findings: List[str]) -> AgentState:
+        state = state.model_copy(update={"root_cause_analysis": findings[0]})
+        state = state.log_step(f"Merged {len(state.partial_analyses)} partial findings into one root cause.")
+        return state.model_copy(update={"loop_count": state.loop_count + 1})
+
+    def _chunk_prompt(self, chunk: Chunk, records) -> str:
+        return f"Analyze these structured log instances ({chunk.label}, one part of a larger incident) to pinpoint the core architectural fault:\n{json.dumps(records)}"
+
+    def _merge_prompt(self, findings: List[str]) -> str:
+        parts = "\n\n".join(findings)
+        return f"Merge these partial root-cause findings, each from one part of the same incident, into a single root-cause analysis:\n{parts}"
+
+    # --- Failure handling ------------------------------------------------
+
+    def _new_breaker(self) -> ExecutionCircuitBreaker:
+        return self.breaker.clone()
+
+    def _worker_failed(
+        self, state: AgentState, breaker: ExecutionCircuitBreaker, worker: str, error: Exception
+    ) -> AgentState:
+        # Counts the failure (raising once the breaker opens); the caller's loop retries
+        breaker.record_error(error)
+        return state.log_step(f"{worker} warning: {str(error)}. Retrying.")
+
+    def _with_metrics(self, state: AgentState, breaker: ExecutionCircuitBreaker) -> AgentState:
+        return state.model_copy(update={"breaker_metrics": breaker.metrics()})
 
-        return state.model_copy(update={"recommended_actions": response.content[0].text})
+    def _trip(self, state: AgentState, cbe: CircuitBreakerException) -> AgentState:
+        # Catch systemic loops/errors and gracefully degrade execution state
+        state = state.model_copy(update={"circuit_tripped": True, "failure_reason": str(cbe)})
+        state = state.log_step(f"CRITICAL FAULT: {str(cbe)}")
+        return self._handle_graceful_degradation(state)
 
     def _handle_graceful_degradation(self, state: AgentState) -> AgentState:
         """Provides a safe default output state when the circuit breaker opens."""
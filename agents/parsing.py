@@ -0,0 +1,102 @@
+# agents/parsing.py
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from logsight.parser import LogEntry, LogLevel, parse_lines
+
+# Keys of every structured record handed to the analysis worker.
+RECORD_KEYS = ("timestamp", "level", "service", "message")
+
+# Lines the local parser could not structure are sent to the model in batches of this size.
+MODEL_BATCH_SIZE = 25
+
+# "auth_service: DB connection timeout" -> service "auth_service"
+_SERVICE_PREFIX = re.compile(r"^(?P<service>[A-Za-z_][\w.\-]*(?:\[\d+\])?):\s+(?P<message>.+)$")
+_PID_SUFFIX = re.compile(r"\[\d+\]$")
+
+
+def needs_model(entry: LogEntry) -> bool:
+    """True for lines the local parser only recognised as free text."""
+    return entry.format == "unknown" or (entry.format == "generic" and entry.level == LogLevel.UNKNOWN)
+
+
+def to_record(entry: LogEntry) -> Dict[str, Any]:
+    """Converts a parsed entry into a [timestamp, level, service, message] record."""
+    message = entry.message
+    service: Optional[str] = None
+    if entry.format == "syslog":
+        service = _PID_SUFFIX.sub("", entry.extra.get("process", "")) or None
+    elif entry.format == "nginx_access":
+        service = "nginx"
+        message = f'{entry.extra.get("request", "")} {entry.extra.get("status", "")}'.strip()
+    else:
+        service = entry.extra.get("logger")
+        if service is None:
+            m = _SERVICE_PREFIX.match(message)
+            if m:
+                service, message = _PID_SUFFIX.sub("", m.group("service")), m.group("message")
+    return {
+        "timestamp": entry.timestamp.isoformat() if entry.timestamp else None,
+        "level": entry.level.value,
+        "service": service,
+        "message": message,
+    }
+
+
+def record_service(record: Dict[str, Any]) -> Optional[str]:
+    """The record's service as a hashable key.
+
+    Model-structured records may hold any JSON value there; anything but a
+    string or null is converted with str().
+    """
+    service = record.get("service")
+    return service if service is None or isinstance(service, str) else str(service)
+
+
+def structure_logs(raw_logs: str) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+    """Parses raw logs locally.
+
+    Returns one record per non-blank line, plus the (index, raw line) pairs of
+    the records that still need the model because their line was not recognised.
+    """
+    entries = parse_lines(raw_logs.splitlines())
+    records = [to_record(entry) for entry in entries]
+    unresolved = [(i, entry.raw) for i, entry in enumerate(entries) if needs_model(entry)]
+    return records, unresolved
+
+
+def model_batches(
+    unresolved: List[Tuple[int, str]], batch_size: int = MODEL_BATCH_SIZE
+) -> List[List[Tuple[int, str]]]:
+    """Splits the unresolved lines into batches for the model."""
+    return [unresolved[i:i + batch_size] for i in range(0, len(unresolved), batch_size)]
+
+
+def merge_model_records(
+    records: List[Dict[str, Any]], batch: List[Tuple[int, str]], reply: Any
+) -> List[Dict[str, Any]]:
+    """Returns a copy of `records` with the model's records for `batch` filled in.
+
+    Raises ValueError when the reply is not one record object per line.
+    """
+    _check_reply(reply, batch)
+    merged = list(records)
+    for (index, _), item in zip(batch, reply):
+        local = records[index]
+        merged[index] = {key: item.get(key) or local[key] for key in RECORD_KEYS}
+    return merged
+
+
+def decode_model_reply(text: str, batch: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+    """Decodes the model's reply for `batch`.
+
+    Raises ValueError unless it is a JSON array of one record object per line.
+    """
+    reply = json.loads(text)
+    _check_reply(reply, batch)
+    return reply
+
+
+def _check_reply(reply: Any, batch: List[Tuple[int, str]]) -> None:
+    if not isinstance(reply, list) or len(reply) != len(batch) or not all(isinstance(r, dict) for r in reply):
+        raise ValueError(f"expected a JSON array of {len(batch)} records")
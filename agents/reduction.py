@@ -0,0 +1,128 @@
+# agents/reduction.py
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from logsight.analyzer import detect_anomalies, error_rate_spike
+from logsight.parser import LogEntry, LogLevel, _parse_level
+from logsight.templates import TemplateMiner
+from .parsing import record_service
+
+# Rough size of a token in characters, used to keep prompts within budget.
+CHARS_PER_TOKEN = 4
+# Default number of prompt tokens the reduced context may use.
+DEFAULT_TOKEN_BUDGET = 8000
+# Window (in records) scanned for error-rate spikes.
+SPIKE_WINDOW = 50
+
+_SEVERITY = {
+    LogLevel.CRITICAL: 4,
+    LogLevel.ERROR: 3,
+    LogLevel.WARNING: 2,
+    LogLevel.UNKNOWN: 1,
+    LogLevel.INFO: 0,
+    LogLevel.DEBUG: 0,
+}
+
+
+def estimate_tokens(records: Any) -> int:
+    """Approximate prompt tokens for `records` serialized as JSON."""
+    return len(json.dumps(records)) // CHARS_PER_TOKEN + 1
+
+
+@dataclass
+class Reduction:
+    """Result of reduce_records: the packed context plus its size accounting."""
+
+    records: List[Dict[str, Any]]
+    input_records: int
+    input_tokens: int
+    output_tokens: int
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.input_tokens / max(self.output_tokens, 1)
+
+
+def _level(record: Dict[str, Any]) -> LogLevel:
+    # Same aliases as the local parser, so WARN and FATAL rank as WARNING and CRITICAL
+    level = record.get("level")
+    return _parse_level(level if isinstance(level, str) else None)
+
+
+def _entries(records: List[Dict[str, Any]]) -> List[LogEntry]:
+    entries = []
+    for record in records:
+        message = str(record.get("message") or "")
+        entries.append(LogEntry(raw=message, level=_level(record), message=message))
+    return entries
+
+
+def _groups(records: List[Dict[str, Any]], template_ids: np.ndarray) -> Dict[Tuple, List[int]]:
+    groups: Dict[Tuple, List[int]] = {}
+    for i, (record, template_id) in enumerate(zip(records, template_ids.tolist())):
+        key = (_level(record), record_service(record), template_id)
+        groups.setdefault(key, []).append(i)
+    return groups
+
+
+def _representative(
+    records: List[Dict[str, Any]], members: List[int], template: Optional[str]
+) -> Dict[str, Any]:
+    first, last = records[members[0]], records[members[-1]]
+    rep = dict(first)
+    if len(members) > 1:
+        rep["count"] = len(members)
+        if last.get("timestamp") != first.get("timestamp"):
+            rep["last_timestamp"] = last.get("timestamp")
+        if any(records[i].get("message") != first.get("message") for i in members):
+            rep["template"] = template
+    return rep
+
+
+def reduce_records(
+    records: List[Dict[str, Any]], token_budget: int = DEFAULT_TOKEN_BUDGET
+) -> Reduction:
+    """Collapses and ranks parsed records so the most informative ones fit `token_budget`.
+
+    Records with the same level, service and message template become one
+    representative carrying a `count` (and the `template` when the messages
+    differ). Groups are ranked by whether detect_anomalies flags any of their
+    records, whether they fall inside an error_rate_spike range, severity and
+    frequency, then packed greedily and returned in order of first appearance.
+    """
+    input_tokens = estimate_tokens(records)
+    if not records:
+        return Reduction([], 0, input_tokens, input_tokens)
+
+    entries = _entries(records)
+    miner = TemplateMiner()
+    template_ids = miner.add_all(entry.message for entry in entries)
+    flagged = np.zeros(len(entries), dtype=bool)
+    flagged[detect_anomalies(entries, return_indices=True, templates=miner, min_template_count=2).indices] = True
+    in_spike = np.zeros(len(entries), dtype=bool)
+    for start, end, _ in error_rate_spike(entries, window_size=min(SPIKE_WINDOW, len(entries)), merge=True):
+        in_spike[start:end] = True
+
+    ranked = []
+    for (level, _, template_id), members in _groups(records, template_ids).items():
+        score = (
+            bool(flagged[members].any()),
+            bool(in_spike[members].any()),
+            _SEVERITY[level],
+            len(members),
+        )
+        rep = _representative(records, members, miner.template(template_id))
+        ranked.append((score, members[0], rep))
+    ranked.sort(key=lambda item: (item[0], -item[1]), reverse=True)
+
+    packed, used = [], 2  # the enclosing brackets
+    for _, first, rep in ranked:
+        cost = estimate_tokens(rep)
+        if used + cost > token_budget and packed:
+            continue
+        packed.append((first, rep))
+        used += cost
+    packed.sort(key=lambda item: item[0])
+    reduced = [rep for _, rep in packed]
+    return Reduction(reduced, len(records), input_tokens, estimate_tokens(reduced))
@@ -0,0 +1,375 @@
+# agents/service.py
+import asyncio
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from anthropic import Anthropic, AsyncAnthropic
+from .cache import cache_key
+from .orchestrator import ANALYSIS_SYSTEM_PROMPT, LogSightOrchestrator, PipelineEvent, without_retries
+from .state import AgentState
+
+# Seconds batch mode waits for more calls before submitting a Message Batch.
+DEFAULT_BATCH_WINDOW = 0.05
+# Most requests submitted in one Message Batch.
+DEFAULT_MAX_BATCH = 100
+# Seconds between polls of a submitted batch.
+BATCH_POLL_INTERVAL = 1.0
+# Analysis deadline in batch mode; a Message Batch can take minutes to end.
+BATCH_ANALYSIS_TIMEOUT = 600.0
+# System prompts of the calls batch mode queues (analysis, chunk and merge calls).
+BATCHED_SYSTEM_PROMPTS = (ANALYSIS_SYSTEM_PROMPT,)
+
+
+class BatchRequestError(Exception):
+    """Raised to the caller whose request in a Message Batch did not succeed."""
+    pass
+
+
+def _call_key(params: Dict[str, Any]) -> Tuple[str, int]:
+    """Identity of one messages.create call, for coalescing."""
+    prompt = "\n".join(str(m["content"]) for m in params["messages"])
+    return cache_key(params["model"], params["system"], prompt), params["max_tokens"]
+
+
+def _without_timeout(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in kwargs.items() if k != "timeout"}
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls: the first caller runs it, the others wait for its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, fn: Callable[[], Any], timeout: Optional[float] = None):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.followers += 1
+        if not leader:
+            try:
+                return future.result(timeout)
+            except FutureTimeout:
+                raise TimeoutError(f"Coalesced call did not finish within {timeout}s") from None
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines. The shared call is cancelled once no caller awaits it."""
+
+    def __init__(self):
+        self._calls: Dict[Any, list] = {}  # key -> [task, waiters]
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key, factory: Callable[[], Any]):
+        entry = self._calls.get(key)
+        if entry is None or entry[0].get_loop() is not asyncio.get_running_loop():
+            entry = self._calls[key] = [asyncio.ensure_future(factory()), 0]
+            entry[0].add_done_callback(lambda _: self._forget(key, entry))
+            self.leaders += 1
+        else:
+            self.followers += 1
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        except asyncio.CancelledError:
+            if entry[1] == 1:
+                entry[0].cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    def _forget(self, key, entry: list):
+        if self._calls.get(key) is entry:
+            del self._calls[key]
+
+
+class MessageBatcher:
+    """
+    Queues messages.create calls and submits them together as one Message Batch.
+
+    A batch is submitted `window` seconds after its first request, or as soon as
+    it holds `max_batch` requests. Each caller blocks until its own result is in.
+    """
+
+    def __init__(
+        self,
+        client,
+        window: float = DEFAULT_BATCH_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        poll_interval: float = BATCH_POLL_INTERVAL,
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.client = client
+        self.window = window
+        self.max_batch = max_batch
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, Dict[str, Any], Future]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._ids = itertools.count()
+        self.batches = 0
+        self.requests = 0
+
+    def submit(self, params: Dict[str, Any], timeout: Optional[float] = None):
+        """Returns the Message for `params` once its batch has ended."""
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((f"req-{next(self._ids)}", params, future))
+            self.requests += 1
+            if len(self._pending) >= self.max_batch:
+                self._flush_locked()
+            elif len(self._pending) == 1:
+                self._timer = threading.Timer(self.window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise TimeoutError(f"Batched call did not finish within {timeout}s") from None
+
+    def _flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if pending:
+            self.batches += 1
+            threading.Thread(target=self._run, args=(pending,), daemon=True).start()
+
+    def _run(self, pending):
+        batches = self.client.messages.batches
+        futures = {custom_id: future for custom_id, _, future in pending}
+        try:
+            batch = batches.create(
+                requests=[{"custom_id": custom_id, "params": params} for custom_id, params, _ in pending]
+            )
+            while batch.processing_status != "ended":
+                time.sleep(self.poll_interval)
+                batch = batches.retrieve(batch.id)
+            for entry in batches.results(batch.id):
+                future = futures.pop(entry.custom_id, None)
+                if future is not None and future.set_running_or_notify_cancel():
+                    _resolve(future, entry)
+            error: Exception = BatchRequestError("Request missing from the batch results.")
+        except Exception as e:
+            error = e
+        for future in futures.values():
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+
+class AsyncMessageBatcher:
+    """MessageBatcher for the async client; waiting callers do not hold threads."""
+
+    def __init__(
+        self,
+        client,
+        window: float = DEFAULT_BATCH_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        poll_interval: float = BATCH_POLL_INTERVAL,
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.client = client
+        self.window = window
+        self.max_batch = max_batch
+        self.poll_interval = poll_interval
+        self._pending: List[Tuple[str, Dict[str, Any], asyncio.Future]] = []
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: set = set()
+        self._ids = itertools.count()
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, params: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Requests queued on a loop that has since closed can never be flushed
+            self._loop, self._pending, self._handle = loop, [], None
+        future = loop.create_future()
+        self._pending.append((f"req-{next(self._ids)}", params, future))
+        self.requests += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif len(self._pending) == 1:
+            self._handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        pending, self._pending = self._pending, []
+        if pending:
+            self.batches += 1
+            task = asyncio.ensure_future(self._run(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending):
+        batches = self.client.messages.batches
+        futures = {custom_id: future for custom_id, _, future in pending}
+        try:
+            batch = await batches.create(
+                requests=[{"custom_id": custom_id, "params": params} for custom_id, params, _ in pending]
+            )
+            while batch.processing_status != "ended":
+                await asyncio.sleep(self.poll_interval)
+                batch = await batches.retrieve(batch.id)
+            async for entry in await batches.results(batch.id):
+                future = futures.pop(entry.custom_id, None)
+                if future is not None and not future.done():
+                    _resolve(future, entry)
+            error: Exception = BatchRequestError("Request missing from the batch results.")
+        except Exception as e:
+            error = e
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(error)
+
+
+def _resolve(future, entry):
+    result = entry.result
+    if result.type == "succeeded":
+        future.set_result(result.message)
+    else:
+        detail = getattr(result, "error", None)
+        future.set_exception(BatchRequestError(f"Batch request {entry.custom_id} {result.type}: {detail}"))
+
+
+class PooledClient:
+    """
+    Client proxy shared by every incident of an OrchestratorService.
+
+    messages.create coalesces concurrent identical calls and, given a batcher,
+    queues BATCHED_SYSTEM_PROMPTS calls into Message Batches. messages.stream
+    goes straight to the wrapped client.
+    """
+
+    def __init__(self, client, batcher: Optional[MessageBatcher] = None):
+        self.client = client
+        self.batcher = batcher
+        self.flight = SingleFlight()
+        self.messages = SimpleNamespace(
+            create=self._create, stream=lambda **kwargs: self.client.messages.stream(**kwargs)
+        )
+
+    def _create(self, **kwargs):
+        timeout = kwargs.get("timeout")
+        params = _without_timeout(kwargs)
+        return self.flight.do(_call_key(params), lambda: self._send(params, kwargs, timeout), timeout)
+
+    def _send(self, params, kwargs, timeout):
+        if self.batcher is not None and params["system"] in BATCHED_SYSTEM_PROMPTS:
+            return self.batcher.submit(params, timeout)
+        return self.client.messages.create(**kwargs)
+
+
+class AsyncPooledClient:
+    """PooledClient for the async client."""
+
+    def __init__(self, client, batcher: Optional[AsyncMessageBatcher] = None):
+        self.client = client
+        self.batcher = batcher
+        self.flight = AsyncSingleFlight()
+        self.messages = SimpleNamespace(create=self._create)
+
+    async def _create(self, **kwargs):
+        params = _without_timeout(kwargs)
+        return await self.flight.do(_call_key(params), lambda: self._send(params, kwargs))
+
+    async def _send(self, params, kwargs):
+        if self.batcher is not None and params["system"] in BATCHED_SYSTEM_PROMPTS:
+            return await self.batcher.submit(params)
+        return await self.client.messages.create(**kwargs)
+
+
+class OrchestratorService:
+    """
+    One long-lived orchestrator for the whole process.
+
+    Every incident shares one pair of clients (and so one connection pool), the
+    response cache and the circuit breaker. Identical model calls in flight at
+    the same time are sent once. With `batch=True`, analysis calls are queued
+    for `batch_window` seconds and submitted together as a Message Batch.
+    Remaining keyword arguments configure the LogSightOrchestrator.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        async_client=None,
+        batch: bool = False,
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        poll_interval: float = BATCH_POLL_INTERVAL,
+        **orchestrator_kwargs,
+    ):
+        api_key = os.environ.get("ANTHROPIC_API_KEY", "mock-key-for-dev")
+        client = client or Anthropic(api_key=api_key)
+        async_client = async_client or AsyncAnthropic(api_key=api_key)
+        batcher = async_batcher = None
+        if batch:
+            batcher = MessageBatcher(client, batch_window, max_batch, poll_interval)
+            async_batcher = AsyncMessageBatcher(async_client, batch_window, max_batch, poll_interval)
+            orchestrator_kwargs["worker_timeouts"] = {
+                "analysis": BATCH_ANALYSIS_TIMEOUT, **(orchestrator_kwargs.get("worker_timeouts") or {})
+            }
+        self.client = PooledClient(without_retries(client), batcher)
+        self.async_client = AsyncPooledClient(async_client, async_batcher)
+        self.orchestrator = LogSightOrchestrator(
+            client=self.client, async_client=self.async_client, **orchestrator_kwargs
+        )
+
+    def process_incident(self, raw_log_data: str) -> AgentState:
+        return self.orchestrator.process_incident(raw_log_data)
+
+    def stream_incident(self, raw_log_data: str) -> Iterator[PipelineEvent]:
+        return self.orchestrator.stream_incident(raw_log_data)
+
+    async def process_incident_async(self, raw_log_data: str, timeout: Optional[float] = None) -> AgentState:
+        return await self.orchestrator.process_incident_async(raw_log_data, timeout)
+
+    async def process_many(self, raw_log_batches: Iterable[str], **kwargs) -> List[AgentState]:
+        return await self.orchestrator.process_many(raw_log_batches, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        """Calls sent to the backend, calls coalesced away and Message Batches submitted."""
+        flights = (self.client.flight, self.async_client.flight)
+        batchers = [b for b in (self.client.batcher, self.async_client.batcher) if b is not None]
+        return {
+            "calls": sum(f.leaders for f in flights),
+            "coalesced": sum(f.followers for f in flights),
+            "batches": sum(b.batches for b in batchers),
+            "batched_requests": sum(b.requests for b in batchers),
+        }
@@ -1,25 +1,102 @@
 # agents/state.py
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+import threading
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic_core import core_schema
+
+
+class StepTrace(Sequence[str]):
+    """
+    Immutable, append-only execution trace with structural sharing.
+
+    Each trace is a view of the first `len(trace)` items of a list shared with
+    the traces it was appended from, so append is O(1) instead of copying every
+    earlier step. Appending to a trace that is not the newest view of its list
+    (branching from an older state) copies that prefix first, so no existing
+    trace ever changes.
+    """
+
+    __slots__ = ("_items", "_length")
+    _lock = threading.Lock()
+
+    def __init__(self, steps: Sequence[str] = ()):
+        self._items = list(steps)
+        self._length = len(self._items)
+
+    def append(self, step: str) -> "StepTrace":
+        """Returns a new trace with `step` added; this trace is unchanged."""
+        with self._lock:
+            items = self._items
+            if len(items) != self._length:
+                items = items[:self._length]
+            items.append(step)
+        trace = StepTrace.__new__(StepTrace)
+        trace._items, trace._length = items, self._length + 1
+        return trace
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._items[:self._length][index]
+        if not -self._length <= index < self._length:
+            raise IndexError("StepTrace index out of range")
+        return self._items[index % self._length]
+
+    def __iter__(self) -> Iterator[str]:
+        return islice(self._items, self._length)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (StepTrace, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"StepTrace({list(self)!r})"
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler) -> core_schema.CoreSchema:
+        from_list = core_schema.no_info_after_validator_function(
+            cls, core_schema.list_schema(core_schema.str_schema())
+        )
+        return core_schema.json_or_python_schema(
+            json_schema=from_list,
+            python_schema=core_schema.union_schema([core_schema.is_instance_schema(cls), from_list]),
+            serialization=core_schema.plain_serializer_function_ser_schema(list),
+        )
+
 
 class AgentState(BaseModel):
     """
     The immutable single source of truth passed across the LogSight-AI lifecycle.
     Prevents side effects and provides explicit telemetry for debugging.
+
+    Fields cannot be reassigned; every change goes through model_copy(update=...),
+    which shares unchanged fields (raw_logs, parsed_json, ...) by reference.
     """
+    model_config = ConfigDict(frozen=True)
+
     raw_logs: str
     parsed_json: Optional[List[Dict[str, Any]]] = None
+    # Reduced view of parsed_json that the analysis worker actually sees
+    context_json: Optional[List[Dict[str, Any]]] = None
     security_threats: List[str] = Field(default_factory=list)
+    partial_analyses: List[str] = Field(default_factory=list)  # per-chunk findings in map-reduce mode
     root_cause_analysis: Optional[str] = None
     recommended_actions: Optional[str] = None
-    
+
     # Observability & Guardrails Telemetry
-    execution_steps: List[str] = Field(default_factory=list)
+    execution_steps: StepTrace = Field(default_factory=StepTrace)
     loop_count: int = 0
     circuit_tripped: bool = False
     failure_reason: Optional[str] = None
+    compression_ratio: Optional[float] = None  # parsed_json tokens / context_json tokens
+    cache_hits: int = 0
+    cache_misses: int = 0
+    breaker_metrics: Dict[str, Any] = Field(default_factory=dict)  # ExecutionCircuitBreaker.metrics()
 
     def log_step(self, step_description: str) -> "AgentState":
         """Returns a new copy of state with the updated execution trace."""
-        updated_steps = list(self.execution_steps) + [step_description]
-        return self.model_copy(update={"execution_steps": updated_steps})
+        return self.model_copy(update={"execution_steps": self.execution_steps.append(step_description)})
@@ -1,11 +1,26 @@
 # app.py (Partial UI Integration Example)
 import streamlit as st
 import os
-from agents.orchestrator import LogSightOrchestrator
+from agents.cache import ResponseCache
+from agents.service import OrchestratorService
 
 st.set_page_config(page_title="LogSight-AI Enterprise", layout="wide")
 st.title("🛡️ LogSight-AI: Multi-Agent Observability System")
 
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    # One cache per server process, so re-runs and re-clicks reuse earlier responses
+    return ResponseCache(disk_path=os.environ.get("LOGSIGHT_CACHE_PATH"))
+
+
+@st.cache_resource
+def get_service() -> OrchestratorService:
+    # One pooled client and circuit breaker for every session; identical
+    # incidents submitted at the same time share their model calls
+    return OrchestratorService(cache=get_response_cache())
+
+
 # Ensure API Key is bound safely
 if "ANTHROPIC_API_KEY" not in os.environ:
     os.environ["ANTHROPIC_API_KEY"] = st.sidebar.text_input("Anthropic API Key", type="password")
@@ -16,29 +31,60 @@ if st.button("Run Orchestrated Analysis Pipeline"):
     if not os.environ.get("ANTHROPIC_API_KEY"):
         st.error("Please provide an API key to run analysis.")
     else:
-        with st.spinner("Orchestrator executing agent lifecycle layers..."):
-            # Execute Pipeline
-            orchestrator = LogSightOrchestrator()
-            final_state = orchestrator.process_incident(raw_input_logs)
-            
-            # Layout Response Columns
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("📋 System Analysis Report")
-                st.markdown(f"### Root Cause\n{final_state.root_cause_analysis}")
-                st.markdown(f"### Recommended SOP Mitigation\n{final_state.recommended_actions}")
-            
-            with col2:
-                st.subheader("⚙️ Agent Orchestration Telemetry")
-                
-                # Highlight Circuit Breaker Status
-                if final_state.circuit_tripped:
-                    st.error(f"🔴 Circuit Breaker: OPEN\nReason: {final_state.failure_reason}")
+        service = get_service()
+
+        # Layout Response Columns
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.subheader("📋 System Analysis Report")
+            st.markdown("### Root Cause")
+            root_cause_box = st.empty()
+            st.markdown("### Recommended SOP Mitigation")
+            remediation_box = st.empty()
+
+        with col2:
+            st.subheader("⚙️ Agent Orchestration Telemetry")
+            status_box = st.empty()
+            cache_box = st.empty()
+            st.markdown("**Execution Trace Sequence:**")
+
+        # Render the trace and the model replies as the pipeline produces them
+        boxes = {"analysis": root_cause_box, "remediation": remediation_box}
+        replies = {"analysis": "", "remediation": ""}
+        status_box.info("⏳ Orchestrator executing agent lifecycle layers...")
+        final_state = None
+        try:
+            for event in service.stream_incident(raw_input_logs):
+                if event.kind == "step":
+                    col2.info(event.text)
+                elif event.kind == "delta":
+                    replies[event.worker] += event.text
+                    boxes[event.worker].markdown(replies[event.worker])
                 else:
-                    st.success("🟢 Circuit Breaker: CLOSED (Healthy)")
-                
-                # Print explicit chronological execution trace
-                st.markdown("**Execution Trace Sequence:**")
-                for step in final_state.execution_steps:
-                    st.info(step)
+                    final_state = event.state
+        except Exception as e:
+            status_box.error(f"🔴 Pipeline failed: {e}")
+        else:
+            if final_state is None:
+                status_box.error("🔴 Pipeline ended without a final state.")
+
+        if final_state is not None:
+            # The degraded fallback text replaces whatever streamed before a trip
+            root_cause_box.markdown(final_state.root_cause_analysis)
+            remediation_box.markdown(final_state.recommended_actions)
+
+            # Highlight Circuit Breaker Status
+            metrics = final_state.breaker_metrics
+            if final_state.circuit_tripped:
+                status_box.error(
+                    f"🔴 Circuit Breaker: {metrics.get('status', 'OPEN')}\nReason: {final_state.failure_reason}"
+                )
+            else:
+                status_box.success("🟢 Circuit Breaker: CLOSED (Healthy)")
+
+            cache_box.caption(
+                f"Response cache: {final_state.cache_hits} hits / {final_state.cache_misses} misses · "
+                f"Breaker: {metrics['window_errors']}/{metrics['window_calls']} recent calls failed, "
+                f"{metrics['timeouts']} timeouts, {metrics['trips']} trips, {metrics['rejected']} rejected"
+            )
@@ -0,0 +1,103 @@
+"""Throughput benchmark for the :mod:`logsight.analyzer` hot paths.
+
+Times :func:`~logsight.analyzer.detect_anomalies` and
+:func:`~logsight.analyzer.error_rate_spike` against their legacy per-entry
+loops, on both a list of entries and a columnar
+:class:`~logsight.batch.LogBatch`::
+
+    python benchmarks/bench_analyzer.py --entries 5000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from logsight.analyzer import compute_stats, detect_anomalies, error_rate_spike
+from logsight.batch import LogBatch
+from logsight.parser import LogEntry, LogLevel
+
+MESSAGES = [
+    "GET /v1/users 200 in 12ms",
+    "cache miss for key session:42",
+    "job 991 failed: timeout after 5001ms",
+    "Traceback (most recent call last): " + "frame " * 60,
+]
+LEVELS = [LogLevel.INFO] * 8 + [LogLevel.WARNING, LogLevel.ERROR]
+
+
+def legacy_detect_anomalies(entries: list[LogEntry], zscore_threshold: float = 2.5) -> list[LogEntry]:
+    """The pre-vectorization loop: one z-score and an id() lookup per entry."""
+    compute_stats(entries)
+    lengths = np.array([len(e.message) for e in entries], dtype=float)
+    mean = float(np.mean(lengths))
+    std = float(np.std(lengths))
+    anomalous: list[LogEntry] = []
+    seen_ids: set[int] = set()
+    for entry in entries:
+        flagged = entry.is_error
+        if std > 0 and abs(len(entry.message) - mean) / std > zscore_threshold:
+            flagged = True
+        if flagged and id(entry) not in seen_ids:
+            anomalous.append(entry)
+            seen_ids.add(id(entry))
+    return anomalous
+
+
+def legacy_error_rate_spike(entries: list[LogEntry], window_size: int = 100) -> list[int]:
+    """The pre-prefix-sum scan: slice each window and count errors in Python."""
+    spike_starts = []
+    for start in range(0, len(entries) - window_size + 1, window_size):
+        errors = sum(1 for e in entries[start : start + window_size] if e.is_error)
+        if errors / window_size >= 0.25:
+            spike_starts.append(start)
+    return spike_starts
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--entries", type=int, default=1_000_000)
+    ap.add_argument("--repeat", type=int, default=3, help="Best-of-N timing runs.")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    entries = []
+    for _ in range(args.entries):
+        message = rng.choice(MESSAGES)
+        entries.append(LogEntry(raw=message, format="generic", level=rng.choice(LEVELS), message=message))
+    batch = LogBatch.from_entries(entries)
+
+    legacy = _timed(lambda: legacy_detect_anomalies(entries), args.repeat)
+    rows = _timed(lambda: detect_anomalies(entries), args.repeat)
+    columns = _timed(lambda: detect_anomalies(batch, return_indices=True), args.repeat)
+
+    print(f"detect_anomalies over {args.entries:,} entries")
+    print(f"  legacy loop (list)        : {legacy:8.3f}s")
+    print(f"  vectorized (list)         : {rows:8.3f}s  {legacy / rows:6.1f}x")
+    print(f"  vectorized (batch, index) : {columns:8.3f}s  {legacy / columns:6.1f}x")
+
+    legacy = _timed(lambda: legacy_error_rate_spike(entries), args.repeat)
+    stepped = _timed(lambda: error_rate_spike(batch, stride=100), args.repeat)
+    sliding = _timed(lambda: error_rate_spike(batch, stride=1, merge=True), args.repeat)
+
+    print(f"error_rate_spike over {args.entries:,} entries (window 100)")
+    print(f"  legacy loop, stride 100   : {legacy:8.3f}s")
+    print(f"  prefix sum, stride 100    : {stepped:8.3f}s  {legacy / stepped:6.1f}x")
+    print(f"  prefix sum, stride 1      : {sliding:8.3f}s  {legacy / sliding:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
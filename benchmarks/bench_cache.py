@@ -0,0 +1,65 @@
+"""Latency of a repeated incident with and without the response cache.
+
+Runs the same incident ``--repeats`` times against a fake client with a
+fixed per-call latency, first with no cache, then with the in-memory tier,
+then with a fresh orchestrator reading a warm SQLite tier::
+
+    python benchmarks/bench_cache.py --repeats 20 --latency 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_orchestrator import SAMPLE_LOGS, FakeClient  # noqa: E402
+
+from agents.cache import ResponseCache  # noqa: E402
+from agents.orchestrator import LogSightOrchestrator  # noqa: E402
+
+
+def _time(orchestrator: LogSightOrchestrator, repeats: int) -> list[float]:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        orchestrator.process_incident(SAMPLE_LOGS)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per model call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        runs = [
+            ("no cache", LogSightOrchestrator(client=FakeClient(args.latency))),
+            ("memory", LogSightOrchestrator(client=FakeClient(args.latency), cache=ResponseCache())),
+        ]
+        LogSightOrchestrator(
+            client=FakeClient(args.latency), cache=ResponseCache(disk_path=path)
+        ).process_incident(SAMPLE_LOGS)
+        runs.append(
+            ("sqlite", LogSightOrchestrator(client=FakeClient(args.latency), cache=ResponseCache(disk_path=path)))
+        )
+
+        print(f"latency {args.latency * 1000:.0f} ms/call, {args.repeats} repeats")
+        for name, orchestrator in runs:
+            times = _time(orchestrator, args.repeats)
+            print(
+                f"{name:<9} first {times[0]:8.2f} ms  repeat median {statistics.median(times[1:]):8.2f} ms  "
+                f"model calls {orchestrator.client.calls}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Load test of ``logsight serve`` with the traffic ``log_simulator.py`` generates.
+
+Starts the ingest server in a subprocess pinned to one CPU, then POSTs
+simulator batches (``--batch-size`` records, anomaly bursts included) over
+``--connections`` keep-alive connections for ``--seconds`` seconds.  By
+default batches are paced to ``--rate`` records/s (the simulator's 5000
+records at 10 Hz is 50k records/s); ``--rate 0`` sends as fast as the server
+answers.  Reports the accepted rate, 503s from backpressure, request
+latency, and the server's own CPU time, so records per server CPU-second
+(its one-core capacity) is measured even when client and server share a
+machine::
+
+    python benchmarks/bench_ingest.py --rate 50000 --seconds 10
+    python benchmarks/bench_ingest.py --rate 0 --connections 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from log_simulator import generate_batch  # noqa: E402
+
+from logsight.ingest import INGEST_PATH, STATS_PATH  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _cpu_seconds(pid: int) -> float:
+    """User + system CPU time of *pid* (Linux)."""
+    with open(f"/proc/{pid}/stat") as fh:
+        fields = fh.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_server(port: int, cpu: int) -> subprocess.Popen:
+    pin = None
+    if hasattr(os, "sched_setaffinity"):
+        pin = lambda: os.sched_setaffinity(0, {cpu})  # noqa: E731
+    return subprocess.Popen(
+        [sys.executable, "-m", "logsight.cli", "serve", "--port", str(port)],
+        cwd=os.path.join(os.path.dirname(__file__), ".."),
+        stdout=subprocess.DEVNULL,
+        preexec_fn=pin,
+    )
+
+
+async def request(reader, writer, method: str, path: str, body: bytes = b"") -> tuple[int, bytes]:
+    header = (
+        f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    )
+    writer.writelines([header.encode(), body])
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(head.split(b"Content-Length: ", 1)[1].split(b"\r\n", 1)[0])
+    return int(head.split(b" ", 2)[1]), await reader.readexactly(length)
+
+
+async def stats(port: int) -> dict:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        return json.loads((await request(reader, writer, "GET", STATS_PATH))[1])
+    finally:
+        writer.close()
+
+
+async def wait_ready(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await stats(port)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def load(port: int, bodies: list[bytes], batch_size: int, args) -> dict:
+    results = {"sent": 0, "accepted": 0, "throttled": 0, "latencies": []}
+    interval = args.connections * batch_size / args.rate if args.rate else 0.0
+    stop = time.monotonic() + args.seconds
+
+    async def worker(n: int) -> None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        next_send = time.monotonic() + interval * n / args.connections
+        i = n
+        while time.monotonic() < stop:
+            if interval:
+                await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+                next_send += interval
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, "POST", INGEST_PATH, bodies[i % len(bodies)])
+            results["latencies"].append(time.perf_counter() - start)
+            results["sent"] += batch_size
+            if status == 202:
+                results["accepted"] += batch_size
+            elif status == 503:
+                results["throttled"] += 1
+                await asyncio.sleep(0.01)
+            i += args.connections
+        writer.close()
+
+    await asyncio.gather(*(worker(n) for n in range(args.connections)))
+    return results
+
+
+async def run(args) -> None:
+    port = _free_port()
+    server = start_server(port, args.cpu)
+    try:
+        await wait_ready(port)
+        # Simulator batches; every 15th falls in an anomaly window
+        bodies = [
+            json.dumps({"logs": generate_batch(args.batch_size, now=i)}).encode() for i in range(30)
+        ]
+        cpu_before = _cpu_seconds(server.pid)
+        start = time.perf_counter()
+        results = await load(port, bodies, args.batch_size, args)
+        while (await stats(port))["ingest"]["queued"]:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        cpu = _cpu_seconds(server.pid) - cpu_before
+        final = await stats(port)
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(results["latencies"])
+    offered = f"{args.rate:,} records/s" if args.rate else "unthrottled"
+    print(f"offered {offered}, {args.connections} connections, {args.batch_size}-record batches")
+    print(f"accepted   {results['accepted'] / elapsed:12,.0f} records/s  ({results['accepted']:,} in {elapsed:.1f} s)")
+    print(f"analyzed   {final['total']:12,} records  ({final['error_count']:,} errors, "
+          f"{len(final['spikes'])} spike ranges)")
+    print(f"throttled  {results['throttled']:12,} requests (503)")
+    print(f"latency    p50 {statistics.median(latencies) * 1000:.1f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+    print(f"server CPU {cpu:12.2f} s  -> {final['total'] / max(cpu, 1e-9):,.0f} records per CPU-second")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=50_000, help="records/s to offer; 0 = unthrottled")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--connections", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--cpu", type=int, default=0, help="CPU the server is pinned to")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Per-entry memory of parsed :class:`~logsight.parser.LogEntry` objects.
+
+Uses :mod:`tracemalloc` to measure what stays allocated after parsing N
+lines, for the current slotted entries and for the legacy dataclass layout
+with an eagerly built ``extra`` dict::
+
+    python benchmarks/bench_memory.py --lines 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from logsight.parser import (
+    _DISPATCH,
+    LogLevel,
+    TimestampParser,
+    _parse_level,
+    _prefilter,
+    parse_line,
+)
+
+SAMPLES = [
+    "2024-01-15T12:34:56.123Z INFO [api] GET /v1/users 200 in 12ms\n",
+    "Jan 15 12:34:56 web-01 sshd[4211]: Accepted publickey for deploy from 10.0.0.4\n",
+    '192.168.1.1 - frank [10/Oct/2000:13:55:36 -0700] "GET /apache_pb.gif HTTP/1.0" 200 2326\n',
+    "WARNING disk usage at 91% on /var\n",
+]
+
+
+@dataclass
+class LegacyLogEntry:
+    raw: str
+    format: str = "unknown"
+    timestamp: datetime | None = None
+    level: LogLevel = LogLevel.UNKNOWN
+    message: str = ""
+    extra: dict[str, str] = field(default_factory=dict)
+
+
+def legacy_parse_line(line: str, timestamps: TimestampParser) -> LegacyLogEntry:
+    line = line.rstrip("\n\r")
+    for fmt_name, pattern in _DISPATCH[_prefilter(line)]:
+        m = pattern.match(line)
+        if m:
+            groups = m.groupdict()
+            return LegacyLogEntry(
+                raw=line,
+                format=fmt_name,
+                timestamp=timestamps(groups.get("timestamp")),
+                level=_parse_level(groups.get("level")),
+                message=groups.get("message") or line,
+                extra={
+                    k: v
+                    for k, v in groups.items()
+                    if k not in {"timestamp", "level", "message"} and v is not None
+                },
+            )
+    return LegacyLogEntry(raw=line, message=line)
+
+
+def _bytes_per_entry(parse: Callable[[str, TimestampParser], object], lines: list[str]) -> float:
+    timestamps = TimestampParser(year=2024)
+    gc.collect()
+    tracemalloc.start()
+    entries = [parse(line, timestamps) for line in lines]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del entries
+    return current / len(lines)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lines", type=int, default=1_000_000, help="Entries to keep alive.")
+    args = ap.parse_args()
+
+    lines = [SAMPLES[i % len(SAMPLES)] for i in range(args.lines)]
+    legacy = _bytes_per_entry(legacy_parse_line, lines)
+    slotted = _bytes_per_entry(lambda line, ts: parse_line(line, timestamps=ts), lines)
+    print(f"entries           : {args.lines:,}")
+    print(f"legacy dataclass  : {legacy:8.1f} B/entry")
+    print(f"slotted LogEntry  : {slotted:8.1f} B/entry")
+    print(f"reduction         : {legacy / slotted:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Incident throughput of the sequential and async orchestrator paths.
+
+Both paths run against local fake clients that sleep for a fixed latency
+per model call instead of reaching the network::
+
+    python benchmarks/bench_orchestrator.py --incidents 200 --latency 0.05 --concurrency 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agents.orchestrator import PARSER_SYSTEM_PROMPT, LogSightOrchestrator  # noqa: E402
+
+SAMPLE_LOGS = "2024-01-15T10:00:00Z ERROR auth_service: DB connection timeout\n"
+
+
+def _response(system: str) -> SimpleNamespace:
+    if system == PARSER_SYSTEM_PROMPT:
+        text = json.dumps([{"timestamp": None, "level": "ERROR", "service": "auth", "message": "x"}])
+    else:
+        text = "synthetic model output"
+    return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+class FakeClient:
+    """Blocking client whose calls each take *latency* seconds."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls = 0
+        self.messages = SimpleNamespace(create=self._create)
+
+    def _create(self, model, max_tokens, system, messages, timeout=None):
+        self.calls += 1
+        time.sleep(self.latency)
+        return _response(system)
+
+
+class FakeAsyncClient:
+    """Async client whose calls each take *latency* seconds."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls = 0
+        self.messages = SimpleNamespace(create=self._create)
+
+    async def _create(self, model, max_tokens, system, messages):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return _response(system)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--incidents", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per model call")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--sequential", type=int, default=20, help="incidents to time serially")
+    args = parser.parse_args()
+
+    orchestrator = LogSightOrchestrator(
+        client=FakeClient(args.latency), async_client=FakeAsyncClient(args.latency)
+    )
+
+    start = time.perf_counter()
+    for _ in range(args.sequential):
+        orchestrator.process_incident(SAMPLE_LOGS)
+    serial_rate = args.sequential / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    asyncio.run(
+        orchestrator.process_many([SAMPLE_LOGS] * args.incidents, concurrency=args.concurrency)
+    )
+    elapsed = time.perf_counter() - start
+    async_rate = args.incidents / elapsed
+
+    print(f"latency {args.latency * 1000:.0f} ms/call, {args.incidents} incidents")
+    print(f"sequential: {serial_rate:8.1f} incidents/s")
+    print(
+        f"async x{args.concurrency}: {async_rate:8.1f} incidents/s  "
+        f"({elapsed:.2f} s, {async_rate / serial_rate:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
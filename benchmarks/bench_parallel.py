@@ -0,0 +1,72 @@
+"""Serial vs. sharded multi-process parsing of one large log file.
+
+Writes a synthetic log of N lines to a temporary file, then times
+``LogBatch.from_file`` against ``parse_file_parallel`` for each worker
+count and checks the batches are identical::
+
+    python benchmarks/bench_parallel.py --lines 2000000 --workers 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from logsight.batch import LogBatch
+from logsight.parallel import parse_file_parallel
+
+TEMPLATES = [
+    "2024-01-15T12:{m:02d}:{s:02d}.123Z INFO [api] GET /v1/users/{n} 200 in {ms}ms\n",
+    "2024-01-15T12:{m:02d}:{s:02d}.456Z ERROR [db] query timeout after {ms}ms on shard {n}\n",
+    "2024-01-15T12:{m:02d}:{s:02d}.789Z WARNING [cache] eviction rate {n}/s\n",
+]
+
+
+def write_log(path: str, lines: int) -> None:
+    rng = random.Random(0)
+    with open(path, "w", encoding="utf-8") as fh:
+        for i in range(lines):
+            fh.write(
+                rng.choice(TEMPLATES).format(
+                    m=i // 60 % 60, s=i % 60, n=rng.randint(1, 10_000), ms=rng.randint(1, 5000)
+                )
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.log")
+        write_log(path, args.lines)
+        print(f"{args.lines:,} lines, {os.path.getsize(path) / 2**20:.1f} MiB")
+
+        start = time.perf_counter()
+        serial = LogBatch.from_file(path)
+        base = time.perf_counter() - start
+        print(f"serial      {base:7.2f}s  {args.lines / base:12,.0f} lines/s")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            batch = parse_file_parallel(path, workers)
+            elapsed = time.perf_counter() - start
+            same = all(
+                np.array_equal(getattr(serial, name), getattr(batch, name))
+                for name in ("levels", "timestamps", "message_keys", "raw_offsets")
+            ) and serial.vocabulary == batch.vocabulary
+            print(
+                f"workers={workers:<3} {elapsed:7.2f}s  {args.lines / elapsed:12,.0f} lines/s"
+                f"  {base / elapsed:5.2f}x  identical={same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Throughput benchmark for :func:`logsight.parser.parse_line`.
+
+Reports lines/sec for each supported format, comparing the single-pass
+dispatcher against the legacy pattern-by-pattern cascade::
+
+    python benchmarks/bench_parser.py --lines 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+
+from logsight.parser import (
+    _PATTERNS,
+    LogEntry,
+    _parse_level,
+    _parse_timestamp,
+    parse_line,
+)
+
+SAMPLES: dict[str, list[str]] = {
+    "syslog": [
+        "Jan 15 12:34:56 web-01 sshd[4211]: Accepted publickey for deploy from 10.0.0.4",
+        "Feb  3 01:02:03 db-02 postgres[88]: checkpoint complete: wrote 512 buffers",
+    ],
+    "iso8601": [
+        "2024-01-15T12:34:56.123Z INFO [api] GET /v1/users 200 in 12ms",
+        "2024-01-15 12:34:57,481 ERROR [worker] job 991 failed: timeout after 5001ms",
+    ],
+    "nginx_access": [
+        '192.168.1.1 - frank [10/Oct/2000:13:55:36 -0700] "GET /apache_pb.gif HTTP/1.0" 200 2326',
+        '10.1.2.3 - - [10/Oct/2000:13:55:37 -0700] "POST /api/login HTTP/1.1" 401 87',
+    ],
+    "generic": [
+        "WARNING disk usage at 91% on /var",
+        "worker pool resized to 32 threads",
+    ],
+}
+
+
+def cascade_parse_line(line: str) -> LogEntry:
+    """Reference implementation: try every pattern in ``_PATTERNS`` in turn."""
+    line = line.rstrip("\n\r")
+    for fmt_name, pattern in _PATTERNS:
+        m = pattern.match(line)
+        if m:
+            groups = m.groupdict()
+            entry = LogEntry(raw=line, format=fmt_name)
+            entry.timestamp = _parse_timestamp(groups.get("timestamp"))
+            entry.level = _parse_level(groups.get("level"))
+            entry.message = groups.get("message") or line
+            skip = {"timestamp", "level", "message"}
+            entry.extra = {k: v for k, v in groups.items() if k not in skip and v is not None}
+            return entry
+    return LogEntry(raw=line, message=line)
+
+
+def _lines_per_sec(fn: Callable[[str], LogEntry], lines: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            fn(line)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lines", type=int, default=200_000, help="Lines per format.")
+    ap.add_argument("--repeat", type=int, default=3, help="Best-of-N timing runs.")
+    args = ap.parse_args()
+
+    print(f"{'format':<14}{'cascade':>14}{'dispatch':>14}{'speedup':>10}")
+    for fmt_name, samples in SAMPLES.items():
+        lines = (samples * (args.lines // len(samples) + 1))[: args.lines]
+        assert all(parse_line(s) == cascade_parse_line(s) for s in samples)
+        legacy = _lines_per_sec(cascade_parse_line, lines, args.repeat)
+        fast = _lines_per_sec(parse_line, lines, args.repeat)
+        print(f"{fmt_name:<14}{legacy:>12,.0f}/s{fast:>12,.0f}/s{fast / legacy:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
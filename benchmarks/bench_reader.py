@@ -0,0 +1,52 @@
+"""Text vs. memory-mapped reader for ``LogBatch.from_file``.
+
+Writes a synthetic log of N lines to a temporary file and times both
+readers, reporting lines/sec and whether the batches hold the same rows::
+
+    python benchmarks/bench_reader.py --lines 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from bench_parallel import write_log
+
+from logsight.batch import LogBatch
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.log")
+        write_log(path, args.lines)
+        print(f"{args.lines:,} lines, {os.path.getsize(path) / 2**20:.1f} MiB")
+
+        batches, timings = {}, {}
+        for reader in ("text", "mmap"):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                batches[reader] = LogBatch.from_file(path, reader=reader)
+                best = min(best, time.perf_counter() - start)
+            timings[reader] = best
+            print(f"{reader:<5} {best:7.2f}s  {args.lines / best:12,.0f} lines/s")
+
+        text, mmapped = batches["text"], batches["mmap"]
+        same = all(
+            np.array_equal(getattr(text, name), getattr(mmapped, name))
+            for name in ("levels", "timestamps", "message_keys", "message_lengths")
+        ) and text.vocabulary == mmapped.vocabulary
+        print(f"speedup {timings['text'] / timings['mmap']:.2f}x  identical={same}")
+
+
+if __name__ == "__main__":
+    main()
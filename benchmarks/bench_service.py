@@ -0,0 +1,181 @@
+"""Throughput and cost of bursty incident load: per-incident orchestrators vs. OrchestratorService.
+
+Incidents arrive in ``--bursts`` bursts of ``--burst-size`` at once, a
+``--duplicates`` fraction of them repeats of a few common payloads.  Every
+mode runs against one local fake backend:
+
+* ``per-incident`` builds a new orchestrator and client per incident (what
+  ``app.py`` did per click), so every incident pays ``--connect`` seconds of
+  connection setup;
+* ``service`` shares one pooled client and coalesces identical calls;
+* ``service+batch`` also queues analysis calls into Message Batches, which
+  take ``--batch-latency`` seconds and are billed at half price.
+
+Cost is priced per token of the characters sent and received::
+
+    python benchmarks/bench_service.py --bursts 5 --burst-size 40 --duplicates 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agents.orchestrator import LogSightOrchestrator  # noqa: E402
+from agents.service import OrchestratorService  # noqa: E402
+
+# USD per million tokens; Message Batches are billed at half these prices.
+INPUT_PRICE = 3.0
+OUTPUT_PRICE = 15.0
+BATCH_DISCOUNT = 0.5
+REPLY_PADDING = " synthetic model output" * 20
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _reply(params: dict) -> str:
+    # Distinct per prompt, so distinct incidents get distinct remediation prompts
+    return f"finding {zlib.crc32(params['messages'][0]['content'].encode())}{REPLY_PADDING}"
+
+
+class FakeBackend:
+    """Shared upstream: counts calls and cost, sleeping *latency* seconds per call."""
+
+    def __init__(self, latency: float, batch_latency: float) -> None:
+        self.latency = latency
+        self.batch_latency = batch_latency
+        self.lock = threading.Lock()
+        self.calls = self.batches = 0
+        self.cost = 0.0
+        self._submitted = {}
+
+    def charge(self, params: dict, discount: float = 1.0) -> None:
+        prompt = params["system"] + params["messages"][0]["content"]
+        with self.lock:
+            self.calls += 1
+            self.cost += discount * (_tokens(prompt) * INPUT_PRICE + _tokens(_reply(params)) * OUTPUT_PRICE) / 1e6
+
+    def create(self, **params) -> SimpleNamespace:
+        params.pop("timeout", None)
+        self.charge(params)
+        time.sleep(self.latency)
+        return SimpleNamespace(content=[SimpleNamespace(text=_reply(params))])
+
+    def create_batch(self, requests) -> SimpleNamespace:
+        with self.lock:
+            self.batches += 1
+            batch_id = str(self.batches)
+            self._submitted[batch_id] = (list(requests), time.monotonic() + self.batch_latency)
+        return SimpleNamespace(id=batch_id, processing_status="in_progress")
+
+    def retrieve(self, batch_id) -> SimpleNamespace:
+        ended = time.monotonic() >= self._submitted[batch_id][1]
+        return SimpleNamespace(id=batch_id, processing_status="ended" if ended else "in_progress")
+
+    def results(self, batch_id):
+        for request in self._submitted[batch_id][0]:
+            self.charge(request["params"], BATCH_DISCOUNT)
+            message = SimpleNamespace(content=[SimpleNamespace(text=_reply(request["params"]))])
+            result = SimpleNamespace(type="succeeded", message=message)
+            yield SimpleNamespace(custom_id=request["custom_id"], result=result)
+
+
+class FakeClient:
+    """One client of the backend; its first call pays *connect* seconds of connection setup."""
+
+    def __init__(self, backend: FakeBackend, connect: float) -> None:
+        self.backend = backend
+        self.connect = connect
+        self._connected = threading.Event()
+        self._lock = threading.Lock()
+        batches = SimpleNamespace(create=backend.create_batch, retrieve=backend.retrieve, results=backend.results)
+        self.messages = SimpleNamespace(create=self._create, batches=batches)
+
+    def _create(self, **params):
+        if not self._connected.is_set():
+            with self._lock:
+                if not self._connected.is_set():
+                    time.sleep(self.connect)
+                    self._connected.set()
+        return self.backend.create(**params)
+
+
+def incidents(bursts: int, burst_size: int, duplicates: float, seed: int = 0):
+    rng = random.Random(seed)
+    common = [f"2024-01-15T10:00:00Z ERROR payments: common failure {i}\n" for i in range(3)]
+    counter = 0
+    for _ in range(bursts):
+        burst = []
+        for _ in range(burst_size):
+            if rng.random() < duplicates:
+                burst.append(rng.choice(common))
+            else:
+                counter += 1
+                burst.append(f"2024-01-15T10:00:00Z ERROR payments: unique failure {counter}\n")
+        yield burst
+
+
+def run(mode: str, args) -> tuple:
+    backend = FakeBackend(args.latency, args.batch_latency)
+    service = None
+    if mode != "per-incident":
+        service = OrchestratorService(
+            client=FakeClient(backend, args.connect),
+            async_client=object(),
+            batch=mode == "service+batch",
+            batch_window=args.window,
+            poll_interval=0.01,
+        )
+
+    def handle(raw: str):
+        if service is not None:
+            return service.process_incident(raw)
+        orchestrator = LogSightOrchestrator(client=FakeClient(backend, args.connect), async_client=object())
+        return orchestrator.process_incident(raw)
+
+    total = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.burst_size) as pool:
+        for burst in incidents(args.bursts, args.burst_size, args.duplicates):
+            states = list(pool.map(handle, burst))
+            assert not any(s.circuit_tripped for s in states)
+            total += len(burst)
+            time.sleep(args.gap)
+    elapsed = time.perf_counter() - start - args.gap * args.bursts
+    return total / elapsed, backend.calls, backend.batches, backend.cost
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--burst-size", type=int, default=40)
+    parser.add_argument("--duplicates", type=float, default=0.5, help="fraction of repeated payloads")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per model call")
+    parser.add_argument("--connect", type=float, default=0.1, help="seconds of connection setup per client")
+    parser.add_argument("--batch-latency", type=float, default=0.5, help="seconds until a batch ends")
+    parser.add_argument("--window", type=float, default=0.05, help="batching window in seconds")
+    parser.add_argument("--gap", type=float, default=0.2, help="idle seconds between bursts")
+    args = parser.parse_args()
+
+    print(
+        f"{args.bursts} bursts x {args.burst_size} incidents, {args.duplicates:.0%} duplicates, "
+        f"latency {args.latency * 1000:.0f} ms, connect {args.connect * 1000:.0f} ms"
+    )
+    for mode in ("per-incident", "service", "service+batch"):
+        rate, calls, batches, cost = run(mode, args)
+        print(f"{mode:<14} {rate:8.1f} incidents/s  model calls {calls:5d}  batches {batches:3d}  cost ${cost:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Per-step cost of AgentState.log_step as the trace grows.
+
+Appends ``--steps`` trace lines to a state carrying a large payload and
+reports the mean cost of a step in each block of the run, for the current
+structurally shared trace and for the previous copy-the-list version::
+
+    python benchmarks/bench_state.py --steps 20000 --payload-records 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agents.state import AgentState  # noqa: E402
+
+
+class LegacyState(BaseModel):
+    """AgentState as it was: log_step copies the whole trace."""
+
+    raw_logs: str
+    parsed_json: Optional[List[Dict[str, Any]]] = None
+    execution_steps: List[str] = Field(default_factory=list)
+
+    def log_step(self, step_description: str) -> "LegacyState":
+        updated_steps = list(self.execution_steps) + [step_description]
+        return self.model_copy(update={"execution_steps": updated_steps})
+
+
+def _profile(state, steps: int, blocks: int) -> list[float]:
+    per_block = steps // blocks
+    means = []
+    for _ in range(blocks):
+        start = time.perf_counter()
+        for i in range(per_block):
+            state = state.log_step(f"step {i}")
+        means.append((time.perf_counter() - start) / per_block * 1e6)
+    return means
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--blocks", type=int, default=5)
+    parser.add_argument("--payload-records", type=int, default=100000)
+    args = parser.parse_args()
+
+    raw = "2024-01-15T10:00:00Z ERROR payments: timeout\n" * args.payload_records
+    records = [{"level": "ERROR", "message": "timeout"}] * args.payload_records
+    print(f"{args.steps} steps, payload {len(raw) / 1e6:.1f} MB / {args.payload_records} records")
+    print("mean us/step per block of", args.steps // args.blocks, "steps")
+    for name, state in (
+        ("shared", AgentState(raw_logs=raw, parsed_json=records)),
+        ("legacy", LegacyState(raw_logs=raw, parsed_json=records)),
+    ):
+        means = _profile(state, args.steps, args.blocks)
+        print(f"{name:<7}" + "".join(f"{m:10.2f}" for m in means))
+
+
+if __name__ == "__main__":
+    main()
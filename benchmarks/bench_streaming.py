@@ -0,0 +1,86 @@
+"""Time to first visible output: process_incident vs. stream_incident.
+
+A fake client takes ``--ttft`` seconds before its first token and
+``--per-token`` seconds per token after that, for replies of ``--tokens``
+tokens.  ``process_incident`` shows nothing until the whole pipeline is
+done; ``stream_incident`` shows the first root-cause delta as soon as it
+arrives::
+
+    python benchmarks/bench_streaming.py --ttft 0.3 --per-token 0.01 --tokens 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_orchestrator import SAMPLE_LOGS  # noqa: E402
+
+from agents.orchestrator import LogSightOrchestrator  # noqa: E402
+
+
+class _Stream:
+    def __init__(self, model: "FakeStreamingClient") -> None:
+        self.text_stream = model._tokens()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeStreamingClient:
+    def __init__(self, ttft: float, per_token: float, tokens: int) -> None:
+        self.ttft, self.per_token, self.tokens = ttft, per_token, tokens
+        self.messages = SimpleNamespace(create=self._create, stream=lambda **_: _Stream(self))
+
+    def _tokens(self):
+        time.sleep(self.ttft)
+        for i in range(self.tokens):
+            yield f"token{i} "
+            time.sleep(self.per_token)
+
+    def _create(self, **_):
+        text = "".join(self._tokens())
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--per-token", type=float, default=0.01)
+    parser.add_argument("--tokens", type=int, default=200)
+    args = parser.parse_args()
+
+    client = FakeStreamingClient(args.ttft, args.per_token, args.tokens)
+    orchestrator = LogSightOrchestrator(client=client)
+
+    start = time.perf_counter()
+    orchestrator.process_incident(SAMPLE_LOGS)
+    blocking = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first_step = first_delta = None
+    for event in orchestrator.stream_incident(SAMPLE_LOGS):
+        if first_step is None and event.kind == "step":
+            first_step = time.perf_counter() - start
+        if first_delta is None and event.kind == "delta":
+            first_delta = time.perf_counter() - start
+    streamed = time.perf_counter() - start
+
+    print(f"ttft {args.ttft * 1000:.0f} ms, {args.tokens} tokens x {args.per_token * 1000:.0f} ms")
+    print(f"process_incident: first output {blocking * 1000:8.1f} ms  (total {blocking * 1000:.1f} ms)")
+    print(
+        f"stream_incident:  first step   {first_step * 1000:8.1f} ms  first token "
+        f"{first_delta * 1000:.1f} ms  (total {streamed * 1000:.1f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Tokens and latency of the parser worker: LLM-only vs. local parser first.
+
+Builds a synthetic incident where ``--free-text`` of the lines match no
+known format, then structures it twice against a fake model that charges
+``--ttft`` seconds per call plus ``--per-token`` seconds per output token:
+
+* ``llm-only``: the whole payload in one call with a 1500-token output cap,
+  as the parser worker used to do; overflowing replies fall back to a
+  single UNKNOWN record.
+* ``local``: :func:`agents.parsing.structure_logs`, with only the free-text
+  lines sent to the model in batches.
+
+::
+
+    python benchmarks/bench_structuring.py --lines 200 --free-text 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agents.orchestrator import PARSER_SYSTEM_PROMPT, LogSightOrchestrator  # noqa: E402
+from agents.parsing import structure_logs, to_record  # noqa: E402
+from agents.state import AgentState  # noqa: E402
+from logsight.parser import parse_line  # noqa: E402
+
+LEGACY_MAX_TOKENS = 1500
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeModel:
+    """Structures every line it is sent, charging latency per output token."""
+
+    def __init__(self, ttft: float, per_token: float) -> None:
+        self.ttft = ttft
+        self.per_token = per_token
+        self.calls = self.input_tokens = self.output_tokens = 0
+        self.messages = SimpleNamespace(create=self._create)
+
+    def _create(self, model, max_tokens, system, messages, timeout=None):
+        prompt = messages[0]["content"]
+        lines = prompt.splitlines()[1:]
+        text = json.dumps([to_record(parse_line(line)) for line in lines])
+        produced = min(_tokens(text), max_tokens)
+        text = text[: produced * 4] if produced < _tokens(text) else text  # truncated reply
+        self.calls += 1
+        self.input_tokens += _tokens(system) + _tokens(prompt)
+        self.output_tokens += produced
+        time.sleep(self.ttft + produced * self.per_token)
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+def incident(lines: int, free_text: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    out = []
+    for i in range(lines):
+        if rng.random() < free_text:
+            out.append(f"worker thread pool exhausted while draining queue shard {i % 7}")
+        elif i % 2:
+            out.append(f"2024-01-15T10:{i // 60 % 60:02d}:{i % 60:02d}Z ERROR payments: timeout after {i}ms")
+        else:
+            out.append(f"Jan 15 10:{i // 60 % 60:02d}:{i % 60:02d} web01 sshd[{i}]: Failed password for root")
+    return "\n".join(out)
+
+
+def legacy_parse(model: FakeModel, raw: str) -> list:
+    user_prompt = f"Convert the following raw logs into a valid JSON array matching keys [timestamp, level, service, message]:\n{raw}"
+    response = model.messages.create(
+        model="", max_tokens=LEGACY_MAX_TOKENS, system=PARSER_SYSTEM_PROMPT,
+        messages=[{"role": "user", "content": user_prompt}],
+    )
+    try:
+        return json.loads(response.content[0].text)
+    except ValueError:
+        return [{"level": "UNKNOWN", "message": raw}]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200)
+    parser.add_argument("--free-text", type=float, default=0.05, help="fraction of unrecognised lines")
+    parser.add_argument("--ttft", type=float, default=0.3, help="seconds per model call")
+    parser.add_argument("--per-token", type=float, default=0.0005, help="seconds per output token")
+    args = parser.parse_args()
+
+    raw = incident(args.lines, args.free_text)
+    rows = []
+
+    model = FakeModel(args.ttft, args.per_token)
+    start = time.perf_counter()
+    records = legacy_parse(model, raw)
+    rows.append(("llm-only", time.perf_counter() - start, model, len(records)))
+
+    model = FakeModel(args.ttft, args.per_token)
+    orchestrator = LogSightOrchestrator(client=model, async_client=model)
+    start = time.perf_counter()
+    state = orchestrator._run_parser_worker(AgentState(raw_logs=raw))
+    rows.append(("local", time.perf_counter() - start, model, len(state.parsed_json)))
+
+    local_only = time.perf_counter()
+    structure_logs(raw)
+    local_only = time.perf_counter() - local_only
+
+    print(f"{args.lines} lines, {args.free_text:.0%} free text")
+    print(f"{'path':<10}{'latency ms':>12}{'calls':>7}{'in tok':>9}{'out tok':>9}{'records':>9}")
+    for name, elapsed, m, n in rows:
+        print(
+            f"{name:<10}{elapsed * 1000:>12.1f}{m.calls:>7}{m.input_tokens:>9}"
+            f"{m.output_tokens:>9}{n:>9}"
+        )
+    print(f"local parse alone: {local_only * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Write-to-alert latency and idle CPU of follow mode.
+
+A writer thread appends one ERROR line at a time to a temporary file while
+:func:`logsight.follow.tail` follows it; the script reports the latency
+from each write to its alert, then the CPU time used while idle::
+
+    python benchmarks/bench_tail.py --writes 50 --idle 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from logsight.follow import POLL_INTERVAL, tail
+from logsight.stream import IncrementalAnalyzer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=50)
+    parser.add_argument("--idle", type=float, default=5.0, help="seconds to measure idle CPU")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "live.log")
+        open(path, "w").close()
+        stop = threading.Event()
+        alerts = tail([path], IncrementalAnalyzer(), poll_interval=args.interval, stop=stop)
+        written: list[float] = []
+
+        def writer() -> None:
+            for i in range(args.writes):
+                time.sleep(0.02 + (i % 7) * 0.013)  # land at varying points of the poll cycle
+                with open(path, "a") as fh:
+                    written.append(time.perf_counter())
+                    fh.write(f"ERROR failure {i}\n")
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        latencies = []
+        for i, _ in zip(range(args.writes), alerts):
+            latencies.append((time.perf_counter() - written[i]) * 1000)
+        thread.join()
+
+        print(f"interval {args.interval * 1000:.0f} ms, {args.writes} writes")
+        print(
+            f"latency ms: median {statistics.median(latencies):.1f}  "
+            f"p95 {sorted(latencies)[int(len(latencies) * 0.95) - 1]:.1f}  max {max(latencies):.1f}"
+        )
+
+        timer = threading.Timer(args.idle, stop.set)
+        cpu = time.process_time()
+        timer.start()
+        for _ in alerts:
+            pass
+        used = time.process_time() - cpu
+        print(f"idle CPU: {used * 1000:.1f} ms over {args.idle:.0f} s ({used / args.idle:.2%})")
+
+
+if __name__ == "__main__":
+    main()
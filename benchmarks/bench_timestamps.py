@@ -0,0 +1,80 @@
+"""Throughput benchmark for :class:`logsight.parser.TimestampParser`.
+
+Compares the learned-layout parser against the legacy ``strptime`` loop on
+runs of consecutive timestamps, per layout::
+
+    python benchmarks/bench_timestamps.py --stamps 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from logsight.parser import TimestampParser
+
+LEGACY_FORMATS = [
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%d %H:%M:%S",
+]
+
+LAYOUTS: dict[str, str] = {
+    "iso_seconds": "%Y-%m-%d %H:%M:%S",
+    "iso_millis": "%Y-%m-%dT%H:%M:%S.{ms}",
+    "iso_millis_tz": "%Y-%m-%dT%H:%M:%S.{ms}+00:00",
+    "syslog": "%b %d %H:%M:%S",
+}
+
+
+def legacy_parse(raw: str) -> datetime | None:
+    raw = raw.strip().replace(",", ".")
+    for fmt in LEGACY_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _stamps(layout: str, count: int) -> list[str]:
+    # ~20 lines per second, like a busy service.
+    start = datetime(2024, 1, 15, 12, 0, 0)
+    out = []
+    for i in range(count):
+        ts = start + timedelta(milliseconds=50 * i)
+        out.append(ts.strftime(layout).replace("{ms}", f"{ts.microsecond // 1000:03d}"))
+    return out
+
+
+def _per_sec(fn: Callable[[str], datetime | None], stamps: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw in stamps:
+            fn(raw)
+        best = min(best, time.perf_counter() - start)
+    return len(stamps) / best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--stamps", type=int, default=200_000, help="Timestamps per layout.")
+    ap.add_argument("--repeat", type=int, default=3, help="Best-of-N timing runs.")
+    args = ap.parse_args()
+
+    print(f"{'layout':<16}{'strptime':>14}{'learned':>14}{'speedup':>10}")
+    for name, layout in LAYOUTS.items():
+        stamps = _stamps(layout, args.stamps)
+        legacy = _per_sec(legacy_parse, stamps, args.repeat)
+        fast = _per_sec(TimestampParser(year=2024), stamps, args.repeat)
+        print(f"{name:<16}{legacy:>12,.0f}/s{fast:>12,.0f}/s{fast / legacy:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
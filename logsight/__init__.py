@@ -1,4 +1,4 @@
 """LogSight-AI: AI-powered log analysis and anomaly detection."""
 
 __version__ = "0.1.0"
-__all__ = ["parser", "analyzer", "cli"]
+__all__ = ["parser", "batch", "analyzer", "cli"]
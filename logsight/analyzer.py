@@ -5,10 +5,18 @@ from __future__ import annotations
 from collections import Counter
 from collections.abc import Sequence
 from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Union
 
 import numpy as np
 
+from logsight.batch import LEVELS, NAT, LogBatch, epoch_ns, message_key
 from logsight.parser import LogEntry, LogLevel
+from logsight.sketch import HeavyHitters
+from logsight.templates import TemplateMiner
+
+#: Anything the analyzers accept: a row-wise sequence or a columnar batch.
+Entries = Union[Sequence[LogEntry], LogBatch]
 
 
 @dataclass
@@ -20,6 +28,9 @@ class WindowStats:
     warning_count: int = 0
     level_counts: dict[str, int] = field(default_factory=dict)
     top_messages: list[tuple[str, int]] = field(default_factory=list)
+    #: Maximum amount by which any ``top_messages`` count may be overestimated;
+    #: ``0`` when counts are exact.
+    top_messages_error: int = 0
 
     @property
     def error_rate(self) -> float:
@@ -33,14 +44,77 @@ class AnomalyReport:
     anomalies: list[LogEntry] = field(default_factory=list)
     stats: WindowStats = field(default_factory=WindowStats)
     zscore_threshold: float = 2.5
+    #: Positions of the anomalous entries in the scanned sequence.
+    indices: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.intp))
 
     @property
     def has_anomalies(self) -> bool:
-        return len(self.anomalies) > 0
+        return len(self.anomalies) > 0 or len(self.indices) > 0
+
+
+@dataclass
+class TimeWindowReport:
+    """Per-bucket error rates over fixed or sliding time windows."""
+
+    #: Bucket start times (``datetime64[ns]``, UTC); bucket *i* covers
+    #: ``[starts[i], starts[i] + window)``.
+    starts: np.ndarray = field(default_factory=lambda: np.empty(0, dtype="datetime64[ns]"))
+    totals: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    errors: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    window: np.timedelta64 = field(default_factory=lambda: np.timedelta64(0, "ns"))
+    spike_threshold: float = 0.25
+
+    @property
+    def rates(self) -> np.ndarray:
+        """Error fraction per bucket; empty buckets have rate ``0.0``."""
+        return np.divide(
+            self.errors, self.totals, out=np.zeros(len(self.totals)), where=self.totals > 0
+        )
 
+    @property
+    def spikes(self) -> np.ndarray:
+        """Indices of buckets whose error rate reaches ``spike_threshold``."""
+        return np.flatnonzero((self.totals > 0) & (self.rates >= self.spike_threshold))
+
+
+def compute_stats(
+    entries: Entries,
+    heavy_hitters: HeavyHitters | None = None,
+    templates: TemplateMiner | None = None,
+) -> WindowStats:
+    """Return summary statistics for *entries*.
+
+    ``top_messages`` are counted exactly by default.  Pass a sketch from
+    :mod:`logsight.sketch` as *heavy_hitters* to bound the memory used for
+    high-cardinality messages; its error bound is reported in
+    ``top_messages_error``.  Pass a :class:`~logsight.templates.TemplateMiner`
+    as *templates* to count messages by template instead of literal text.
+    """
+    if isinstance(entries, LogBatch):
+        stats = _batch_level_stats(entries)
+        if not len(entries):
+            return stats
+        key_totals = np.bincount(entries.message_keys, minlength=len(entries.vocabulary))
+        for code, key in enumerate(entries.vocabulary):
+            if not key:
+                key_totals[code] = 0
+        labels = entries.vocabulary
+        if templates is not None:
+            key_totals, labels = _template_totals(templates, entries.vocabulary, key_totals)
+        return _top_messages(stats, labels, key_totals, heavy_hitters)
+
+    if templates is not None:
+        stats = _level_stats(entries)
+        keys = [key for key in (message_key(e.message) for e in entries) if key]
+        totals, labels = _template_totals(templates, keys, np.ones(len(keys), dtype=np.int64))
+        return _top_messages(stats, labels, totals, heavy_hitters)
+    if heavy_hitters is not None:
+        stats = _level_stats(entries)
+        heavy_hitters.update(key for key in map(message_key, (e.message for e in entries)) if key)
+        stats.top_messages = heavy_hitters.top(10)
+        stats.top_messages_error = heavy_hitters.error_bound
+        return stats
 
-def compute_stats(entries: Sequence[LogEntry]) -> WindowStats:
-    """Return summary statistics for *entries*."""
     stats = WindowStats(total=len(entries))
     level_counter: Counter[str] = Counter()
     message_counter: Counter[str] = Counter()
@@ -52,7 +126,7 @@ def compute_stats(entries: Sequence[LogEntry]) -> WindowStats:
         elif entry.level == LogLevel.WARNING:
             stats.warning_count += 1
         # Truncate message to avoid huge keys.
-        msg_key = entry.message[:120].strip()
+        msg_key = message_key(entry.message)
         if msg_key:
             message_counter[msg_key] += 1
 
@@ -61,38 +135,155 @@ def compute_stats(entries: Sequence[LogEntry]) -> WindowStats:
     return stats
 
 
-def _message_lengths(entries: Sequence[LogEntry]) -> np.ndarray:
-    return np.array([len(e.message) for e in entries], dtype=float)
+def _level_stats(entries: Sequence[LogEntry]) -> WindowStats:
+    stats = WindowStats(total=len(entries))
+    stats.level_counts = dict(Counter(entry.level.value for entry in entries))
+    stats.error_count = stats.level_counts.get(LogLevel.ERROR.value, 0) + stats.level_counts.get(
+        LogLevel.CRITICAL.value, 0
+    )
+    stats.warning_count = stats.level_counts.get(LogLevel.WARNING.value, 0)
+    return stats
+
+
+def _batch_level_stats(batch: LogBatch) -> WindowStats:
+    stats = WindowStats(total=len(batch))
+    if not len(batch):
+        return stats
+    level_totals = np.bincount(batch.levels, minlength=len(LEVELS))
+    _, first_seen = np.unique(batch.levels, return_index=True)
+    # Report levels in order of first appearance, as Counter would.
+    for code in batch.levels[np.sort(first_seen)]:
+        stats.level_counts[LEVELS[code].value] = int(level_totals[code])
+    stats.error_count = stats.level_counts.get(LogLevel.ERROR.value, 0) + stats.level_counts.get(
+        LogLevel.CRITICAL.value, 0
+    )
+    stats.warning_count = stats.level_counts.get(LogLevel.WARNING.value, 0)
+    return stats
+
+
+def _template_totals(
+    miner: TemplateMiner, keys: Sequence[str], key_totals: np.ndarray
+) -> tuple[np.ndarray, list[str]]:
+    """Fold per-key totals into per-template totals."""
+    ids = miner.add_all(keys)
+    totals = np.bincount(ids, weights=key_totals, minlength=len(miner)).astype(np.int64)
+    return totals, miner.templates
+
+
+def _top_messages(
+    stats: WindowStats,
+    labels: Sequence[str],
+    totals: np.ndarray,
+    heavy_hitters: HeavyHitters | None,
+) -> WindowStats:
+    if heavy_hitters is not None:
+        for code in np.flatnonzero(totals).tolist():
+            heavy_hitters.add(labels[code], int(totals[code]))
+        stats.top_messages = heavy_hitters.top(10)
+        stats.top_messages_error = heavy_hitters.error_bound
+        return stats
+    # Stable sort keeps first-seen order among ties, matching Counter.most_common.
+    top = np.argsort(-totals, kind="stable")[:10]
+    stats.top_messages = [(labels[code], int(totals[code])) for code in top if totals[code]]
+    return stats
+
+
+def _template_ids(entries: Entries, miner: TemplateMiner) -> np.ndarray:
+    """Template ID of each entry's message key; ``-1`` for empty messages."""
+    if isinstance(entries, LogBatch):
+        lookup = miner.add_all(entries.vocabulary)
+        lookup[[code for code, key in enumerate(entries.vocabulary) if not key]] = -1
+        return lookup[entries.message_keys]
+    keys = [message_key(e.message) for e in entries]
+    return np.fromiter((miner.add(key) if key else -1 for key in keys), dtype=np.int32, count=len(keys))
+
+
+def _message_lengths(entries: Entries) -> np.ndarray:
+    if isinstance(entries, LogBatch):
+        return entries.message_lengths.astype(float)
+    return np.fromiter((len(e.message) for e in entries), dtype=float, count=len(entries))
+
+
+def _error_mask(entries: Entries) -> np.ndarray:
+    if isinstance(entries, LogBatch):
+        return entries.error_mask
+    return np.fromiter((e.is_error for e in entries), dtype=bool, count=len(entries))
+
+
+def _timestamps_ns(entries: Entries) -> np.ndarray:
+    if isinstance(entries, LogBatch):
+        return entries.timestamps
+    return np.fromiter((epoch_ns(e.timestamp) for e in entries), dtype=np.int64, count=len(entries))
+
+
+_DURATION_UNITS = {"ms": 10**6, "s": 10**9, "m": 60 * 10**9, "h": 3600 * 10**9, "d": 86400 * 10**9}
+# Longest duration that fits the int64 nanosecond timestamps (about 292 years)
+_MAX_DURATION_NS = np.iinfo(np.int64).max
+
+
+def _duration_ns(value: str | float | timedelta) -> int:
+    """Convert ``"500ms"``, ``"60s"``, ``"5m"``, ``"1h"``, ``"1d"``, seconds or a timedelta to ns."""
+    try:
+        if isinstance(value, timedelta):
+            ns = value // timedelta(microseconds=1) * 1000
+        elif isinstance(value, str):
+            text = value.strip().lower()
+            unit = next((u for u in ("ms", "s", "m", "h", "d") if text.endswith(u)), None)
+            number = text[: -len(unit)] if unit else text
+            ns = int(float(number) * _DURATION_UNITS[unit or "s"])
+        else:
+            ns = int(value * 10**9)
+    except (ValueError, OverflowError):
+        raise ValueError(f"Invalid duration {value!r}") from None
+    if ns <= 0:
+        raise ValueError(f"Duration must be positive, got {value!r}")
+    if ns > _MAX_DURATION_NS:
+        raise ValueError(f"Duration {value!r} is too long")
+    return ns
 
 
 def detect_anomalies(
-    entries: Sequence[LogEntry],
+    entries: Entries,
     zscore_threshold: float = 2.5,
     flag_errors: bool = True,
+    return_indices: bool = False,
+    templates: TemplateMiner | None = None,
+    min_template_count: int = 0,
 ) -> AnomalyReport:
     """Detect anomalous log entries using z-score on message length.
 
     Entries whose message length deviates more than *zscore_threshold*
     standard deviations from the mean are flagged, together with any
-    ERROR / CRITICAL entries when *flag_errors* is ``True``.
+    ERROR / CRITICAL entries when *flag_errors* is ``True``.  Both masks are
+    computed as array operations; each position is reported at most once.
 
     Parameters
     ----------
     entries:
-        Sequence of :class:`~logsight.parser.LogEntry` objects.
+        Sequence of :class:`~logsight.parser.LogEntry` objects, or a
+        :class:`~logsight.batch.LogBatch`.
     zscore_threshold:
         Number of standard deviations above the mean that triggers an
         anomaly flag.  Defaults to ``2.5``.
     flag_errors:
         When ``True`` (default), ERROR and CRITICAL entries are always
         included in the anomaly list regardless of z-score.
+    return_indices:
+        When ``True``, only ``report.indices`` is filled in and the
+        ``anomalies`` list is left empty, avoiding a Python object per hit.
+    templates:
+        Optional :class:`~logsight.templates.TemplateMiner`; ``stats`` then
+        groups ``top_messages`` by template.
+    min_template_count:
+        With *templates*, also flag entries whose template occurs fewer than
+        this many times in *entries*.  Defaults to ``0`` (disabled).
 
     Returns
     -------
     AnomalyReport
     """
     report = AnomalyReport(zscore_threshold=zscore_threshold)
-    report.stats = compute_stats(entries)
+    report.stats = compute_stats(entries, templates=templates)
 
     if not entries:
         return report
@@ -101,51 +292,168 @@ def detect_anomalies(
     mean = float(np.mean(lengths))
     std = float(np.std(lengths))
 
-    anomalous: list[LogEntry] = []
-    seen_ids: set[int] = set()
-
-    for entry in entries:
-        flagged = False
-        if flag_errors and entry.is_error:
-            flagged = True
-        if std > 0:
-            z = abs(len(entry.message) - mean) / std
-            if z > zscore_threshold:
-                flagged = True
-        if flagged and id(entry) not in seen_ids:
-            anomalous.append(entry)
-            seen_ids.add(id(entry))
-
-    report.anomalies = anomalous
+    mask = _error_mask(entries) if flag_errors else np.zeros(len(lengths), dtype=bool)
+    if std > 0:
+        mask |= np.abs(lengths - mean) / std > zscore_threshold
+    if templates is not None and min_template_count > 0:
+        ids = _template_ids(entries, templates)
+        counts = np.bincount(ids[ids >= 0], minlength=len(templates))
+        mask |= (ids >= 0) & (counts[ids] < min_template_count)
+
+    report.indices = np.flatnonzero(mask)
+    if not return_indices:
+        report.anomalies = [entries[i] for i in report.indices.tolist()]
     return report
 
 
 def error_rate_spike(
-    entries: Sequence[LogEntry],
+    entries: Entries,
     window_size: int = 100,
     spike_threshold: float = 0.25,
-) -> list[int]:
+    stride: int = 1,
+    merge: bool = False,
+) -> list[int] | list[tuple[int, int, float]]:
     """Return the starting indices of windows whose error rate exceeds *spike_threshold*.
 
+    Window error counts come from a prefix sum over the error mask, so the
+    cost is O(n) array work for any *stride*.
+
     Parameters
     ----------
     entries:
-        Sequence of :class:`~logsight.parser.LogEntry` objects.
+        Sequence of :class:`~logsight.parser.LogEntry` objects, or a
+        :class:`~logsight.batch.LogBatch`.
     window_size:
         Number of entries per sliding window.
     spike_threshold:
         Fraction of errors that triggers a spike (``0.0``–``1.0``).
+    stride:
+        Distance between consecutive window starts.  ``1`` (default) gives
+        true sliding windows; ``window_size`` gives non-overlapping ones.
+    merge:
+        When ``True``, overlapping or touching spike windows are merged and
+        ``(start, end, peak_rate)`` ranges are returned instead, with *end*
+        exclusive.
 
     Returns
     -------
-    List of start indices where a spike was detected.
+    List of start indices where a spike was detected, or merged ranges
+    when *merge* is set.
     """
-    spike_starts: list[int] = []
-    n = len(entries)
-    for start in range(0, n - window_size + 1, window_size):
-        window = entries[start : start + window_size]
-        errors = sum(1 for e in window if e.is_error)
-        rate = errors / window_size
-        if rate >= spike_threshold:
-            spike_starts.append(start)
-    return spike_starts
+    if window_size <= 0 or stride <= 0:
+        raise ValueError("window_size and stride must be positive")
+    errors = _error_mask(entries)
+    n = len(errors)
+    if n < window_size:
+        return []
+
+    cumulative = np.concatenate(([0], np.cumsum(errors, dtype=np.int64)))
+    starts = np.arange(0, n - window_size + 1, stride)
+    rates = (cumulative[starts + window_size] - cumulative[starts]) / window_size
+    hit = rates >= spike_threshold
+    if not merge:
+        return starts[hit].tolist()
+    return _merge_spike_windows(starts[hit], rates[hit], window_size)
+
+
+def _merge_spike_windows(
+    starts: np.ndarray,
+    rates: np.ndarray,
+    window_size: int,
+) -> list[tuple[int, int, float]]:
+    if not len(starts):
+        return []
+    # A new range begins wherever a window starts past the end of the previous one.
+    breaks = np.flatnonzero(starts[1:] > starts[:-1] + window_size) + 1
+    first = np.concatenate(([0], breaks))
+    last = np.concatenate((breaks - 1, [len(starts) - 1]))
+    peaks = np.maximum.reduceat(rates, first)
+    return [
+        (int(starts[a]), int(starts[b]) + window_size, float(peak))
+        for a, b, peak in zip(first, last, peaks)
+    ]
+
+
+def _merged_slots(slots: np.ndarray, reach: int) -> np.ndarray:
+    """Union of ``[k - reach + 1, k]`` over the sorted, unique *slots*."""
+    breaks = np.flatnonzero(np.diff(slots) > reach) + 1
+    run_first = slots[np.concatenate(([0], breaks))] - (reach - 1)
+    run_last = slots[np.concatenate((breaks - 1, [len(slots) - 1]))]
+    lengths = run_last - run_first + 1
+    offsets = np.repeat(run_first - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return np.arange(int(lengths.sum()), dtype=np.int64) + offsets
+
+
+def error_rate_by_time(
+    entries: Entries,
+    window: str | float | timedelta = "60s",
+    stride: str | float | timedelta | None = None,
+    spike_threshold: float = 0.25,
+) -> TimeWindowReport:
+    """Bucket *entries* by timestamp and report the error rate of each bucket.
+
+    Unlike :func:`error_rate_spike`, windows span a fixed amount of time
+    rather than a fixed number of entries, so the threshold means the same
+    thing during a burst and at night.  Bucket starts are aligned to
+    multiples of *stride* since the epoch, and only buckets holding at least
+    one entry are reported, so a gap in the logs costs nothing.
+
+    Parameters
+    ----------
+    entries:
+        Sequence of :class:`~logsight.parser.LogEntry` objects, or a
+        :class:`~logsight.batch.LogBatch`.
+    window:
+        Bucket width, e.g. ``"60s"``, ``"5m"``, seconds as a number, or a
+        :class:`~datetime.timedelta`.
+    stride:
+        Distance between bucket starts.  Defaults to *window* (fixed,
+        non-overlapping buckets); a smaller value gives sliding buckets.
+    spike_threshold:
+        Fraction of errors that marks a bucket as a spike.
+
+    Returns
+    -------
+    TimeWindowReport
+        Entries without a timestamp take the last timestamp seen before
+        them (or the first one in the input, if none precedes them).  If no
+        entry has a timestamp the report is empty.
+    """
+    window_ns = _duration_ns(window)
+    stride_ns = window_ns if stride is None else _duration_ns(stride)
+    report = TimeWindowReport(window=np.timedelta64(window_ns, "ns"), spike_threshold=spike_threshold)
+
+    ts = _timestamps_ns(entries)
+    known = ts != NAT
+    if not known.any():
+        return report
+    if not known.all():
+        # Carry the last known timestamp forward; leading gaps take the first one.
+        positions = np.where(known, np.arange(len(ts)), 0)
+        np.maximum.accumulate(positions, out=positions)
+        first = int(np.argmax(known))
+        positions[:first] = first
+        ts = ts[positions]
+
+    order = np.argsort(ts, kind="stable")
+    sorted_ts = ts[order]
+    error_cumsum = np.concatenate(([0], np.cumsum(_error_mask(entries)[order], dtype=np.int64)))
+
+    # Only buckets that contain an entry are built, so their number follows the
+    # entries rather than the time span.  An entry in stride slot k can fall in
+    # the buckets starting at slots k - reach + 1 through k; those ranges are
+    # merged into runs first so no slot is generated twice.
+    slots = np.unique(sorted_ts // stride_ns)
+    reach = -(-window_ns // stride_ns)
+    if reach > 1:
+        slots = _merged_slots(slots, reach)
+    starts = slots * stride_ns
+    lo = np.searchsorted(sorted_ts, starts, side="left")
+    hi = np.searchsorted(sorted_ts, starts + window_ns, side="left")
+    occupied = hi > lo
+    starts, lo, hi = starts[occupied], lo[occupied], hi[occupied]
+
+    report.starts = starts.astype("datetime64[ns]")
+    report.totals = (hi - lo).astype(np.int64)
+    report.errors = error_cumsum[hi] - error_cumsum[lo]
+    return report
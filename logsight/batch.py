@@ -0,0 +1,310 @@
+"""Columnar storage for parsed log streams."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from logsight.parser import (
+    FORMATS,
+    SNIFF_SAMPLE_SIZE,
+    LogEntry,
+    LogLevel,
+    parse_file,
+    parse_lines,
+)
+
+#: Level for each code stored in :attr:`LogBatch.levels`.
+LEVELS: tuple[LogLevel, ...] = tuple(LogLevel)
+#: Format name for each code stored in :attr:`LogBatch.formats`.
+FORMAT_NAMES: tuple[str, ...] = ("unknown", *FORMATS)
+#: Sentinel stored in :attr:`LogBatch.timestamps` for entries without a timestamp.
+NAT = np.iinfo(np.int64).min
+#: Latest representable timestamp (2262-04-11); later and earlier than 1677 become :data:`NAT`.
+MAX_NS = np.iinfo(np.int64).max
+
+_LEVEL_CODES = {level: code for code, level in enumerate(LEVELS)}
+_FORMAT_CODES = {name: code for code, name in enumerate(FORMAT_NAMES)}
+_ERROR_CODES = np.array([_LEVEL_CODES[LogLevel.ERROR], _LEVEL_CODES[LogLevel.CRITICAL]], dtype=np.uint8)
+_EPOCH = datetime(1970, 1, 1)
+_MESSAGE_KEY_LENGTH = 120
+
+
+def message_key(message: str) -> str:
+    """Key under which *message* is counted in ``top_messages``."""
+    return message[:_MESSAGE_KEY_LENGTH].strip()
+
+
+def epoch_ns(ts: datetime | None) -> int:
+    """Nanoseconds since the Unix epoch for *ts* (naive means UTC), or :data:`NAT`.
+
+    Timestamps outside the int64 nanosecond range (about 1677-2262) are
+    :data:`NAT` too.
+    """
+    if ts is None:
+        return NAT
+    try:
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    except OverflowError:  # e.g. year 1 shifted to UTC
+        return NAT
+    ns = (ts - _EPOCH) // timedelta(microseconds=1) * 1000
+    return ns if NAT < ns <= MAX_NS else NAT
+
+
+@dataclass(eq=False, repr=False)
+class LogBatch:
+    """Column-oriented container for a sequence of parsed log entries.
+
+    Per-entry fields live in NumPy arrays, so analyzer passes run as array
+    operations instead of Python loops.  Raw lines share a single ``text``
+    buffer and are addressed by offset; messages are slices of their raw
+    line wherever possible.  Indexing or iterating a batch yields
+    :class:`~logsight.parser.LogEntry` views for display; their timestamps
+    are naive UTC.
+    """
+
+    levels: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.uint8))
+    timestamps: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    formats: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.uint8))
+    raw_offsets: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    raw_lengths: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    message_offsets: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    message_lengths: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    message_keys: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    vocabulary: list[str] = field(default_factory=list)
+    text: str = ""
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[LogEntry]) -> LogBatch:
+        """Build a batch from already-parsed entries."""
+        builder = LogBatchBuilder()
+        for entry in entries:
+            builder.append(entry)
+        return builder.build()
+
+    @classmethod
+    def from_lines(
+        cls,
+        lines: list[str],
+        fmt: str = "auto",
+        sample_size: int = SNIFF_SAMPLE_SIZE,
+        year: int | None = None,
+    ) -> LogBatch:
+        """Parse *lines* straight into a batch (see :func:`~logsight.parser.parse_lines`)."""
+        return cls.from_entries(parse_lines(lines, fmt=fmt, sample_size=sample_size, year=year))
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str,
+        fmt: str = "auto",
+        sample_size: int = SNIFF_SAMPLE_SIZE,
+        year: int | None = None,
+        workers: int = 1,
+        reader: str = "text",
+    ) -> LogBatch:
+        """Parse *path* into a batch without holding a list of entries in memory.
+
+        With *workers* > 1 the file is parsed in that many processes (see
+        :func:`~logsight.parallel.parse_file_parallel`).  ``reader="mmap"``
+        reads it through :mod:`logsight.reader` instead of decoding line by
+        line.  The result is the same either way.
+        """
+        if workers != 1:
+            from logsight.parallel import parse_file_parallel
+
+            return parse_file_parallel(
+                path, workers, fmt=fmt, sample_size=sample_size, year=year, reader=reader
+            )
+        if reader == "mmap":
+            from logsight.reader import parse_mmap
+
+            return parse_mmap(path, fmt=fmt, sample_size=sample_size, year=year)
+        if reader != "text":
+            raise ValueError(f"Unknown reader {reader!r}; expected 'text' or 'mmap'")
+        return cls.from_entries(parse_file(path, fmt=fmt, sample_size=sample_size, year=year))
+
+    @classmethod
+    def from_files(
+        cls,
+        paths: Iterable[str],
+        fmt: str = "auto",
+        sample_size: int = SNIFF_SAMPLE_SIZE,
+        year: int | None = None,
+        workers: int = 1,
+        reader: str = "text",
+    ) -> LogBatch:
+        """Parse each of *paths* with :meth:`from_file` and join them in order."""
+        return cls.concat(
+            [
+                cls.from_file(
+                    path, fmt=fmt, sample_size=sample_size, year=year, workers=workers, reader=reader
+                )
+                for path in paths
+            ]
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence[LogBatch]) -> LogBatch:
+        """Join *batches* end to end, as if their entries had been appended in order.
+
+        Vocabularies are merged in first-seen order, so the result is
+        identical to a batch built from all entries in one pass.
+        """
+        vocabulary: dict[str, int] = {}
+        keys, raw_offsets, message_offsets = [], [], []
+        shift = 0
+        for batch in batches:
+            lookup = np.array(
+                [vocabulary.setdefault(key, len(vocabulary)) for key in batch.vocabulary], dtype=np.int32
+            )
+            keys.append(lookup[batch.message_keys] if len(lookup) else batch.message_keys)
+            raw_offsets.append(batch.raw_offsets + shift)
+            message_offsets.append(batch.message_offsets + shift)
+            shift += len(batch.text)
+        if not batches:
+            return cls()
+        return cls(
+            levels=np.concatenate([b.levels for b in batches]),
+            timestamps=np.concatenate([b.timestamps for b in batches]),
+            formats=np.concatenate([b.formats for b in batches]),
+            raw_offsets=np.concatenate(raw_offsets),
+            raw_lengths=np.concatenate([b.raw_lengths for b in batches]),
+            message_offsets=np.concatenate(message_offsets),
+            message_lengths=np.concatenate([b.message_lengths for b in batches]),
+            message_keys=np.concatenate(keys),
+            vocabulary=list(vocabulary),
+            text="".join(b.text for b in batches),
+        )
+
+    # ------------------------------------------------------------------
+    # Columns
+    # ------------------------------------------------------------------
+
+    @property
+    def error_mask(self) -> np.ndarray:
+        """Boolean array marking ERROR and CRITICAL entries."""
+        return np.isin(self.levels, _ERROR_CODES)
+
+    def take(self, indices: np.ndarray | Sequence[int]) -> LogBatch:
+        """Return a batch of the rows at *indices*, sharing text and vocabulary."""
+        idx = np.asarray(indices, dtype=np.intp)
+        return LogBatch(
+            levels=self.levels[idx],
+            timestamps=self.timestamps[idx],
+            formats=self.formats[idx],
+            raw_offsets=self.raw_offsets[idx],
+            raw_lengths=self.raw_lengths[idx],
+            message_offsets=self.message_offsets[idx],
+            message_lengths=self.message_lengths[idx],
+            message_keys=self.message_keys[idx],
+            vocabulary=self.vocabulary,
+            text=self.text,
+        )
+
+    # ------------------------------------------------------------------
+    # Row views
+    # ------------------------------------------------------------------
+
+    def raw(self, i: int) -> str:
+        start = int(self.raw_offsets[i])
+        return self.text[start : start + int(self.raw_lengths[i])]
+
+    def message(self, i: int) -> str:
+        start = int(self.message_offsets[i])
+        return self.text[start : start + int(self.message_lengths[i])]
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.take(np.arange(len(self))[i])
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError("LogBatch index out of range")
+        i %= n
+        ns = int(self.timestamps[i])
+        raw_start, raw_end = int(self.raw_offsets[i]), int(self.raw_offsets[i] + self.raw_lengths[i])
+        message_start = int(self.message_offsets[i])
+        in_raw = message_start + int(self.message_lengths[i]) == raw_end
+        entry = LogEntry._parsed(
+            self.text[raw_start:raw_end],
+            FORMAT_NAMES[self.formats[i]],
+            None if ns == NAT else _EPOCH + timedelta(microseconds=ns // 1000),
+            LEVELS[self.levels[i]],
+            message_start - raw_start if in_raw else 0,
+        )
+        if not in_raw:
+            entry.message = self.message(i)
+        return entry
+
+    def __iter__(self) -> Iterator[LogEntry]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"LogBatch({len(self)} entries)"
+
+
+class LogBatchBuilder:
+    """Accumulate entries one at a time into compact growable columns."""
+
+    def __init__(self) -> None:
+        self._levels = array("B")
+        self._timestamps = array("q")
+        self._formats = array("B")
+        self._raw_offsets = array("q")
+        self._raw_lengths = array("i")
+        self._message_offsets = array("q")
+        self._message_lengths = array("i")
+        self._message_keys = array("i")
+        self._vocabulary: dict[str, int] = {}
+        self._chunks: list[str] = []
+        self._size = 0
+
+    def append(self, entry: LogEntry) -> None:
+        raw, message = entry.raw, entry.message
+        raw_offset = self._size
+        self._chunks.append(raw)
+        self._size += len(raw)
+        if raw.endswith(message):
+            message_offset = raw_offset + len(raw) - len(message)
+        else:
+            message_offset = self._size
+            self._chunks.append(message)
+            self._size += len(message)
+
+        self._levels.append(_LEVEL_CODES[entry.level])
+        self._timestamps.append(epoch_ns(entry.timestamp))
+        self._formats.append(_FORMAT_CODES.get(entry.format, 0))
+        self._raw_offsets.append(raw_offset)
+        self._raw_lengths.append(len(raw))
+        self._message_offsets.append(message_offset)
+        self._message_lengths.append(len(message))
+        self._message_keys.append(
+            self._vocabulary.setdefault(message_key(message), len(self._vocabulary))
+        )
+
+    def build(self) -> LogBatch:
+        return LogBatch(
+            levels=np.frombuffer(self._levels, dtype=np.uint8).copy(),
+            timestamps=np.frombuffer(self._timestamps, dtype=np.int64).copy(),
+            formats=np.frombuffer(self._formats, dtype=np.uint8).copy(),
+            raw_offsets=np.frombuffer(self._raw_offsets, dtype=np.int64).copy(),
+            raw_lengths=np.frombuffer(self._raw_lengths, dtype=np.int32).copy(),
+            message_offsets=np.frombuffer(self._message_offsets, dtype=np.int64).copy(),
+            message_lengths=np.frombuffer(self._message_lengths, dtype=np.int32).copy(),
+            message_keys=np.frombuffer(self._message_keys, dtype=np.int32).copy(),
+            vocabulary=list(self._vocabulary),
+            text="".join(self._chunks),
+        )
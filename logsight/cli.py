@@ -2,16 +2,26 @@
 
 from __future__ import annotations
 
+import itertools
 import sys
+import threading
 
 import click
 from rich.console import Console
 from rich.table import Table
 
-from logsight.analyzer import detect_anomalies, error_rate_spike
-from logsight.parser import parse_file, parse_lines
+from logsight.analyzer import detect_anomalies, error_rate_by_time, error_rate_spike
+from logsight.batch import LogBatch
+from logsight.compression import expand_paths
+from logsight.follow import POLL_INTERVAL, tail
+from logsight.ingest import DEFAULT_QUEUE_SIZE, DEFAULT_WINDOW, serve
+from logsight.parser import FORMATS, parse_files, parse_stream
+from logsight.reader import READERS, iter_mmap_batches
+from logsight.stream import IncrementalAnalyzer, analyze_batches, analyze_stream
+from logsight.templates import TemplateMiner
 
 console = Console()
+err_console = Console(stderr=True)
 
 
 def _print_report(report, show_anomalies: bool) -> None:
@@ -23,7 +33,10 @@ def _print_report(report, show_anomalies: bool) -> None:
     console.print(f"  Error rate    : [{'red' if stats.error_rate >= 0.10 else 'green'}]{stats.error_rate:.1%}[/]")
 
     if stats.top_messages:
-        table = Table(title="Top Messages", show_header=True, header_style="bold magenta")
+        title = "Top Messages"
+        if stats.top_messages_error:
+            title += f" (counts may be up to {stats.top_messages_error} high)"
+        table = Table(title=title, show_header=True, header_style="bold magenta")
         table.add_column("Count", justify="right", style="cyan", no_wrap=True)
         table.add_column("Message")
         for msg, cnt in stats.top_messages:
@@ -43,6 +56,32 @@ def _print_report(report, show_anomalies: bool) -> None:
         console.print("\n[bold green]No anomalies detected.[/bold green]")
 
 
+def _print_spikes(spikes: list[tuple[int, int, float]]) -> None:
+    if spikes:
+        console.print("\n[bold red]Error-rate spikes (entry ranges):[/bold red]")
+        for start, end, peak in spikes:
+            console.print(f"  [red]{start}–{end - 1}[/red]  peak {peak:.1%}")
+
+
+def _print_time_spikes(buckets) -> None:
+    spikes = buckets.spikes
+    if not len(buckets.starts):
+        console.print("\n[yellow]No timestamps found for time-window analysis.[/yellow]")
+        return
+    if not len(spikes):
+        console.print(f"\n[bold green]No error-rate spikes across {len(buckets.starts)} time windows.[/bold green]")
+        return
+    console.print(f"\n[bold red]Error-rate spikes by time ({len(spikes)} windows):[/bold red]")
+    rates = buckets.rates
+    for i in spikes[:20]:
+        start = str(buckets.starts[i].astype("datetime64[s]")).replace("T", " ")
+        console.print(
+            f"  [red]{start}[/red]  {buckets.errors[i]}/{buckets.totals[i]} errors ({rates[i]:.1%})"
+        )
+    if len(spikes) > 20:
+        console.print(f"  … and {len(spikes) - 20} more.")
+
+
 @click.group()
 @click.version_option()
 def main() -> None:
@@ -50,7 +89,7 @@ def main() -> None:
 
 
 @main.command("analyze")
-@click.argument("logfile", type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.argument("logfiles", nargs=-1, required=True)
 @click.option(
     "--threshold",
     "-t",
@@ -71,6 +110,18 @@ def main() -> None:
     show_default=True,
     help="Window size for error-rate spike detection.",
 )
+@click.option(
+    "--stride",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Step between spike-detection windows; equal to --window for non-overlapping windows.",
+)
+@click.option(
+    "--time-window",
+    default=None,
+    help="Also bucket entries by timestamp into windows of this width (e.g. 60s, 5m, 1h).",
+)
 @click.option(
     "--spike-threshold",
     "-s",
@@ -78,33 +129,139 @@ def main() -> None:
     show_default=True,
     help="Error-rate fraction that constitutes a spike.",
 )
+@click.option(
+    "--format",
+    "log_format",
+    type=click.Choice(["auto", *FORMATS]),
+    default="auto",
+    show_default=True,
+    help="Log format; 'auto' sniffs it from the first lines of the file.",
+)
+@click.option(
+    "--year",
+    type=int,
+    default=None,
+    help="Year assigned to syslog timestamps, which carry none.  [default: current year]",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    default=False,
+    help="Analyze incrementally in constant memory instead of loading the whole file.",
+)
+@click.option(
+    "--templates",
+    "group_templates",
+    is_flag=True,
+    default=False,
+    help="Group top messages by mined template, masking variable parts as <*>.",
+)
+@click.option(
+    "--workers",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Parse the file in this many processes.",
+)
+@click.option(
+    "--reader",
+    type=click.Choice(READERS),
+    default="text",
+    show_default=True,
+    help="How the file is read; 'mmap' memory-maps it and parses bytes without decoding every line.",
+)
 def analyze_cmd(
-    logfile: str,
+    logfiles: tuple[str, ...],
     threshold: float,
     no_anomalies: bool,
     window: int,
+    stride: int,
+    time_window: str | None,
     spike_threshold: float,
+    log_format: str,
+    year: int | None,
+    stream: bool,
+    group_templates: bool,
+    workers: int,
+    reader: str,
 ) -> None:
-    """Analyze LOGFILE and report anomalies."""
+    """Analyze LOGFILES and report anomalies.
+
+    Files are analyzed as one stream in the order given; globs such as
+    'app/*.gz' are expanded in sorted order.  gzip, bz2, xz and zstd files
+    are decompressed on the fly.
+    """
+    paths = expand_paths(logfiles)
+    for path in paths:
+        click.Path(exists=True, dir_okay=False, readable=True).convert(
+            path, None, click.get_current_context()
+        )
+    templates = TemplateMiner() if group_templates else None
+    if stream:
+        if time_window:
+            raise click.UsageError("--time-window cannot be combined with --stream.")
+        if workers > 1:
+            raise click.UsageError("--workers cannot be combined with --stream.")
+        options = dict(
+            zscore_threshold=threshold,
+            window_size=window,
+            spike_threshold=spike_threshold,
+            stride=stride,
+            templates=templates,
+        )
+        try:
+            if reader == "mmap":
+                batches = itertools.chain.from_iterable(
+                    iter_mmap_batches(path, fmt=log_format, year=year) for path in paths
+                )
+                analyzer = analyze_batches(batches, **options)
+            else:
+                analyzer = analyze_stream(parse_files(paths, fmt=log_format, year=year), **options)
+        except ImportError as exc:
+            raise click.ClickException(str(exc)) from None
+        except OSError as exc:
+            err_console.print(f"[red]Error reading file:[/red] {exc}")
+            sys.exit(1)
+        if not analyzer.count:
+            console.print("[yellow]No log entries found.[/yellow]")
+            return
+        _print_report(analyzer.snapshot(), show_anomalies=not no_anomalies)
+        _print_spikes(analyzer.spikes)
+        return
+
     try:
-        entries = list(parse_file(logfile))
+        entries = LogBatch.from_files(
+            paths, fmt=log_format, year=year, workers=workers, reader=reader
+        )
+    except ImportError as exc:
+        raise click.ClickException(str(exc)) from None
     except OSError as exc:
-        console.print(f"[red]Error reading file:[/red] {exc}", err=True)
+        err_console.print(f"[red]Error reading file:[/red] {exc}")
         sys.exit(1)
 
-    if not entries:
+    if not len(entries):
         console.print("[yellow]No log entries found.[/yellow]")
         return
 
-    report = detect_anomalies(entries, zscore_threshold=threshold)
+    report = detect_anomalies(entries, zscore_threshold=threshold, templates=templates)
     _print_report(report, show_anomalies=not no_anomalies)
 
-    spikes = error_rate_spike(entries, window_size=window, spike_threshold=spike_threshold)
-    if spikes:
-        console.print(
-            f"\n[bold red]Error-rate spikes at windows starting at lines: "
-            f"{', '.join(str(s) for s in spikes)}[/bold red]"
-        )
+    spikes = error_rate_spike(
+        entries,
+        window_size=window,
+        spike_threshold=spike_threshold,
+        stride=stride,
+        merge=True,
+    )
+    _print_spikes(spikes)
+
+    if time_window:
+        try:
+            buckets = error_rate_by_time(entries, window=time_window, spike_threshold=spike_threshold)
+        except ValueError as exc:
+            raise click.BadParameter(str(exc), param_hint="--time-window") from None
+        _print_time_spikes(buckets)
 
 
 @main.command("stdin")
@@ -116,14 +273,183 @@ def analyze_cmd(
     help="Z-score threshold for anomaly detection.",
 )
 def stdin_cmd(threshold: float) -> None:
-    """Read log lines from stdin and report anomalies."""
-    lines = sys.stdin.readlines()
-    entries = parse_lines(lines)
-    if not entries:
+    """Read log lines from stdin and report anomalies.
+
+    Input is analyzed incrementally, so unbounded pipes use constant memory.
+    """
+    analyzer = analyze_stream(parse_stream(sys.stdin), zscore_threshold=threshold)
+    if not analyzer.count:
         console.print("[yellow]No log entries found.[/yellow]")
         return
-    report = detect_anomalies(entries, zscore_threshold=threshold)
-    _print_report(report, show_anomalies=True)
+    _print_report(analyzer.snapshot(), show_anomalies=True)
+
+
+@main.command("tail")
+@click.argument("logfiles", nargs=-1, required=True)
+@click.option(
+    "--threshold",
+    "-t",
+    default=2.5,
+    show_default=True,
+    help="Z-score threshold for anomaly detection.",
+)
+@click.option(
+    "--window",
+    "-w",
+    default=100,
+    show_default=True,
+    help="Window size for error-rate spike detection.",
+)
+@click.option(
+    "--spike-threshold",
+    "-s",
+    default=0.25,
+    show_default=True,
+    help="Error-rate fraction that constitutes a spike.",
+)
+@click.option(
+    "--format",
+    "log_format",
+    type=click.Choice(FORMATS),
+    default=None,
+    help="Log format to try first; by default each line is detected on its own.",
+)
+@click.option(
+    "--from-start",
+    is_flag=True,
+    default=False,
+    help="Analyze the existing contents before following new lines.",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.001),
+    default=POLL_INTERVAL,
+    show_default=True,
+    help="Seconds between checks for new data while idle.",
+)
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Stop following after this many seconds instead of waiting for Ctrl-C.",
+)
+def tail_cmd(
+    logfiles: tuple[str, ...],
+    threshold: float,
+    window: int,
+    spike_threshold: float,
+    log_format: str | None,
+    from_start: bool,
+    interval: float,
+    timeout: float | None,
+) -> None:
+    """Follow LOGFILES as they grow and print anomalies and spikes as they happen.
+
+    Rotated (renamed and recreated) and truncated files are followed to
+    their new contents.  Stop with Ctrl-C to print a summary.
+    """
+    paths = expand_paths(logfiles)
+    analyzer = IncrementalAnalyzer(
+        zscore_threshold=threshold, window_size=window, spike_threshold=spike_threshold
+    )
+    stop = threading.Event()
+    timer = threading.Timer(timeout, stop.set) if timeout is not None else None
+    if timer is not None:
+        timer.start()
+    prefix = len(paths) > 1
+    alerts = tail(
+        paths, analyzer, fmt=log_format, from_start=from_start, poll_interval=interval, stop=stop
+    )
+    try:
+        for alert in alerts:
+            source = f"{alert.path}: " if prefix else ""
+            if alert.kind == "spike":
+                start, end, peak = alert.detail
+                console.print(
+                    f"[bold red]SPIKE[/bold red] {source}entries {start}–{end - 1} peak {peak:.1%}"
+                )
+            else:
+                entry = alert.detail
+                level_style = "red" if entry.is_error else "yellow"
+                console.print(
+                    f"[bold]ANOMALY[/bold] {source}[[{level_style}]{entry.level.value}[/{level_style}]]"
+                    f" {entry.message[:200]}"
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        if timer is not None:
+            timer.cancel()
+    if analyzer.count:
+        _print_report(analyzer.snapshot(), show_anomalies=False)
+
+
+@main.command("serve")
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to listen on.")
+@click.option("--port", "-p", default=8000, show_default=True, help="Port to listen on.")
+@click.option(
+    "--threshold",
+    "-t",
+    default=2.5,
+    show_default=True,
+    help="Z-score threshold for anomaly detection.",
+)
+@click.option(
+    "--window",
+    "-w",
+    default=100,
+    show_default=True,
+    help="Window size for error-rate spike detection.",
+)
+@click.option(
+    "--spike-threshold",
+    "-s",
+    default=0.25,
+    show_default=True,
+    help="Error-rate fraction that constitutes a spike.",
+)
+@click.option(
+    "--queue-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_QUEUE_SIZE,
+    show_default=True,
+    help="Batches that may wait for analysis before new ones get 503.",
+)
+@click.option(
+    "--stats-window",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DEFAULT_WINDOW,
+    show_default=True,
+    help="Seconds of recent ingest summarised by the stats endpoint.",
+)
+def serve_cmd(
+    host: str,
+    port: int,
+    threshold: float,
+    window: int,
+    spike_threshold: float,
+    queue_size: int,
+    stats_window: float,
+) -> None:
+    """Accept log batches over HTTP and analyze them as they arrive.
+
+    POST JSON or NDJSON records to /api/v1/ingest (as log_simulator.py
+    does) and read the running statistics from GET /api/v1/stats.
+    """
+    console.print(f"Listening on http://{host}:{port}/api/v1/ingest")
+    try:
+        serve(
+            host,
+            port,
+            queue_size=queue_size,
+            window=stats_window,
+            zscore_threshold=threshold,
+            window_size=window,
+            spike_threshold=spike_threshold,
+        )
+    except KeyboardInterrupt:
+        pass
 
 
 @main.command("health")
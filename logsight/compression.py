@@ -0,0 +1,164 @@
+"""Opening plain and compressed log files, and expanding file globs.
+
+Compression is detected from the first bytes of the file, not its name, so
+rotated logs like ``app.log.1`` that happen to be gzipped are handled too.
+Compressed files are decompressed in streaming chunks on a background
+thread; zlib, bz2 and lzma release the GIL while they work, so
+decompression overlaps with parsing in the calling thread.
+"""
+
+from __future__ import annotations
+
+import bz2
+import glob
+import gzip
+import io
+import lzma
+import os
+import queue
+import threading
+import zlib
+from collections.abc import Iterable
+from typing import IO, BinaryIO
+
+#: Leading bytes of each supported compressed format.
+MAGIC_BYTES: dict[str, bytes] = {
+    "gzip": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+
+#: Size of the decompressed chunks handed from the background thread.
+CHUNK_SIZE = 1 << 20
+#: Number of decompressed chunks buffered ahead of the parser.
+PREFETCH_CHUNKS = 4
+
+# Raised by the decompressors for truncated or corrupt input; reported as OSError
+_CORRUPT_DATA_ERRORS = (EOFError, zlib.error, lzma.LZMAError)
+
+
+def detect_compression(path: str) -> str | None:
+    """Return the compression format of *path* (a key of :data:`MAGIC_BYTES`), or ``None``."""
+    with open(path, "rb") as fh:
+        head = fh.read(max(map(len, MAGIC_BYTES.values())))
+    for name, magic in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _open_zstd(path: str) -> BinaryIO:
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            f"{path} is zstd-compressed; install 'zstandard' (pip install logsight-ai[zstd])"
+        ) from None
+    fh = open(path, "rb")
+    return zstandard.ZstdDecompressor().stream_reader(fh, closefd=True)
+
+
+_OPENERS = {
+    "gzip": gzip.open,
+    "bz2": bz2.open,
+    "xz": lzma.open,
+    "zstd": _open_zstd,
+}
+
+
+class _PrefetchReader(io.RawIOBase):
+    """Raw stream that decompresses *source* on a background thread.
+
+    Truncated or corrupt input is re-raised in the reading thread as
+    :class:`OSError`, like any other error reading the file.
+    """
+
+    def __init__(self, source: BinaryIO, chunk_size: int = CHUNK_SIZE, name: str = "") -> None:
+        self._source = source
+        self._name = name
+        self._chunk_size = chunk_size
+        self._chunks: queue.Queue[bytes | BaseException] = queue.Queue(maxsize=PREFETCH_CHUNKS)
+        self._buffer = memoryview(b"")
+        self._done = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._fill, name="logsight-decompress", daemon=True)
+        self._thread.start()
+
+    def _fill(self) -> None:
+        try:
+            while not self._stop.is_set():
+                chunk = self._source.read(self._chunk_size)
+                self._put(chunk)
+                if not chunk:
+                    return
+        except _CORRUPT_DATA_ERRORS as exc:
+            error = OSError(f"{self._name}: truncated or corrupt compressed data ({exc})")
+            error.__cause__ = exc
+            self._put(error)
+        except BaseException as exc:  # re-raised in the reading thread
+            self._put(exc)
+
+    def _put(self, item: bytes | BaseException) -> None:
+        while not self._stop.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if not self._buffer:
+            if self._done:
+                return 0
+            item = self._chunks.get()
+            if isinstance(item, BaseException):
+                self._done = True
+                raise item
+            if not item:
+                self._done = True
+                return 0
+            self._buffer = memoryview(item)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._source.close()
+        super().close()
+
+
+def open_log(path: str) -> IO[str]:
+    """Open *path* for reading text, decompressing it transparently if needed.
+
+    Text is decoded as UTF-8 with replacement characters and universal
+    newlines, exactly as for a plain file.
+    """
+    compression = detect_compression(path)
+    if compression is None:
+        return open(path, encoding="utf-8", errors="replace")
+    source = _OPENERS[compression](path)
+    raw = _PrefetchReader(source, name=path)
+    return io.TextIOWrapper(io.BufferedReader(raw, 1 << 16), encoding="utf-8", errors="replace")
+
+
+def expand_paths(patterns: Iterable[str]) -> list[str]:
+    """Expand shell-style globs in *patterns*, keeping the given order.
+
+    Each glob contributes its matches in sorted order.  Patterns without
+    glob characters, or globs that match nothing, are kept as given so that
+    opening them reports the missing file.
+    """
+    paths: list[str] = []
+    for pattern in patterns:
+        has_magic = any(c in pattern for c in "*?[")
+        matches = sorted(glob.glob(os.path.expanduser(pattern))) if has_magic else []
+        paths.extend(matches or [pattern])
+    return paths
@@ -0,0 +1,181 @@
+"""Following growing log files, as ``tail -F`` does.
+
+:class:`FileFollower` reads only the bytes appended since its last poll and
+notices when the file is rotated (its path now names a different inode) or
+truncated.  :func:`tail` polls a set of followers, feeds complete new lines
+through an :class:`~logsight.stream.IncrementalAnalyzer` and yields an
+:class:`Alert` for every new anomaly and spike.  Polling costs one
+``os.stat`` per file per interval while idle.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+
+from logsight.compression import CHUNK_SIZE
+from logsight.parser import LogEntry, TimestampParser, parse_line
+from logsight.stream import IncrementalAnalyzer
+
+#: Seconds between polls when no new data has arrived.
+POLL_INTERVAL = 0.05
+
+
+class FileFollower:
+    """Incrementally read the lines appended to *path*.
+
+    Parameters
+    ----------
+    path:
+        File to follow.  It need not exist yet.
+    from_start:
+        Read the existing contents first instead of starting at the end.
+    chunk_size:
+        Most bytes read per :meth:`poll`, so a large backlog is worked
+        through in bounded pieces.
+    """
+
+    def __init__(self, path: str, from_start: bool = False, chunk_size: int = CHUNK_SIZE) -> None:
+        self.path = path
+        self._chunk_size = chunk_size
+        self._fh = None
+        self._inode: tuple[int, int] | None = None
+        self._partial = b""
+        self._open(seek_end=not from_start)
+
+    def _open(self, seek_end: bool) -> None:
+        try:
+            fh = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        st = os.fstat(fh.fileno())
+        if seek_end:
+            fh.seek(0, os.SEEK_END)
+        self._fh, self._inode = fh, (st.st_dev, st.st_ino)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def poll(self) -> list[str]:
+        """Return the complete lines appended since the last call.
+
+        A trailing line without a newline is held back until it is finished.
+        After a rotation the rest of the old file is read before switching to
+        the new one, so no lines are lost.  At most *chunk_size* bytes are
+        read from each file per call; a longer backlog is returned over the
+        following calls.
+        """
+        if self._fh is None:
+            self._open(seek_end=False)
+            if self._fh is None:
+                return []
+        data = self._fh.read(self._chunk_size)
+        lines = self._split(data)
+        if len(data) == self._chunk_size:
+            return lines  # more to read; look for a rotation once caught up
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return lines  # moved away; keep draining it until a new file appears
+        if (st.st_dev, st.st_ino) != self._inode:
+            data = self._fh.read(self._chunk_size)
+            lines += self._split(data)
+            if len(data) == self._chunk_size:
+                return lines  # finish the old file first
+            if self._partial:
+                # The rotated-away file will not get the rest of this line.
+                lines += self._split(b"\n")
+            self.close()
+            self._open(seek_end=False)
+            if self._fh is not None:
+                lines += self._split(self._fh.read(self._chunk_size))
+        elif st.st_size < self._fh.tell():
+            # Truncated in place (copytruncate): start again from the top.
+            self._partial = b""
+            self._fh.seek(0)
+            lines += self._split(self._fh.read(self._chunk_size))
+        return lines
+
+    def _split(self, data: bytes) -> list[str]:
+        if not data:
+            return []
+        head, sep, tail = (self._partial + data).rpartition(b"\n")
+        self._partial = tail
+        if not sep:
+            return []
+        # Universal newlines, as for files read in text mode.
+        text = head.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+        return text.split("\n")
+
+
+@dataclass
+class Alert:
+    """A new anomaly or error-rate spike seen while following files."""
+
+    kind: str  #: ``"anomaly"`` or ``"spike"``
+    path: str
+    #: The anomalous entry, or ``(start, end, peak_rate)`` for a spike.
+    detail: LogEntry | tuple[int, int, float]
+
+
+def tail(
+    paths: Sequence[str],
+    analyzer: IncrementalAnalyzer,
+    fmt: str | None = None,
+    year: int | None = None,
+    from_start: bool = False,
+    poll_interval: float = POLL_INTERVAL,
+    stop: threading.Event | None = None,
+) -> Iterator[Alert]:
+    """Follow *paths* and yield alerts as new lines arrive.
+
+    Each poll reads every file, parses its new lines and feeds them to
+    *analyzer* as one chunk; the generator only sleeps when nothing was
+    read, so an alert is yielded within *poll_interval* of the line being
+    written.  Runs until *stop* is set (or forever).  *fmt* forces a format
+    name from :data:`~logsight.parser.FORMATS`; by default every line goes
+    through the dispatcher.
+    """
+    # Open the files now rather than on the first next(), so lines written
+    # before iteration starts are not skipped.
+    followers = [FileFollower(path, from_start=from_start) for path in paths]
+    return _follow(followers, analyzer, fmt, TimestampParser(year=year), poll_interval, stop)
+
+
+def _follow(
+    followers: list[FileFollower],
+    analyzer: IncrementalAnalyzer,
+    fmt: str | None,
+    timestamps: TimestampParser,
+    poll_interval: float,
+    stop: threading.Event | None,
+) -> Iterator[Alert]:
+    last_spike = analyzer.spikes[-1][0] if analyzer.spikes else -1
+    try:
+        while stop is None or not stop.is_set():
+            busy = False
+            for follower in followers:
+                lines = [line for line in follower.poll() if line.strip()]
+                if not lines:
+                    continue
+                busy = True
+                entries = [parse_line(line, fmt, timestamps) for line in lines]
+                for entry in analyzer.update(entries):
+                    yield Alert("anomaly", follower.path, entry)
+                for spike in analyzer.spikes:
+                    if spike[0] > last_spike:
+                        last_spike = spike[0]
+                        yield Alert("spike", follower.path, spike)
+            if not busy:
+                if stop is not None:
+                    stop.wait(poll_interval)
+                else:
+                    time.sleep(poll_interval)
+    finally:
+        for follower in followers:
+            follower.close()
@@ -0,0 +1,403 @@
+"""HTTP ingest endpoint for structured log batches.
+
+:class:`IngestServer` is a small HTTP/1.1 server on :mod:`asyncio` streams
+(standard library only).  ``POST /api/v1/ingest`` accepts a JSON array of
+records, a ``{"logs": [...]}`` object (what ``log_simulator.py`` sends) or
+NDJSON, converts the records straight into a columnar
+:class:`~logsight.batch.LogBatch` and queues it.  A single consumer folds
+queued batches into an :class:`~logsight.stream.IncrementalAnalyzer`.  The
+queue is bounded: while it is full, new batches get ``503`` with
+``Retry-After`` instead of piling up in memory.  ``GET /api/v1/stats``
+returns the running statistics, the recent anomalies and spikes and the
+ingest counters of the last ``window`` seconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from array import array
+from collections import deque
+from typing import Any
+
+import numpy as np
+
+from logsight.batch import _LEVEL_CODES, MAX_NS, NAT, LogBatch, epoch_ns, message_key
+from logsight.parser import LogLevel, _parse_level, _parse_timestamp
+from logsight.stream import IncrementalAnalyzer
+
+INGEST_PATH = "/api/v1/ingest"
+STATS_PATH = "/api/v1/stats"
+#: Batches that may wait for the analyzer before new ones are refused.
+DEFAULT_QUEUE_SIZE = 64
+#: Largest accepted request body, in bytes.
+DEFAULT_MAX_BODY = 32 * 1024 * 1024
+#: Seconds covered by the ``window`` section of the stats endpoint.
+DEFAULT_WINDOW = 60.0
+#: Largest accepted request line plus headers, in bytes.
+MAX_HEADER_SIZE = 64 * 1024
+#: Anomalies and spike ranges listed by the stats endpoint.
+RECENT = 20
+
+_NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+_UNKNOWN_CODE = _LEVEL_CODES[LogLevel.UNKNOWN]
+# Numeric timestamps must fit the batch's int64 nanosecond column
+_MAX_EPOCH_SECONDS = MAX_NS // 1_000_000_000
+
+
+class IngestError(ValueError):
+    """A request body that is not a batch of log records."""
+
+
+def decode_records(body: bytes, content_type: str = "application/json") -> list[Any]:
+    """Decode a request body into a list of records.
+
+    NDJSON lines are joined into one JSON array so the whole body is decoded
+    in a single ``json.loads`` call; a body with a malformed line falls back
+    to line-by-line decoding, and each bad line becomes a ``None`` record
+    (rejected by :func:`records_to_batch`).
+    """
+    if content_type.split(";", 1)[0].strip().lower() in _NDJSON_TYPES:
+        lines = [line for line in body.splitlines() if line.strip()]
+        try:
+            return json.loads(b"[" + b",".join(lines) + b"]")
+        except ValueError:
+            return [_loads_or_none(line) for line in lines]
+    try:
+        payload = json.loads(body)
+    except ValueError as exc:
+        raise IngestError(f"Body is not valid JSON: {exc}") from None
+    if isinstance(payload, dict):
+        payload = payload.get("logs")
+    if not isinstance(payload, list):
+        raise IngestError('Expected a JSON array of records or an object with a "logs" array')
+    return payload
+
+
+def _loads_or_none(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def records_to_batch(records: list[Any]) -> tuple[LogBatch, int]:
+    """Validate *records* and build a batch from the valid ones.
+
+    A record is valid if it is an object with a string ``message``.
+    ``level`` is optional (``WARN`` and ``FATAL`` are understood, anything
+    else is ``UNKNOWN``); ``timestamp`` may be Unix seconds or an ISO 8601
+    string.  A record whose numeric timestamp is not finite or lies outside
+    the years 1677-2262 is rejected; a string timestamp that does not parse
+    or lies outside that range is stored as missing, as in
+    :func:`~logsight.batch.epoch_ns`.  The source (``component``, ``service`` or ``logger``) prefixes
+    the stored raw line.  Returns the batch and the number of rejected records.
+    """
+    levels = array("B")
+    timestamps = array("q")
+    raw_offsets = array("q")
+    raw_lengths = array("i")
+    message_offsets = array("q")
+    message_lengths = array("i")
+    message_keys = array("i")
+    vocabulary: dict[str, int] = {}
+    level_codes: dict[str, int] = {}
+    chunks: list[str] = []
+    size = rejected = 0
+
+    for record in records:
+        if not isinstance(record, dict):
+            rejected += 1
+            continue
+        message = record.get("message")
+        if not isinstance(message, str):
+            rejected += 1
+            continue
+        ts = record.get("timestamp")
+        if isinstance(ts, (int, float)) and not isinstance(ts, bool):
+            # False for NaN and infinities too
+            if not -_MAX_EPOCH_SECONDS < ts < _MAX_EPOCH_SECONDS:
+                rejected += 1
+                continue
+            ns = int(ts * 1_000_000_000)
+        elif isinstance(ts, str):
+            ns = epoch_ns(_parse_timestamp(ts))
+        else:
+            ns = NAT
+        level = record.get("level")
+        if isinstance(level, str):
+            code = level_codes.get(level)
+            if code is None:
+                code = level_codes[level] = _LEVEL_CODES[_parse_level(level)]
+        else:
+            code = _UNKNOWN_CODE
+        source = record.get("component") or record.get("service") or record.get("logger")
+        raw = f"{source}: {message}" if isinstance(source, str) else message
+
+        levels.append(code)
+        timestamps.append(ns)
+        raw_offsets.append(size)
+        raw_lengths.append(len(raw))
+        message_offsets.append(size + len(raw) - len(message))
+        message_lengths.append(len(message))
+        message_keys.append(vocabulary.setdefault(message_key(message), len(vocabulary)))
+        chunks.append(raw)
+        size += len(raw)
+
+    n = len(levels)
+    batch = LogBatch(
+        levels=np.frombuffer(levels, dtype=np.uint8).copy(),
+        timestamps=np.frombuffer(timestamps, dtype=np.int64).copy(),
+        formats=np.zeros(n, dtype=np.uint8),
+        raw_offsets=np.frombuffer(raw_offsets, dtype=np.int64).copy(),
+        raw_lengths=np.frombuffer(raw_lengths, dtype=np.int32).copy(),
+        message_offsets=np.frombuffer(message_offsets, dtype=np.int64).copy(),
+        message_lengths=np.frombuffer(message_lengths, dtype=np.int32).copy(),
+        message_keys=np.frombuffer(message_keys, dtype=np.int32).copy(),
+        vocabulary=list(vocabulary),
+        text="".join(chunks),
+    )
+    return batch, rejected
+
+
+class IngestServer:
+    """Serve the ingest and stats endpoints on *host*:*port*.
+
+    Parameters
+    ----------
+    host, port:
+        Address to listen on; port ``0`` picks a free port (see :attr:`port`
+        after :meth:`start`).
+    queue_size:
+        Batches that may wait for the analyzer; more are refused with ``503``.
+    max_body:
+        Largest accepted request body in bytes; larger ones get ``413``.
+    window:
+        Seconds of recent ingest summarised under ``window`` in the stats.
+    analyzer:
+        The :class:`~logsight.stream.IncrementalAnalyzer` to feed; by
+        default one is built from *analyzer_options*.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        max_body: int = DEFAULT_MAX_BODY,
+        window: float = DEFAULT_WINDOW,
+        analyzer: IncrementalAnalyzer | None = None,
+        **analyzer_options,
+    ) -> None:
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.max_body = max_body
+        self.window = window
+        self.analyzer = analyzer if analyzer is not None else IncrementalAnalyzer(**analyzer_options)
+
+        self.batches = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.throttled = 0
+        self._recent: deque[tuple[float, int, int]] = deque()  # (time, records, errors) per analyzed batch
+        self._queue: asyncio.Queue[LogBatch] | None = None
+        self._server: asyncio.base_events.Server | None = None
+        self._consumer: asyncio.Task | None = None
+        self._started = 0.0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        """Start listening and consuming queued batches."""
+        self._queue = asyncio.Queue(self.queue_size)
+        self._consumer = asyncio.ensure_future(self._consume())
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=MAX_HEADER_SIZE
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started = time.monotonic()
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop accepting requests, analyze what is queued, then stop."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._queue is not None:
+            await self._queue.join()
+        if self._consumer is not None:
+            self._consumer.cancel()
+
+    async def _consume(self) -> None:
+        queue = self._queue
+        while True:
+            batch = await queue.get()
+            try:
+                self.analyzer.update(batch)
+                self._recent.append((time.monotonic(), len(batch), int(batch.error_mask.sum())))
+            finally:
+                queue.task_done()
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+
+    def ingest(self, body: bytes, content_type: str) -> tuple[int, dict[str, Any]]:
+        """Handle one ingest request; returns the status code and response body."""
+        if self._queue.full():
+            self.throttled += 1
+            return 503, {"error": "Ingest queue is full; retry later."}
+        try:
+            records = decode_records(body, content_type)
+        except IngestError as exc:
+            return 400, {"error": str(exc)}
+        batch, rejected = records_to_batch(records)
+        self.rejected += rejected
+        if len(batch):
+            self._queue.put_nowait(batch)
+            self.batches += 1
+            self.accepted += len(batch)
+        return 202, {"accepted": len(batch), "rejected": rejected}
+
+    def stats(self) -> dict[str, Any]:
+        """Everything ``GET /api/v1/stats`` reports."""
+        analyzer = self.analyzer
+        report = analyzer.snapshot()
+        stats = report.stats
+        now = time.monotonic()
+        while self._recent and self._recent[0][0] <= now - self.window:
+            self._recent.popleft()
+        records = sum(n for _, n, _ in self._recent)
+        errors = sum(e for _, _, e in self._recent)
+        span = min(self.window, now - self._started) if self._started else self.window
+        return {
+            "total": stats.total,
+            "error_count": stats.error_count,
+            "warning_count": stats.warning_count,
+            "error_rate": stats.error_rate,
+            "level_counts": stats.level_counts,
+            "top_messages": stats.top_messages,
+            "top_messages_error": stats.top_messages_error,
+            "message_length": {"mean": analyzer.mean, "std": analyzer.std},
+            "recent_anomalies": [
+                {"position": int(pos), "level": entry.level.value, "raw": entry.raw}
+                for pos, entry in zip(report.indices[-RECENT:], report.anomalies[-RECENT:])
+            ],
+            "spikes": analyzer.spikes[-RECENT:],
+            "window": {
+                "seconds": self.window,
+                "records": records,
+                "errors": errors,
+                "error_rate": errors / records if records else 0.0,
+                "records_per_second": records / span if span > 0 else 0.0,
+            },
+            "ingest": {
+                "batches": self.batches,
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+                "queue_size": self.queue_size,
+            },
+        }
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while await self._serve_one(reader, writer):
+                pass
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_one(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Answer one request; returns whether the connection stays open."""
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        path = target.split("?", 1)[0]
+        extra: dict[str, str] = {}
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            status, body, keep_alive = 411, {"error": "Send a Content-Length body."}, False
+        else:
+            length = int(headers.get("content-length") or 0)
+            if length > self.max_body:
+                status, body, keep_alive = 413, {"error": f"Body exceeds {self.max_body} bytes."}, False
+            else:
+                payload = await reader.readexactly(length) if length else b""
+                status, body = self._route(method, path, headers, payload)
+                if status == 405:
+                    extra["Allow"] = "POST" if path == INGEST_PATH else "GET"
+                elif status == 503:
+                    extra["Retry-After"] = "1"
+
+        data = json.dumps(body).encode()
+        head_lines = [
+            f"HTTP/1.1 {status} {_REASONS[status]}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(data)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            *(f"{name}: {value}" for name, value in extra.items()),
+        ]
+        writer.write(("\r\n".join(head_lines) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+        return keep_alive
+
+    def _route(
+        self, method: str, path: str, headers: dict[str, str], payload: bytes
+    ) -> tuple[int, dict[str, Any]]:
+        if path == INGEST_PATH:
+            if method != "POST":
+                return 405, {"error": "Use POST."}
+            return self.ingest(payload, headers.get("content-type", "application/json"))
+        if path == STATS_PATH:
+            if method != "GET":
+                return 405, {"error": "Use GET."}
+            return 200, self.stats()
+        return 404, {"error": f"No endpoint at {path}"}
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, **options) -> None:
+    """Run an :class:`IngestServer` until interrupted."""
+
+    async def run() -> None:
+        server = IngestServer(host, port, **options)
+        await server.start()
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    asyncio.run(run())
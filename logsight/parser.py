@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import itertools
 import re
-from collections.abc import Iterator
-from dataclasses import dataclass, field
-from datetime import datetime
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 
+from logsight.compression import open_log
+
 
 class LogLevel(str, Enum):
     DEBUG = "DEBUG"
@@ -52,15 +55,13 @@ _PATTERNS: list[tuple[str, re.Pattern[str]]] = [
     ),
 ]
 
-# Timestamp formats tried in order when parsing iso8601-style strings.
-_TS_FORMATS = [
-    "%Y-%m-%dT%H:%M:%S.%f%z",
-    "%Y-%m-%dT%H:%M:%S%z",
-    "%Y-%m-%dT%H:%M:%S.%f",
-    "%Y-%m-%dT%H:%M:%S",
-    "%Y-%m-%d %H:%M:%S.%f",
-    "%Y-%m-%d %H:%M:%S",
-]
+_MONTHS: dict[str, int] = {
+    name: number
+    for number, name in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"),
+        start=1,
+    )
+}
 
 _LEVEL_ALIASES: dict[str, LogLevel] = {
     "WARN": LogLevel.WARNING,
@@ -80,60 +81,440 @@ def _parse_level(raw: str | None) -> LogLevel:
         return LogLevel.UNKNOWN
 
 
-def _parse_timestamp(raw: str | None) -> datetime | None:
-    if not raw:
+_MISSING = object()
+
+
+class TimestampParser:
+    """Parse log timestamps, learning the layout a stream uses as it goes.
+
+    Supported layouts are ISO 8601 (``T`` or space separator, optional
+    1–6 digit fraction, optional ``Z`` / ``±HH:MM`` / ``±HHMM`` offset) and
+    syslog ``Mon DD HH:MM:SS``.  The layout that matched last is tried first,
+    fields are sliced out directly instead of going through ``strptime``, and
+    the whole-second part of each stamp is cached because consecutive lines
+    almost always share it.
+
+    Parameters
+    ----------
+    year:
+        Year assigned to syslog stamps, which do not carry one.  Defaults to
+        the current year.
+    cache_size:
+        Maximum number of cached second-resolution prefixes; the cache is
+        cleared when it fills up.
+    """
+
+    def __init__(self, year: int | None = None, cache_size: int = 4096) -> None:
+        self.year = datetime.now().year if year is None else year
+        self.cache_size = cache_size
+        self._iso_cache: dict[str, datetime | None] = {}
+        self._syslog_cache: dict[str, datetime | None] = {}
+        self._offsets: dict[str, timezone | None] = {}
+        self._layouts = (self._parse_iso, self._parse_syslog)
+        self._last = self._parse_iso
+
+    def __call__(self, raw: str | None) -> datetime | None:
+        if not raw:
+            return None
+        raw = raw.strip()
+        result = self._last(raw)
+        if result is not None:
+            return result
+        for layout in self._layouts:
+            if layout != self._last:
+                result = layout(raw)
+                if result is not None:
+                    self._last = layout
+                    return result
         return None
-    raw = raw.strip().replace(",", ".")
-    for fmt in _TS_FORMATS:
+
+    def _store(
+        self,
+        cache: dict[str, datetime | None],
+        key: str,
+        build: Callable[..., datetime | None],
+        *args,
+    ) -> datetime | None:
+        if len(cache) >= self.cache_size:
+            cache.clear()
         try:
-            return datetime.strptime(raw, fmt)
+            value = build(*args)
         except ValueError:
-            continue
-    return None
+            value = None
+        cache[key] = value
+        return value
+
+    def _parse_iso(self, raw: str) -> datetime | None:
+        if len(raw) < 19 or raw[4] + raw[7] + raw[13] + raw[16] != "--::" or raw[10] not in "Tt ":
+            return None
+        key = raw[:19]
+        base = self._iso_cache.get(key, _MISSING)
+        if base is _MISSING:
+            base = self._store(self._iso_cache, key, _iso_seconds, key)
+        if base is None or len(raw) == 19:
+            return base
+
+        rest = raw[19:]
+        microsecond = 0
+        if rest[0] in ".,":
+            end = 1
+            while end < len(rest) and "0" <= rest[end] <= "9":
+                end += 1
+            fraction = rest[1:end]
+            if not 1 <= len(fraction) <= 6:
+                return None
+            microsecond = int(fraction.ljust(6, "0"))
+            rest = rest[end:]
+        if not rest:
+            return base.replace(microsecond=microsecond)
+
+        try:
+            tz = self._offsets[rest]
+        except KeyError:
+            tz = self._offsets[rest] = _utc_offset(rest)
+        if tz is None:
+            return None
+        return base.replace(microsecond=microsecond, tzinfo=tz)
+
+    def _parse_syslog(self, raw: str) -> datetime | None:
+        value = self._syslog_cache.get(raw, _MISSING)
+        if value is _MISSING:
+            value = self._store(self._syslog_cache, raw, _syslog_seconds, raw, self.year)
+        return value
+
+
+def _ascii_digits(text: str) -> bool:
+    # str.isdigit() also accepts digits such as "²" that int() rejects
+    return text.isascii() and text.isdigit()
+
+
+def _iso_seconds(prefix: str) -> datetime | None:
+    digits = prefix[0:4] + prefix[5:7] + prefix[8:10] + prefix[11:13] + prefix[14:16] + prefix[17:19]
+    if not _ascii_digits(digits):
+        return None
+    return datetime(
+        int(prefix[0:4]),
+        int(prefix[5:7]),
+        int(prefix[8:10]),
+        int(prefix[11:13]),
+        int(prefix[14:16]),
+        int(prefix[17:19]),
+    )
+
+
+def _syslog_seconds(raw: str, year: int) -> datetime | None:
+    parts = raw.split()
+    if len(parts) != 3:
+        return None
+    month = _MONTHS.get(parts[0].capitalize())
+    clock = parts[2]
+    if month is None or not _ascii_digits(parts[1]) or len(clock) != 8 or clock[2] + clock[5] != "::":
+        return None
+    if not _ascii_digits(clock[0:2] + clock[3:5] + clock[6:8]):
+        return None
+    return datetime(year, month, int(parts[1]), int(clock[0:2]), int(clock[3:5]), int(clock[6:8]))
+
+
+def _utc_offset(raw: str) -> timezone | None:
+    if raw == "Z":
+        return timezone.utc
+    if raw[0] not in "+-" or len(raw) not in (5, 6):
+        return None
+    hours, minutes = raw[1:3], raw[-2:]
+    if (len(raw) == 6 and raw[3] != ":") or not _ascii_digits(hours + minutes):
+        return None
+    offset = timedelta(hours=int(hours), minutes=int(minutes))
+    try:
+        return timezone(-offset if raw[0] == "-" else offset)
+    except ValueError:
+        return None
+
+
+_default_timestamps = TimestampParser()
+
+
+def _parse_timestamp(raw: str | None) -> datetime | None:
+    return _default_timestamps(raw)
 
 
-@dataclass
 class LogEntry:
-    """A single parsed log line."""
+    """A single parsed log line.
+
+    Slotted to keep per-entry memory low.  Entries built by the parser store
+    ``message`` as an offset into ``raw`` and build ``extra`` from the line
+    the first time it is read.
+    """
+
+    __slots__ = ("raw", "format", "timestamp", "level", "_message", "_message_start", "_extra")
+
+    def __init__(
+        self,
+        raw: str,
+        format: str = "unknown",
+        timestamp: datetime | None = None,
+        level: LogLevel = LogLevel.UNKNOWN,
+        message: str = "",
+        extra: dict[str, str] | None = None,
+    ) -> None:
+        self.raw = raw
+        self.format = format
+        self.timestamp = timestamp
+        self.level = level
+        self._message: str | None = message
+        self._message_start = 0
+        self._extra: dict[str, str] | None = {} if extra is None else extra
+
+    @classmethod
+    def _parsed(
+        cls,
+        raw: str,
+        format: str,
+        timestamp: datetime | None,
+        level: LogLevel,
+        message_start: int = 0,
+    ) -> LogEntry:
+        """Build an entry whose message is ``raw[message_start:]`` and whose extras are lazy."""
+        entry = cls.__new__(cls)
+        entry.raw = raw
+        entry.format = format
+        entry.timestamp = timestamp
+        entry.level = level
+        entry._message = None
+        entry._message_start = message_start
+        entry._extra = None
+        return entry
+
+    @property
+    def message(self) -> str:
+        if self._message is not None:
+            return self._message
+        return self.raw[self._message_start :] if self._message_start else self.raw
 
-    raw: str
-    format: str = "unknown"
-    timestamp: datetime | None = None
-    level: LogLevel = LogLevel.UNKNOWN
-    message: str = ""
-    extra: dict[str, str] = field(default_factory=dict)
+    @message.setter
+    def message(self, value: str) -> None:
+        self._message = value
+
+    @property
+    def extra(self) -> dict[str, str]:
+        if self._extra is None:
+            self._extra = _rematch_extras(self.raw, self.format)
+        return self._extra
+
+    @extra.setter
+    def extra(self, value: dict[str, str]) -> None:
+        self._extra = value
 
     @property
     def is_error(self) -> bool:
         return self.level in (LogLevel.ERROR, LogLevel.CRITICAL)
 
+    def _fields(self) -> tuple:
+        return (self.raw, self.format, self.timestamp, self.level, self.message, self.extra)
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return (
+            f"LogEntry(raw={self.raw!r}, format={self.format!r}, timestamp={self.timestamp!r}, "
+            f"level={self.level!r}, message={self.message!r}, extra={self.extra!r})"
+        )
+
+
+def _prefilter(line: str) -> tuple[bool, bool, bool]:
+    """Cheap necessary conditions for the syslog, iso8601 and nginx_access patterns.
+
+    Each check is implied by its pattern, so a ``False`` rules the pattern out
+    without running it; a ``True`` only means the regex is worth trying.
+    """
+    return (
+        line[3:4].isspace(),  # syslog: ^\w{3}\s+
+        line[4:5] == "-" and line[:4].isdigit(),  # iso8601: ^\d{4}-
+        "[" in line and '"' in line,  # nginx_access: [timestamp] "request"
+    )
+
+
+def _build_dispatch_table(
+    patterns: list[tuple[str, re.Pattern[str]]],
+) -> dict[tuple[bool, bool, bool], tuple[tuple[str, re.Pattern[str]], ...]]:
+    """Map every :func:`_prefilter` outcome to the patterns still worth trying.
+
+    Candidates keep their ``_PATTERNS`` order, so the first match is the same
+    one the full cascade would have returned.
+    """
+    gated = ("syslog", "iso8601", "nginx_access")
+    table = {}
+    for key in itertools.product((False, True), repeat=len(gated)):
+        allowed = {name for name, ok in zip(gated, key) if ok}
+        table[key] = tuple(
+            (name, pattern) for name, pattern in patterns if name not in gated or name in allowed
+        )
+    return table
+
+
+_DISPATCH = _build_dispatch_table(_PATTERNS)
+_PATTERNS_BY_NAME: dict[str, re.Pattern[str]] = dict(_PATTERNS)
+
+#: Format names accepted by the ``fmt`` argument of the parsing functions.
+FORMATS: tuple[str, ...] = tuple(_PATTERNS_BY_NAME)
+
+_CORE_GROUPS = frozenset(("timestamp", "level", "message"))
+
+#: Number of leading non-blank lines inspected when ``fmt="auto"``.
+SNIFF_SAMPLE_SIZE = 50
+
+
+def _entry_from_match(
+    line: str,
+    fmt_name: str,
+    m: re.Match[str],
+    timestamps: TimestampParser,
+) -> LogEntry:
+    names = m.re.groupindex
+    timestamp = timestamps(m.group("timestamp")) if "timestamp" in names else None
+    level = _parse_level(m.group("level")) if "level" in names else LogLevel.UNKNOWN
+    if "message" not in names or m.start("message") < 0:
+        return LogEntry._parsed(line, fmt_name, timestamp, level)
+    start, end = m.span("message")
+    if end != len(line):
+        entry = LogEntry._parsed(line, fmt_name, timestamp, level)
+        entry.message = line[start:end]
+        return entry
+    # Message groups normally run to the end of the line, so the message is
+    # kept as an offset into it rather than a copy.
+    return LogEntry._parsed(line, fmt_name, timestamp, level, start)
+
+
+def _extras(groups: dict[str, str | None]) -> dict[str, str]:
+    # Stash any remaining named groups as extras.
+    return {k: v for k, v in groups.items() if k not in _CORE_GROUPS and v is not None}
+
+
+def _rematch_extras(line: str, fmt_name: str) -> dict[str, str]:
+    """Recover the extras of a line already known to be in format *fmt_name*."""
+    pattern = _PATTERNS_BY_NAME.get(fmt_name)
+    m = pattern.match(line) if pattern is not None else None
+    return _extras(m.groupdict()) if m else {}
 
-def parse_line(line: str) -> LogEntry:
-    """Parse a single log line and return a :class:`LogEntry`."""
+
+def _detect_format(line: str) -> str:
+    for fmt_name, pattern in _DISPATCH[_prefilter(line)]:
+        if pattern.match(line):
+            return fmt_name
+    return "unknown"
+
+
+def parse_line(
+    line: str,
+    fmt: str | None = None,
+    timestamps: TimestampParser | None = None,
+) -> LogEntry:
+    """Parse a single log line and return a :class:`LogEntry`.
+
+    When *fmt* names one of :data:`FORMATS`, that pattern is tried first and
+    the full dispatcher is only consulted if it does not match.  Pass a
+    :class:`TimestampParser` as *timestamps* to share its learned layout and
+    cache across the lines of one stream.
+    """
     line = line.rstrip("\n\r")
-    for fmt_name, pattern in _PATTERNS:
+    if timestamps is None:
+        timestamps = _default_timestamps
+    if fmt is not None:
+        m = _PATTERNS_BY_NAME[fmt].match(line)
+        if m:
+            return _entry_from_match(line, fmt, m, timestamps)
+    for fmt_name, pattern in _DISPATCH[_prefilter(line)]:
         m = pattern.match(line)
         if m:
-            groups = m.groupdict()
-            entry = LogEntry(raw=line, format=fmt_name)
-            entry.timestamp = _parse_timestamp(groups.get("timestamp"))
-            entry.level = _parse_level(groups.get("level"))
-            entry.message = groups.get("message") or line
-            # Stash any remaining named groups as extras.
-            skip = {"timestamp", "level", "message"}
-            entry.extra = {k: v for k, v in groups.items() if k not in skip and v is not None}
-            return entry
-    return LogEntry(raw=line, message=line)
-
-
-def parse_lines(lines: list[str]) -> list[LogEntry]:
-    """Parse a list of log lines."""
-    return [parse_line(line) for line in lines if line.strip()]
-
-
-def parse_file(path: str) -> Iterator[LogEntry]:
-    """Yield :class:`LogEntry` objects from *path* line by line."""
-    with open(path, encoding="utf-8", errors="replace") as fh:
-        for line in fh:
-            if line.strip():
-                yield parse_line(line)
+            return _entry_from_match(line, fmt_name, m, timestamps)
+    return LogEntry._parsed(line, "unknown", None, LogLevel.UNKNOWN)
+
+
+def sniff_format(sample: Iterable[str]) -> str | None:
+    """Return the format to lock onto for a stream whose first lines are *sample*.
+
+    The most common specific format (anything but ``generic``) wins.  ``None``
+    means the sample gave no such signal and every line should go through the
+    dispatcher.
+    """
+    counts = Counter(_detect_format(line.rstrip("\n\r")) for line in sample)
+    for fmt_name, _ in counts.most_common():
+        if fmt_name in _PATTERNS_BY_NAME and fmt_name != "generic":
+            return fmt_name
+    return None
+
+
+def _resolve_format(fmt: str, sample: Iterable[str]) -> str | None:
+    if fmt == "auto":
+        return sniff_format(sample)
+    if fmt not in _PATTERNS_BY_NAME:
+        raise ValueError(f"Unknown log format {fmt!r}; expected 'auto' or one of {FORMATS}")
+    return fmt
+
+
+def parse_lines(
+    lines: list[str],
+    fmt: str = "auto",
+    sample_size: int = SNIFF_SAMPLE_SIZE,
+    year: int | None = None,
+) -> list[LogEntry]:
+    """Parse a list of log lines.
+
+    With ``fmt="auto"`` the first *sample_size* non-blank lines are sniffed
+    and the winning format is tried first for every line; pass a name from
+    :data:`FORMATS` to force a format instead.  *year* is assigned to syslog
+    timestamps (see :class:`TimestampParser`).
+    """
+    lines = [line for line in lines if line.strip()]
+    locked = _resolve_format(fmt, lines[:sample_size])
+    timestamps = TimestampParser(year=year)
+    return [parse_line(line, locked, timestamps) for line in lines]
+
+
+def parse_stream(
+    lines: Iterable[str],
+    fmt: str = "auto",
+    sample_size: int = SNIFF_SAMPLE_SIZE,
+    year: int | None = None,
+) -> Iterator[LogEntry]:
+    """Lazily parse an iterable of lines, such as an open file or ``sys.stdin``.
+
+    Format selection works as in :func:`parse_lines`; only the sniffed
+    sample is buffered.
+    """
+    nonblank: Iterator[str] = (line for line in lines if line.strip())
+    head = list(itertools.islice(nonblank, sample_size)) if fmt == "auto" else []
+    locked = _resolve_format(fmt, head)
+    timestamps = TimestampParser(year=year)
+    for line in itertools.chain(head, nonblank):
+        yield parse_line(line, locked, timestamps)
+
+
+def parse_file(
+    path: str,
+    fmt: str = "auto",
+    sample_size: int = SNIFF_SAMPLE_SIZE,
+    year: int | None = None,
+) -> Iterator[LogEntry]:
+    """Yield :class:`LogEntry` objects from *path* line by line (see :func:`parse_stream`).
+
+    gzip, bz2, xz and zstd files are recognised by their magic bytes and
+    decompressed on the fly (see :func:`~logsight.compression.open_log`).
+    """
+    with open_log(path) as fh:
+        yield from parse_stream(fh, fmt=fmt, sample_size=sample_size, year=year)
+
+
+def parse_files(
+    paths: Iterable[str],
+    fmt: str = "auto",
+    sample_size: int = SNIFF_SAMPLE_SIZE,
+    year: int | None = None,
+) -> Iterator[LogEntry]:
+    """Yield the entries of each of *paths* in turn; each file is sniffed on its own."""
+    for path in paths:
+        yield from parse_file(path, fmt=fmt, sample_size=sample_size, year=year)
@@ -0,0 +1,370 @@
+"""Memory-mapped, bytes-level reading of log files into :class:`LogBatch` columns.
+
+:func:`parse_file <logsight.parser.parse_file>` decodes every line to
+``str`` and builds a :class:`~logsight.parser.LogEntry` for it.  The reader
+here maps the file instead, finds lines with ``bytes.find``, and runs
+bytes versions of the parser patterns directly on the mapping with
+``pos`` / ``endpos``, so no per-line copy is made.  Only the fields that
+end up in columns are looked at: the level and timestamp groups (decoded
+once per distinct value) and the first characters of the message for its
+dictionary key.  The text buffer that backs :meth:`LogBatch.raw` is decoded
+in one call per batch.
+
+Results are identical to :meth:`LogBatch.from_file`, line splitting and
+blank-line handling included.  Pure-ASCII lines take the bytes path, where
+byte and character offsets coincide; any other line is decoded and parsed
+with :func:`~logsight.parser.parse_line`.
+"""
+
+from __future__ import annotations
+
+import itertools
+import mmap
+import os
+import re
+from collections.abc import Iterator
+
+import numpy as np
+
+from logsight.batch import (
+    _FORMAT_CODES,
+    _LEVEL_CODES,
+    _MESSAGE_KEY_LENGTH,
+    MAX_NS,
+    NAT,
+    LogBatch,
+    epoch_ns,
+    message_key,
+)
+from logsight.compression import detect_compression, open_log
+from logsight.parser import (
+    _PATTERNS,
+    SNIFF_SAMPLE_SIZE,
+    LogLevel,
+    TimestampParser,
+    _build_dispatch_table,
+    _parse_level,
+    _resolve_format,
+    parse_file,
+    parse_line,
+)
+from logsight.stream import DEFAULT_CHUNK_SIZE, chunked
+
+#: Readers selectable with ``reader=`` / ``--reader``.
+READERS: tuple[str, ...] = ("text", "mmap")
+
+# Characters str.isspace() accepts within ASCII; bytes.isspace() and the
+# bytes \s class leave out \x1c-\x1f, so spell them out for exact parity.
+_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+_SPACE_CLASS = r"[ \t\n\r\x0b\x0c\x1c-\x1f]"
+_NOT_SPACE_CLASS = r"[^ \t\n\r\x0b\x0c\x1c-\x1f]"
+_SPACE_BYTES = frozenset(bytes([c]) for c in _WHITESPACE)
+_NONBLANK = re.compile(_NOT_SPACE_CLASS.encode())
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+
+
+def _bytes_pattern(pattern: re.Pattern[str]) -> re.Pattern[bytes]:
+    # Drop the leading ^ so match(buf, pos, endpos) anchors at pos.
+    source = pattern.pattern.removeprefix("^")
+    source = source.replace(r"\S", _NOT_SPACE_CLASS).replace(r"\s", _SPACE_CLASS)
+    return re.compile(source.encode("ascii"), pattern.flags & ~re.UNICODE)
+
+
+_BYTES_PATTERNS = [(name, _bytes_pattern(pattern)) for name, pattern in _PATTERNS]
+_BYTES_DISPATCH = _build_dispatch_table(_BYTES_PATTERNS)
+_BYTES_PATTERNS_BY_NAME = dict(_BYTES_PATTERNS)
+_UNKNOWN_LEVEL = _LEVEL_CODES[LogLevel.UNKNOWN]
+_ISO_EPOCH = b"1970-01-01T00:00:00"
+
+
+def _prefilter(buf, start: int, end: int) -> tuple[bool, bool, bool]:
+    """Bytes counterpart of :func:`logsight.parser._prefilter` for ``buf[start:end]``."""
+    head = buf[start : min(start + 5, end)]
+    return (
+        head[3:4] in _SPACE_BYTES,
+        head[4:5] == b"-" and head[:4].isdigit(),
+        buf.find(b"[", start, end) >= 0 and buf.find(b'"', start, end) >= 0,
+    )
+
+
+class _RangeParser:
+    """Parse newline-delimited lines of *buf* into batches of columns."""
+
+    def __init__(self, buf, fmt: str | None, timestamps: TimestampParser) -> None:
+        self.buf = buf
+        self.fmt = fmt
+        self.timestamps = timestamps
+        self._levels: dict[bytes | None, int] = {}
+        self._seconds: dict[bytes, int] = {}
+        self._fractions: dict[bytes, int] = {}
+        self._reset()
+
+    def _reset(self) -> None:
+        self._columns: tuple[list[int], ...] = tuple([] for _ in range(8))
+        self._vocabulary: dict[str, int] = {}
+        self._key_codes: dict[bytes, int] = {}
+        self._extra: list[tuple[int, str]] = []
+
+    def parse(self, start: int, end: int, limit: int | None = None) -> tuple[LogBatch, int]:
+        """Parse lines from byte *start* until *end* or *limit* entries.
+
+        Returns the batch and the byte position where parsing stopped.
+        """
+        buf = self.buf
+        self._reset()
+        ascii_range = _NON_ASCII.search(buf, start, end) is None
+        pos = start
+        char_pos = 0  # character offset of *pos* in the decoded range
+        count = 0
+        while pos < end and (limit is None or count < limit):
+            newline = buf.find(b"\n", pos, end)
+            next_pos = end if newline < 0 else newline + 1
+            if ascii_range or _NON_ASCII.search(buf, pos, next_pos) is None:
+                count += self._ascii_line(pos, next_pos, char_pos - pos)
+                char_pos += next_pos - pos
+            else:
+                line = buf[pos:next_pos].decode("utf-8", errors="replace")
+                count += self._text_line(line, char_pos)
+                char_pos += len(line)
+            pos = next_pos
+
+        text = buf[start:pos].decode("utf-8", errors="replace")
+        levels, timestamps, formats, raw_offsets, raw_lengths, message_offsets, message_lengths, keys = (
+            self._columns
+        )
+        # Messages that are not a suffix of their line go after the range text.
+        for row, message in self._extra:
+            message_offsets[row] = len(text)
+            text += message
+        batch = LogBatch(
+            levels=np.array(levels, dtype=np.uint8),
+            timestamps=np.array(timestamps, dtype=np.int64),
+            formats=np.array(formats, dtype=np.uint8),
+            raw_offsets=np.array(raw_offsets, dtype=np.int64),
+            raw_lengths=np.array(raw_lengths, dtype=np.int32),
+            message_offsets=np.array(message_offsets, dtype=np.int64),
+            message_lengths=np.array(message_lengths, dtype=np.int32),
+            message_keys=np.array(keys, dtype=np.int32),
+            vocabulary=list(self._vocabulary),
+            text=text,
+        )
+        return batch, pos
+
+    # ------------------------------------------------------------------
+    # Lines
+    # ------------------------------------------------------------------
+
+    def _ascii_line(self, pos: int, end: int, shift: int) -> int:
+        """Parse the physical line ``buf[pos:end]``; *shift* maps byte to char offsets."""
+        buf = self.buf
+        while end > pos and buf[end - 1] in b"\r\n":
+            end -= 1
+        count = 0
+        # Universal newlines: a lone \r also ends a line.
+        while True:
+            cr = buf.find(b"\r", pos, end)
+            stop = end if cr < 0 else cr
+            if _NONBLANK.search(buf, pos, stop) is not None:
+                self._ascii_entry(pos, stop, shift)
+                count += 1
+            if cr < 0:
+                return count
+            pos = cr + 1
+
+    def _ascii_entry(self, start: int, end: int, shift: int) -> None:
+        buf, fmt = self.buf, self.fmt
+        if fmt is not None:
+            m = _BYTES_PATTERNS_BY_NAME[fmt].match(buf, start, end)
+            if m:
+                return self._append_match(fmt, m, start, end, shift)
+        for fmt_name, pattern in _BYTES_DISPATCH[_prefilter(buf, start, end)]:
+            m = pattern.match(buf, start, end)
+            if m:
+                return self._append_match(fmt_name, m, start, end, shift)
+        self._append(_UNKNOWN_LEVEL, NAT, 0, start + shift, end - start, start, end, shift)
+
+    def _append_match(self, fmt_name: str, m: re.Match[bytes], start: int, end: int, shift: int) -> None:
+        names = m.re.groupindex
+        ns = NAT
+        if "timestamp" in names:
+            stamp = m.group("timestamp")
+            if fmt_name == "iso8601":
+                ns = self._iso_ns(stamp)
+            else:
+                ns = self._cached(self._seconds, stamp, stamp)
+        level = _UNKNOWN_LEVEL
+        if "level" in names:
+            raw_level = m.group("level")
+            level = self._levels.get(raw_level)
+            if level is None:
+                level = _LEVEL_CODES[_parse_level(raw_level.decode("ascii") if raw_level else None)]
+                self._levels[raw_level] = level
+        message_start, message_end = start, end
+        if "message" in names and m.start("message") >= 0:
+            message_start, message_end = m.span("message")
+        self._append(
+            level,
+            ns,
+            _FORMAT_CODES[fmt_name],
+            start + shift,
+            end - start,
+            message_start,
+            message_end,
+            shift,
+        )
+
+    def _cached(self, cache: dict[bytes, int], key: bytes, stamp: bytes) -> int:
+        ns = cache.get(key)
+        if ns is None:
+            if len(cache) >= self.timestamps.cache_size:
+                cache.clear()
+            ns = cache[key] = epoch_ns(self.timestamps(stamp.decode("ascii")))
+        return ns
+
+    def _iso_ns(self, stamp: bytes) -> int:
+        # An ISO stamp is its whole seconds plus a fraction / UTC offset tail,
+        # and both parts convert independently, so each is cached on its own.
+        seconds = self._cached(self._seconds, stamp[:19], stamp[:19])
+        if len(stamp) == 19:
+            return seconds
+        tail = stamp[19:]
+        fraction = self._cached(self._fractions, tail, _ISO_EPOCH + tail)
+        if seconds == NAT or fraction == NAT:
+            return epoch_ns(self.timestamps(stamp.decode("ascii")))
+        ns = seconds + fraction
+        return ns if NAT < ns <= MAX_NS else NAT
+
+    def _append(
+        self,
+        level: int,
+        ns: int,
+        fmt_code: int,
+        raw_offset: int,
+        raw_length: int,
+        message_start: int,
+        message_end: int,
+        shift: int,
+    ) -> None:
+        levels, timestamps, formats, raw_offsets, raw_lengths, message_offsets, message_lengths, keys = (
+            self._columns
+        )
+        levels.append(level)
+        timestamps.append(ns)
+        formats.append(fmt_code)
+        raw_offsets.append(raw_offset)
+        raw_lengths.append(raw_length)
+        message_offsets.append(message_start + shift)
+        message_lengths.append(message_end - message_start)
+        key_end = min(message_end, message_start + _MESSAGE_KEY_LENGTH)
+        raw_key = self.buf[message_start:key_end].strip(_WHITESPACE)
+        code = self._key_codes.get(raw_key)
+        if code is None:
+            key = raw_key.decode("ascii")
+            code = self._key_codes[raw_key] = self._vocabulary.setdefault(key, len(self._vocabulary))
+        keys.append(code)
+
+    def _text_line(self, line: str, char_pos: int) -> int:
+        """Parse a decoded physical line starting at character *char_pos*."""
+        count = 0
+        for piece in line.rstrip("\n\r").split("\r"):
+            if piece.strip():
+                self._append_entry(piece, char_pos)
+                count += 1
+            char_pos += len(piece) + 1
+        return count
+
+    def _append_entry(self, line: str, raw_offset: int) -> None:
+        entry = parse_line(line, self.fmt, self.timestamps)
+        levels, timestamps, formats, raw_offsets, raw_lengths, message_offsets, message_lengths, keys = (
+            self._columns
+        )
+        raw, message = entry.raw, entry.message
+        message_offset = raw_offset + len(raw) - len(message)
+        if not raw.endswith(message):
+            self._extra.append((len(levels), message))
+        levels.append(_LEVEL_CODES[entry.level])
+        timestamps.append(epoch_ns(entry.timestamp))
+        formats.append(_FORMAT_CODES.get(entry.format, 0))
+        raw_offsets.append(raw_offset)
+        raw_lengths.append(len(raw))
+        message_offsets.append(message_offset)
+        message_lengths.append(len(message))
+        keys.append(self._vocabulary.setdefault(message_key(message), len(self._vocabulary)))
+
+
+def _sniff_file(path: str, fmt: str, sample_size: int) -> str | None:
+    """Resolve *fmt* for *path* exactly as :func:`~logsight.parser.parse_file` would."""
+    if fmt != "auto":
+        return _resolve_format(fmt, [])
+    with open_log(path) as fh:
+        head = list(itertools.islice((line for line in fh if line.strip()), sample_size))
+    return _resolve_format(fmt, head)
+
+
+def parse_range(
+    path: str,
+    start: int = 0,
+    end: int | None = None,
+    fmt: str | None = None,
+    timestamps: TimestampParser | None = None,
+) -> LogBatch:
+    """Parse the newline-aligned byte range ``[start, end)`` of *path* with the mmap reader.
+
+    *fmt* is an already-resolved format name (or ``None`` for per-line
+    detection), as :func:`~logsight.parallel.parse_file_parallel` hands to
+    its shards.
+    """
+    end = os.path.getsize(path) if end is None else end
+    if end <= start:
+        return LogBatch()
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        batch, _ = _RangeParser(buf, fmt, timestamps or TimestampParser()).parse(start, end)
+    return batch
+
+
+def iter_mmap_batches(
+    path: str,
+    fmt: str = "auto",
+    sample_size: int = SNIFF_SAMPLE_SIZE,
+    year: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[LogBatch]:
+    """Yield *path* as consecutive batches of at most *chunk_size* entries.
+
+    The streaming counterpart of :func:`parse_mmap`: feeding the batches to
+    :class:`~logsight.stream.IncrementalAnalyzer` gives the same result as
+    chunking :func:`~logsight.parser.parse_file` by *chunk_size*.
+    Compressed files cannot be mapped and are read through ``parse_file``.
+    """
+    if detect_compression(path):
+        for chunk in chunked(parse_file(path, fmt, sample_size, year), chunk_size):
+            yield LogBatch.from_entries(chunk)
+        return
+    locked = _sniff_file(path, fmt, sample_size)
+    size = os.path.getsize(path)
+    if not size:
+        return
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        parser = _RangeParser(buf, locked, TimestampParser(year=year))
+        pos = 0
+        while pos < size:
+            batch, pos = parser.parse(pos, size, limit=chunk_size)
+            if len(batch):
+                yield batch
+
+
+def parse_mmap(
+    path: str,
+    fmt: str = "auto",
+    sample_size: int = SNIFF_SAMPLE_SIZE,
+    year: int | None = None,
+) -> LogBatch:
+    """Parse *path* into a :class:`LogBatch` with the memory-mapped reader.
+
+    Equivalent to :meth:`LogBatch.from_file` with the same arguments.
+    Compressed files cannot be mapped and are read through ``parse_file``.
+    """
+    if detect_compression(path):
+        return LogBatch.from_entries(parse_file(path, fmt, sample_size, year))
+    locked = _sniff_file(path, fmt, sample_size)
+    return parse_range(path, fmt=locked, timestamps=TimestampParser(year=year))
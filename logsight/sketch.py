@@ -0,0 +1,213 @@
+"""Bounded-memory frequency sketches for high-cardinality message streams.
+
+All sketches implement the :class:`HeavyHitters` interface, so
+:func:`~logsight.analyzer.compute_stats` and
+:class:`~logsight.stream.IncrementalAnalyzer` can use whichever memory /
+accuracy trade-off suits the input.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+from collections import Counter
+from collections.abc import Iterable
+from typing import Protocol
+
+
+class HeavyHitters(Protocol):
+    """Interface shared by the frequency sketches in this module."""
+
+    total: int
+
+    def add(self, key: str, count: int = 1) -> None:
+        ...
+
+    def update(self, keys: Iterable[str]) -> None:
+        ...
+
+    def top(self, n: int = 10) -> list[tuple[str, int]]:
+        ...
+
+    @property
+    def error_bound(self) -> int:
+        ...
+
+
+class ExactCounter:
+    """Unbounded exact counts; the reference the sketches approximate."""
+
+    def __init__(self) -> None:
+        self.total = 0
+        self._counts: Counter[str] = Counter()
+
+    def add(self, key: str, count: int = 1) -> None:
+        self.total += count
+        self._counts[key] += count
+
+    def update(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def top(self, n: int = 10) -> list[tuple[str, int]]:
+        return self._counts.most_common(n)
+
+    @property
+    def error_bound(self) -> int:
+        return 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitters counter holding at most *capacity* keys.
+
+    When a new key arrives and the table is full, the key with the smallest
+    count is evicted and the newcomer inherits that count as its possible
+    overestimate.  Every reported count is therefore at most
+    :attr:`error_bound` above the true count, and any key occurring more
+    than ``total / capacity`` times is guaranteed to be present.
+
+    Parameters
+    ----------
+    capacity:
+        Maximum number of tracked keys.  Memory is O(capacity).
+    """
+
+    def __init__(self, capacity: int = 1000) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+        # One (count, key) entry per tracked key; counts may lag behind
+        # ``_counts`` and are refreshed lazily when popped.
+        self._heap: list[tuple[int, str]] = []
+
+    def add(self, key: str, count: int = 1) -> None:
+        self.total += count
+        counts = self._counts
+        if key in counts:
+            counts[key] += count
+            return
+        if len(counts) < self.capacity:
+            counts[key] = count
+            self._errors[key] = 0
+            heapq.heappush(self._heap, (count, key))
+            return
+
+        # Counts only grow, so stale heap entries are refreshed lazily.
+        floor, victim = self._heap[0]
+        while counts[victim] != floor:
+            heapq.heapreplace(self._heap, (counts[victim], victim))
+            floor, victim = self._heap[0]
+        heapq.heapreplace(self._heap, (floor + count, key))
+        del counts[victim]
+        del self._errors[victim]
+        counts[key] = floor + count
+        self._errors[key] = floor
+
+    def update(self, keys: Iterable[str]) -> None:
+        """Count every key in the iterable *keys*."""
+        for key in keys:
+            self.add(key)
+
+    def top(self, n: int = 10) -> list[tuple[str, int]]:
+        """The *n* highest (possibly overestimated) counts, most frequent first."""
+        return sorted(self._counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def error(self, key: str) -> int:
+        """Maximum overestimate of *key*'s reported count."""
+        return self._errors.get(key, 0)
+
+    @property
+    def error_bound(self) -> int:
+        """Maximum overestimate of any reported count."""
+        return max(self._errors.values(), default=0)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+class CountMinTopK:
+    """Count-Min sketch with a bounded candidate set for the top *k* keys.
+
+    Counts are estimated from a ``depth x width`` table of counters, so
+    memory is fixed regardless of cardinality.  Estimates never undercount;
+    with probability at least ``1 - exp(-depth)`` each overcounts by at most
+    ``e / width * total``, which is reported as :attr:`error_bound`.
+
+    Parameters
+    ----------
+    width, depth:
+        Table dimensions.  See :meth:`from_error` to derive them from a
+        target accuracy.
+    k:
+        Number of candidate heavy hitters to track.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4, k: int = 100) -> None:
+        if width <= 0 or depth <= 0 or k <= 0:
+            raise ValueError("width, depth and k must be positive")
+        self.width = width
+        self.depth = depth
+        self.k = k
+        self.total = 0
+        self._table = [[0] * width for _ in range(depth)]
+        self._candidates: dict[str, int] = {}
+        self._heap: list[tuple[int, str]] = []
+
+    @classmethod
+    def from_error(cls, epsilon: float, delta: float = 0.01, k: int = 100) -> CountMinTopK:
+        """Size the table so counts are within ``epsilon * total`` with probability ``1 - delta``."""
+        return cls(width=math.ceil(math.e / epsilon), depth=math.ceil(math.log(1 / delta)), k=k)
+
+    def _columns(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=4 * self.depth).digest()
+        return [int.from_bytes(digest[i : i + 4], "little") % self.width for i in range(0, len(digest), 4)]
+
+    def estimate(self, key: str) -> int:
+        return min(row[col] for row, col in zip(self._table, self._columns(key)))
+
+    def add(self, key: str, count: int = 1) -> None:
+        self.total += count
+        estimate = None
+        for row, col in zip(self._table, self._columns(key)):
+            row[col] += count
+            if estimate is None or row[col] < estimate:
+                estimate = row[col]
+
+        candidates = self._candidates
+        if key in candidates:
+            candidates[key] = estimate
+            return
+        if len(candidates) < self.k:
+            candidates[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+            return
+        # Estimates only grow, so stale heap entries are refreshed lazily.
+        floor, victim = self._heap[0]
+        while candidates[victim] != floor:
+            heapq.heapreplace(self._heap, (candidates[victim], victim))
+            floor, victim = self._heap[0]
+        if estimate > floor:
+            heapq.heapreplace(self._heap, (estimate, key))
+            del candidates[victim]
+            candidates[key] = estimate
+
+    def update(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def top(self, n: int = 10) -> list[tuple[str, int]]:
+        return sorted(self._candidates.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    @property
+    def error_bound(self) -> int:
+        return math.ceil(math.e / self.width * self.total)
+
+    def __len__(self) -> int:
+        return len(self._candidates)
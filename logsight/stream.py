@@ -0,0 +1,276 @@
+"""Incremental analysis of unbounded log streams in constant memory."""
+
+from __future__ import annotations
+
+import itertools
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+
+from logsight.analyzer import (
+    AnomalyReport,
+    Entries,
+    WindowStats,
+    _error_mask,
+    _message_lengths,
+    _template_ids,
+)
+from logsight.batch import LogBatch, message_key
+from logsight.parser import LogEntry, LogLevel
+from logsight.sketch import HeavyHitters, SpaceSaving
+from logsight.templates import TemplateMiner
+
+_LEVEL_VALUES = [level.value for level in LogLevel]
+
+#: Entries handed to :meth:`IncrementalAnalyzer.update` at a time by :func:`analyze_stream`.
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+class IncrementalAnalyzer:
+    """Analyze log entries chunk by chunk, keeping only bounded state.
+
+    Memory does not grow with the number of entries seen: message lengths
+    are summarised by a running mean / variance (Welford, merged per chunk),
+    levels by a counter, messages by a :class:`~logsight.sketch.SpaceSaving`
+    sketch, and spike detection only keeps the last ``window_size`` error
+    flags.  Call :meth:`snapshot` at any time for an :class:`AnomalyReport`.
+
+    Z-scores are computed against the statistics of everything seen so far,
+    including the current chunk, so early entries are judged on less data
+    than :func:`~logsight.analyzer.detect_anomalies` would use.  Spike ranges
+    match :func:`~logsight.analyzer.error_rate_spike` with ``merge=True``
+    exactly.
+
+    Parameters
+    ----------
+    zscore_threshold, flag_errors:
+        As for :func:`~logsight.analyzer.detect_anomalies`.
+    window_size, spike_threshold, stride:
+        As for :func:`~logsight.analyzer.error_rate_spike`.
+    top_capacity:
+        Number of counters in the default message sketch.
+    heavy_hitters:
+        Sketch used for ``top_messages`` instead of a
+        ``SpaceSaving(top_capacity)``; any :class:`~logsight.sketch.HeavyHitters`.
+    templates:
+        Optional :class:`~logsight.templates.TemplateMiner`; ``top_messages``
+        are then counted per template, exactly, instead of via the sketch.
+    max_anomalies, max_spikes:
+        How many of the most recent anomalies and spike ranges to retain.
+    """
+
+    def __init__(
+        self,
+        zscore_threshold: float = 2.5,
+        flag_errors: bool = True,
+        window_size: int = 100,
+        spike_threshold: float = 0.25,
+        stride: int = 1,
+        top_capacity: int = 1000,
+        max_anomalies: int = 1000,
+        max_spikes: int = 1000,
+        heavy_hitters: HeavyHitters | None = None,
+        templates: TemplateMiner | None = None,
+    ) -> None:
+        if window_size <= 0 or stride <= 0:
+            raise ValueError("window_size and stride must be positive")
+        self.zscore_threshold = zscore_threshold
+        self.flag_errors = flag_errors
+        self.window_size = window_size
+        self.spike_threshold = spike_threshold
+        self.stride = stride
+
+        self.count = 0
+        self.error_count = 0
+        self.warning_count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._levels: Counter[str] = Counter()
+        self._messages = SpaceSaving(top_capacity) if heavy_hitters is None else heavy_hitters
+        self._templates = templates
+        self._template_counts: Counter[int] = Counter()
+
+        self._anomalies: deque[tuple[int, LogEntry]] = deque(maxlen=max_anomalies)
+        self._tail = np.zeros(0, dtype=bool)  # last window_size - 1 error flags
+        self._spikes: deque[tuple[int, int, float]] = deque(maxlen=max_spikes)
+        self._open_spike: tuple[int, int, float] | None = None
+
+    # ------------------------------------------------------------------
+    # Running statistics
+    # ------------------------------------------------------------------
+
+    @property
+    def mean(self) -> float:
+        """Mean message length of all entries seen."""
+        return self._mean
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation of message length of all entries seen."""
+        return float(np.sqrt(self._m2 / self.count)) if self.count else 0.0
+
+    @property
+    def stats(self) -> WindowStats:
+        if self._templates is not None:
+            return WindowStats(
+                total=self.count,
+                error_count=self.error_count,
+                warning_count=self.warning_count,
+                level_counts=dict(self._levels),
+                top_messages=[
+                    (self._templates.template(template_id), count)
+                    for template_id, count in self._template_counts.most_common(10)
+                ],
+            )
+        return WindowStats(
+            total=self.count,
+            error_count=self.error_count,
+            warning_count=self.warning_count,
+            level_counts=dict(self._levels),
+            top_messages=self._messages.top(10),
+            top_messages_error=self._messages.error_bound,
+        )
+
+    @property
+    def spikes(self) -> list[tuple[int, int, float]]:
+        """Merged ``(start, end, peak_rate)`` spike ranges, including one still open."""
+        ranges = list(self._spikes)
+        if self._open_spike is not None:
+            ranges.append(self._open_spike)
+        return ranges
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+
+    def update(self, entries: Entries) -> list[LogEntry]:
+        """Fold a chunk of entries into the running state.
+
+        Returns the entries of this chunk that were flagged as anomalous.
+        """
+        n = len(entries)
+        if not n:
+            return []
+        offset = self.count
+        lengths = _message_lengths(entries)
+        errors = _error_mask(entries)
+
+        self._update_moments(lengths)
+        self._update_counts(entries, errors)
+
+        mask = errors.copy() if self.flag_errors else np.zeros(n, dtype=bool)
+        std = self.std
+        if std > 0:
+            mask |= np.abs(lengths - self._mean) / std > self.zscore_threshold
+        hits = np.flatnonzero(mask).tolist()
+        flagged = [entries[i] for i in hits]
+        self._anomalies.extend(zip((offset + i for i in hits), flagged))
+
+        self._update_spikes(errors, offset)
+        return flagged
+
+    def _update_moments(self, lengths: np.ndarray) -> None:
+        # Chan et al.'s pairwise combination of (count, mean, M2).
+        n_a, n_b = self.count, len(lengths)
+        mean_b = float(lengths.mean())
+        m2_b = float(((lengths - mean_b) ** 2).sum())
+        total = n_a + n_b
+        delta = mean_b - self._mean
+        self._mean += delta * n_b / total
+        self._m2 += m2_b + delta * delta * n_a * n_b / total
+        self.count = total
+
+    def _update_counts(self, entries: Entries, errors: np.ndarray) -> None:
+        if self._templates is not None:
+            if isinstance(entries, LogBatch):
+                self._levels.update(_LEVEL_VALUES[code] for code in entries.levels.tolist())
+            else:
+                self._levels.update(entry.level.value for entry in entries)
+            ids = _template_ids(entries, self._templates)
+            self._template_counts.update(ids[ids >= 0].tolist())
+        elif isinstance(entries, LogBatch):
+            for entry_level in entries.levels.tolist():
+                self._levels[_LEVEL_VALUES[entry_level]] += 1
+            keys = entries.message_keys.tolist()
+            vocabulary = entries.vocabulary
+            for code in keys:
+                if vocabulary[code]:
+                    self._messages.add(vocabulary[code])
+        else:
+            for entry in entries:
+                self._levels[entry.level.value] += 1
+                key = message_key(entry.message)
+                if key:
+                    self._messages.add(key)
+        self.error_count += int(errors.sum())
+        self.warning_count = self._levels.get(LogLevel.WARNING.value, 0)
+
+    def _update_spikes(self, errors: np.ndarray, offset: int) -> None:
+        w = self.window_size
+        flags = np.concatenate((self._tail, errors))
+        base = offset - len(self._tail)  # stream position of flags[0]
+        self._tail = flags[max(0, len(flags) - (w - 1)) :] if w > 1 else flags[:0]
+        if len(flags) < w:
+            return
+
+        cumulative = np.concatenate(([0], np.cumsum(flags, dtype=np.int64)))
+        rates = (cumulative[w:] - cumulative[:-w]) / w
+        hit = rates >= self.spike_threshold
+        if self.stride > 1:
+            hit &= (base + np.arange(len(rates))) % self.stride == 0
+        for i in np.flatnonzero(hit).tolist():
+            start, rate = base + i, float(rates[i])
+            current = self._open_spike
+            if current is not None and start <= current[1]:
+                self._open_spike = (current[0], start + w, max(current[2], rate))
+            else:
+                if current is not None:
+                    self._spikes.append(current)
+                self._open_spike = (start, start + w, rate)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> AnomalyReport:
+        """Report on everything seen so far, with the most recent anomalies."""
+        return AnomalyReport(
+            anomalies=[entry for _, entry in self._anomalies],
+            stats=self.stats,
+            zscore_threshold=self.zscore_threshold,
+            indices=np.array([pos for pos, _ in self._anomalies], dtype=np.intp),
+        )
+
+
+def chunked(entries: Iterable[LogEntry], size: int = DEFAULT_CHUNK_SIZE) -> Iterator[list[LogEntry]]:
+    """Split *entries* into lists of at most *size* entries."""
+    it = iter(entries)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
+
+
+def analyze_stream(
+    entries: Iterable[LogEntry],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **options,
+) -> IncrementalAnalyzer:
+    """Feed *entries* through an :class:`IncrementalAnalyzer` one chunk at a time.
+
+    *options* are passed to the :class:`IncrementalAnalyzer` constructor.
+    """
+    analyzer = IncrementalAnalyzer(**options)
+    for chunk in chunked(entries, chunk_size):
+        analyzer.update(chunk)
+    return analyzer
+
+
+def analyze_batches(batches: Iterable[LogBatch], **options) -> IncrementalAnalyzer:
+    """Feed already-chunked *batches*, such as :func:`~logsight.reader.iter_mmap_batches`.
+
+    *options* are passed to the :class:`IncrementalAnalyzer` constructor.
+    """
+    analyzer = IncrementalAnalyzer(**options)
+    for batch in batches:
+        analyzer.update(batch)
+    return analyzer
@@ -0,0 +1,139 @@
+"""Streaming log-template mining.
+
+:class:`TemplateMiner` groups messages that differ only in their variable
+parts ("timeout after 5001ms" / "timeout after 5002ms") under one template
+with the parameters masked as ``<*>``.  It follows the Drain algorithm: a
+fixed-depth prefix tree keyed on token count and the leading tokens routes
+each message to a small group of candidate templates, and the most similar
+candidate absorbs it if it is similar enough.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import numpy as np
+
+#: Placeholder for a masked parameter in a template.
+WILDCARD = "<*>"
+
+
+def _tokenize(message: str) -> list[str]:
+    # Tokens containing digits are almost always variables (ids, durations,
+    # addresses); masking them up front keeps them out of the tree.
+    return [WILDCARD if any(c.isdigit() for c in token) else token for token in message.split()]
+
+
+class _Cluster:
+    __slots__ = ("id", "tokens")
+
+    def __init__(self, id: int, tokens: list[str]) -> None:
+        self.id = id
+        self.tokens = tokens
+
+    def similarity(self, tokens: list[str]) -> tuple[float, int]:
+        same = wildcards = 0
+        for mine, theirs in zip(self.tokens, tokens):
+            # Parameters masked in both count as a match: they are the same slot.
+            if mine == theirs:
+                same += 1
+            if mine == WILDCARD:
+                wildcards += 1
+        return same / len(tokens), wildcards
+
+    def merge(self, tokens: list[str]) -> None:
+        self.tokens = [mine if mine == theirs else WILDCARD for mine, theirs in zip(self.tokens, tokens)]
+
+
+class TemplateMiner:
+    """Map messages to integer template IDs with a Drain-style prefix tree.
+
+    Template IDs are assigned in first-seen order and never change; the text
+    of a template may become more general as later messages are merged into
+    it.
+
+    Parameters
+    ----------
+    depth:
+        Depth of the prefix tree, counting the root and the token-count
+        layer, so the first ``depth - 2`` tokens route a message.  Lookups
+        cost O(depth) plus a scan of one leaf.
+    similarity:
+        Fraction of matching tokens required to merge a message into an
+        existing template.  Defaults to ``0.5``.
+    max_children:
+        Maximum number of distinct tokens per tree node; further tokens are
+        routed to a shared ``<*>`` child.
+    cache_size:
+        Maximum number of cached message → ID lookups; the cache is cleared
+        when it fills up.
+    """
+
+    def __init__(
+        self,
+        depth: int = 4,
+        similarity: float = 0.5,
+        max_children: int = 100,
+        cache_size: int = 65536,
+    ) -> None:
+        if depth < 3:
+            raise ValueError("depth must be at least 3")
+        if not 0.0 <= similarity <= 1.0:
+            raise ValueError("similarity must be between 0 and 1")
+        self.depth = depth
+        self.similarity = similarity
+        self.max_children = max_children
+        self.cache_size = cache_size
+        self._root: dict[int, dict] = {}
+        self._clusters: list[_Cluster] = []
+        self._cache: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    @property
+    def templates(self) -> list[str]:
+        """Current text of every template, indexed by template ID."""
+        return [" ".join(cluster.tokens) for cluster in self._clusters]
+
+    def template(self, template_id: int) -> str:
+        """Current text of template *template_id*."""
+        return " ".join(self._clusters[template_id].tokens)
+
+    def add(self, message: str) -> int:
+        """Return the template ID for *message*, creating or widening a template."""
+        template_id = self._cache.get(message)
+        if template_id is not None:
+            return template_id
+
+        tokens = _tokenize(message)
+        leaf = self._leaf(tokens)
+        best = None
+        best_score = (-1.0, -1)
+        for cluster in leaf:
+            score = cluster.similarity(tokens) if tokens else (1.0, 0)
+            if score > best_score:
+                best, best_score = cluster, score
+        if best is not None and best_score[0] >= self.similarity:
+            best.merge(tokens)
+        else:
+            best = _Cluster(len(self._clusters), tokens)
+            self._clusters.append(best)
+            leaf.append(best)
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[message] = best.id
+        return best.id
+
+    def add_all(self, messages: Iterable[str]) -> np.ndarray:
+        """Template IDs for each of *messages* as an ``int32`` array."""
+        return np.fromiter(map(self.add, messages), dtype=np.int32)
+
+    def _leaf(self, tokens: list[str]) -> list[_Cluster]:
+        node = self._root.setdefault(len(tokens), {})
+        for token in tokens[: self.depth - 2]:
+            if token not in node and len(node) >= self.max_children:
+                token = WILDCARD
+            node = node.setdefault(token, {})
+        return node.setdefault(None, [])
@@ -2,13 +2,20 @@
 
 from __future__ import annotations
 
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
 from logsight.analyzer import (
     AnomalyReport,
     compute_stats,
     detect_anomalies,
+    error_rate_by_time,
     error_rate_spike,
 )
-from logsight.parser import LogEntry, LogLevel, parse_line
+from logsight.batch import LogBatch
+from logsight.parser import LogEntry, LogLevel, parse_line, parse_lines
 
 
 def _entry(level: str, message: str) -> LogEntry:
@@ -89,6 +96,21 @@ class TestDetectAnomalies:
         report = detect_anomalies([_entry("INFO", "hello")])
         assert isinstance(report, AnomalyReport)
 
+    def test_indices_match_anomalies(self):
+        entries = [_entry("INFO", "normal log line") for _ in range(50)]
+        entries[7] = _entry("ERROR", "boom")
+        entries[30] = parse_line("INFO " + "x" * 500)
+        report = detect_anomalies(entries, zscore_threshold=2.0)
+        assert report.indices.tolist() == [7, 30]
+        assert report.anomalies == [entries[7], entries[30]]
+
+    def test_return_indices_only(self):
+        entries = [_entry("INFO", "ok"), _entry("ERROR", "boom")]
+        report = detect_anomalies(entries, return_indices=True)
+        assert report.anomalies == []
+        assert report.indices.tolist() == [1]
+        assert report.has_anomalies
+
 
 class TestErrorRateSpike:
     def test_no_spike(self):
@@ -110,3 +132,106 @@ class TestErrorRateSpike:
         entries = [_entry("ERROR", "fail")] * 50
         spikes = error_rate_spike(entries, window_size=100, spike_threshold=0.25)
         assert spikes == []
+
+    def test_sliding_catches_straddling_spike(self):
+        # 60 errors split across the boundary of two stride-100 windows.
+        entries = [_entry("INFO", "ok")] * 70 + [_entry("ERROR", "fail")] * 60 + [_entry("INFO", "ok")] * 70
+        assert error_rate_spike(entries, window_size=100, spike_threshold=0.5, stride=100) == []
+        spikes = error_rate_spike(entries, window_size=100, spike_threshold=0.5)
+        assert spikes == list(range(20, 81))
+
+    def test_stride_equal_to_window_is_non_overlapping(self):
+        entries = [_entry("ERROR", "fail")] * 100 + [_entry("INFO", "ok")] * 100
+        assert error_rate_spike(entries, window_size=100, stride=100) == [0]
+
+    def test_merge_ranges(self):
+        entries = [
+            *[_entry("ERROR", "fail")] * 20,
+            *[_entry("INFO", "ok")] * 50,
+            *[_entry("ERROR", "fail")] * 10,
+            *[_entry("INFO", "ok")] * 20,
+        ]
+        ranges = error_rate_spike(entries, window_size=10, spike_threshold=0.5, merge=True)
+        assert ranges == [(0, 25, 1.0), (65, 85, 1.0)]
+
+    def test_merge_touching_windows(self):
+        entries = [_entry("ERROR", "fail")] * 20 + [_entry("INFO", "ok")] * 10
+        ranges = error_rate_spike(entries, window_size=10, stride=10, merge=True)
+        assert ranges == [(0, 20, 1.0)]
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            error_rate_spike([], window_size=0)
+        with pytest.raises(ValueError):
+            error_rate_spike([], stride=0)
+
+
+def _stamped(second: int, level: str, message: str = "msg") -> str:
+    return f"2024-01-01T00:{second // 60:02d}:{second % 60:02d} {level} {message}"
+
+
+class TestErrorRateByTime:
+    LINES = [
+        *(_stamped(s, "ERROR") for s in range(0, 30)),
+        *(_stamped(s, "INFO") for s in range(60, 120, 2)),
+        *(_stamped(s, "INFO") for s in range(180, 240, 10)),
+    ]
+
+    def test_fixed_buckets(self):
+        report = error_rate_by_time(parse_lines(self.LINES), window="60s")
+        # The empty third minute is not reported
+        assert report.totals.tolist() == [30, 30, 6]
+        assert report.errors.tolist() == [30, 0, 0]
+        assert report.spikes.tolist() == [0]
+        assert str(report.starts[1]) == "2024-01-01T00:01:00.000000000"
+        assert str(report.starts[2]) == "2024-01-01T00:03:00.000000000"
+
+    def test_sliding_buckets(self):
+        report = error_rate_by_time(parse_lines(self.LINES), window="60s", stride="30s")
+        # The first bucket starts before the first entry but still contains it
+        assert str(report.starts[0]) == "2023-12-31T23:59:30.000000000"
+        assert report.totals[:4].tolist() == [30, 30, 15, 30]
+        assert report.errors[:4].tolist() == [30, 30, 0, 0]
+
+    def test_outlier_timestamp_does_not_grow_buckets(self):
+        lines = [_stamped(s, "INFO") for s in range(5)] + ["1970-01-01T00:00:00Z ERROR clock reset"]
+        report = error_rate_by_time(parse_lines(lines), window="1s", stride="100ms")
+        assert len(report.starts) == 60  # ten sliding buckets per entry
+        assert report.totals.sum() == 60
+        assert str(report.starts[0]) == "1969-12-31T23:59:59.100000000"
+
+    def test_dense_entries_with_long_window(self):
+        # Every entry's buckets overlap its neighbours', so each start is built once
+        lines = [_stamped(s, "INFO") for s in range(0, 3600, 2)]
+        report = error_rate_by_time(parse_lines(lines), window="30m", stride="100ms")
+        assert len(report.starts) == 17999 + 35981  # lead-in before the first entry, then one per slot
+        assert len(np.unique(report.starts)) == len(report.starts)
+        assert report.totals.max() == 900
+
+    def test_batch_matches_entries(self):
+        entries = parse_lines(self.LINES)
+        by_entries = error_rate_by_time(entries, window="1m", stride=30)
+        by_batch = error_rate_by_time(LogBatch.from_entries(entries), window="1m", stride=30)
+        assert by_batch.totals.tolist() == by_entries.totals.tolist()
+        assert by_batch.errors.tolist() == by_entries.errors.tolist()
+
+    def test_missing_timestamps_carry_forward(self):
+        lines = ["ERROR before any stamp", _stamped(5, "INFO"), "ERROR no stamp", _stamped(70, "INFO")]
+        report = error_rate_by_time(parse_lines(lines), window="60s", spike_threshold=0.5)
+        assert report.totals.tolist() == [3, 1]
+        assert report.errors.tolist() == [2, 0]
+        assert report.spikes.tolist() == [0]
+
+    def test_no_timestamps(self):
+        report = error_rate_by_time([_entry("ERROR", "x")])
+        assert len(report.starts) == 0
+        assert len(report.spikes) == 0
+
+    def test_invalid_window(self):
+        with pytest.raises(ValueError):
+            error_rate_by_time([], window="soon")
+        with pytest.raises(ValueError):
+            error_rate_by_time([], window="0s")
+        for window in ("infs", "nans", timedelta(days=999_999_999), 1e300):
+            with pytest.raises(ValueError):
+                error_rate_by_time([], window=window)
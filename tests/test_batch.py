@@ -0,0 +1,108 @@
+"""Tests for logsight.batch."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from logsight.analyzer import compute_stats, detect_anomalies, error_rate_spike
+from logsight.batch import NAT, LogBatch, epoch_ns
+from logsight.parser import LogEntry, LogLevel, parse_lines
+
+LINES = [
+    "2024-01-15T12:34:56 INFO [app] Server started",
+    "2024-01-15T12:34:57.250Z ERROR [db] connection lost",
+    "Jan 15 12:34:58 myhost myapp: Something happened",
+    '192.168.1.1 - frank [10/Oct/2000:13:55:36 -0700] "GET / HTTP/1.0" 500 12',
+    "WARNING disk full",
+    "INFO repeated",
+    "INFO repeated",
+    "CRITICAL " + "x" * 400,
+    "no level at all",
+]
+
+
+def _batch() -> LogBatch:
+    return LogBatch.from_lines(LINES, year=2024)
+
+
+class TestLogBatch:
+    def test_columns(self):
+        batch = _batch()
+        assert len(batch) == len(LINES)
+        assert batch.levels.dtype == np.uint8
+        assert batch.timestamps.dtype == np.int64
+        assert batch.message_lengths.dtype == np.int32
+        assert batch.timestamps[3] == NAT
+        assert batch.error_mask.tolist() == [False, True, False, False, False, False, False, True, False]
+
+    def test_out_of_range_timestamps_are_nat(self):
+        assert epoch_ns(datetime(3000, 1, 1)) == NAT
+        assert epoch_ns(datetime(1600, 1, 1)) == NAT
+        assert epoch_ns(datetime(1, 1, 1, tzinfo=timezone(timedelta(hours=1)))) == NAT
+        batch = LogBatch.from_lines(["3000-01-01T00:00:00 INFO hi", "2024-01-01T00:00:00 INFO ok"])
+        assert batch.timestamps[0] == NAT
+        assert batch[0].timestamp is None and batch[1].timestamp == datetime(2024, 1, 1)
+
+    def test_row_views_match_parser(self):
+        batch = _batch()
+        for view, entry in zip(batch, parse_lines(LINES, year=2024)):
+            assert view.raw == entry.raw
+            assert view.format == entry.format
+            assert view.level == entry.level
+            assert view.message == entry.message
+            assert view.extra == entry.extra
+
+    def test_timestamps_are_naive_utc(self):
+        batch = _batch()
+        assert batch[1].timestamp == datetime(2024, 1, 15, 12, 34, 57, 250000)
+        assert batch[2].timestamp == datetime(2024, 1, 15, 12, 34, 58)
+        assert batch[3].timestamp is None
+
+    def test_message_not_in_raw(self):
+        batch = LogBatch.from_entries([LogEntry(raw="raw line", message="other", level=LogLevel.INFO)])
+        assert batch[0].raw == "raw line"
+        assert batch[0].message == "other"
+
+    def test_take_and_slice(self):
+        batch = _batch()
+        subset = batch.take([1, 7])
+        assert [e.level for e in subset] == [LogLevel.ERROR, LogLevel.CRITICAL]
+        assert len(batch[2:4]) == 2
+        assert batch[-1].message == "no level at all"
+
+    def test_from_file(self, tmp_path):
+        f = tmp_path / "app.log"
+        f.write_text("\n".join(LINES) + "\n")
+        batch = LogBatch.from_file(str(f), year=2024)
+        assert [e.raw for e in batch] == LINES
+
+    def test_empty(self):
+        batch = LogBatch.from_lines([])
+        assert len(batch) == 0
+        assert compute_stats(batch).total == 0
+        assert not detect_anomalies(batch).has_anomalies
+        assert error_rate_spike(batch) == []
+
+
+class TestAnalyzersAcceptBatch:
+    def test_compute_stats_matches_entries(self):
+        entries = parse_lines(LINES, year=2024)
+        assert compute_stats(_batch()) == compute_stats(entries)
+
+    def test_detect_anomalies_matches_entries(self):
+        entries = parse_lines(LINES, year=2024)
+        expected = detect_anomalies(entries, zscore_threshold=1.5)
+        report = detect_anomalies(_batch(), zscore_threshold=1.5)
+        assert [e.raw for e in report.anomalies] == [e.raw for e in expected.anomalies]
+        assert report.stats == expected.stats
+
+    def test_error_rate_spike_matches_entries(self):
+        lines = ["ERROR fail"] * 30 + ["INFO ok"] * 70 + ["ERROR fail"] * 50
+        entries = parse_lines(lines)
+        batch = LogBatch.from_lines(lines)
+        for window in (10, 25, 50):
+            assert error_rate_spike(batch, window_size=window) == error_rate_spike(
+                entries, window_size=window
+            )
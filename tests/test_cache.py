@@ -0,0 +1,92 @@
+"""Tests for agents.cache."""
+
+from __future__ import annotations
+
+import pytest
+
+from agents.cache import LRUCache, ResponseCache, SQLiteCache, cache_key
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCacheKey:
+    def test_whitespace_normalized(self):
+        assert cache_key("m", "sys", "line one  \r\nline two\n") == cache_key("m", "sys", "line one\nline two")
+
+    def test_parts_are_distinct(self):
+        assert cache_key("m", "sys", "prompt") != cache_key("m", "sys2", "prompt")
+        assert cache_key("m", "sys", "prompt") != cache_key("m2", "sys", "prompt")
+        assert cache_key("m", "ab", "c") != cache_key("m", "a", "bc")
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2, ttl=None)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        assert cache.get("a") == "1"
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert len(cache) == 2
+
+    def test_ttl_expires(self):
+        clock = FakeClock()
+        cache = LRUCache(ttl=10, clock=clock)
+        cache.set("a", "1")
+        clock.now += 9.9
+        assert cache.get("a") == "1"
+        clock.now += 0.1
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_invalid_maxsize(self):
+        with pytest.raises(ValueError):
+            LRUCache(maxsize=0)
+
+
+class TestSQLiteCache:
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        SQLiteCache(path).set("k", "reply")
+        assert SQLiteCache(path).get("k") == "reply"
+
+    def test_ttl_expires(self, tmp_path):
+        clock = FakeClock()
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=5, clock=clock)
+        cache.set("k", "reply")
+        clock.now += 5
+        assert cache.get("k") is None
+        clock.now -= 5
+        assert cache.get("k") is None  # the expired row was deleted
+
+
+class TestResponseCache:
+    def test_counters(self):
+        cache = ResponseCache()
+        assert cache.get("k") is None
+        cache.set("k", "v")
+        assert cache.get("k") == "v"
+        assert cache.stats() == {"hits": 1, "memory_hits": 1, "disk_hits": 0, "misses": 1}
+
+    def test_disk_hits_promoted(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        ResponseCache(disk_path=path).set("k", "v")
+        cache = ResponseCache(disk_path=path)
+        assert cache.get("k") == "v"
+        assert cache.get("k") == "v"
+        assert cache.stats() == {"hits": 2, "memory_hits": 1, "disk_hits": 1, "misses": 0}
+
+    def test_delete_evicts_both_tiers(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        cache = ResponseCache(disk_path=path)
+        cache.set("k", "v")
+        cache.delete("k")
+        assert cache.get("k") is None
+        assert ResponseCache(disk_path=path).get("k") is None
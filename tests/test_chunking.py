@@ -0,0 +1,55 @@
+"""Tests for agents.chunking."""
+
+from __future__ import annotations
+
+import pytest
+
+from agents.chunking import chunk_records
+
+
+def _records(n, services=("api", "db")):
+    return [
+        {"timestamp": f"2024-01-15T10:00:{i:02d}", "level": "INFO", "service": services[i % len(services)], "message": f"m{i}"}
+        for i in range(n)
+    ]
+
+
+class TestChunkRecords:
+    def test_time_chunks_are_consecutive(self):
+        chunks = chunk_records(_records(25), chunk_size=10)
+        assert [len(c.records) for c in chunks] == [10, 10, 5]
+        assert [r for c in chunks for r in c.records] == _records(25)
+        assert chunks[0].label == "2024-01-15T10:00:00 to 2024-01-15T10:00:09"
+
+    def test_time_label_without_timestamps(self):
+        records = [{"message": "x"}] * 4
+        assert chunk_records(records, chunk_size=3)[1].label == "records 4-4"
+
+    def test_service_chunks(self):
+        chunks = chunk_records(_records(30), chunk_size=10, by="service")
+        assert [c.label for c in chunks] == [
+            "service api (part 1 of 2)",
+            "service api (part 2 of 2)",
+            "service db (part 1 of 2)",
+            "service db (part 2 of 2)",
+        ]
+        assert all(r["service"] == "db" for r in chunks[2].records)
+        assert sum(len(c.records) for c in chunks) == 30
+
+    def test_single_service_part(self):
+        chunks = chunk_records(_records(4, services=(None,)), by="service")
+        assert [c.label for c in chunks] == ["service unknown"]
+
+    def test_unhashable_services(self):
+        records = _records(4, services=(["api"], {"name": "db"}))
+        chunks = chunk_records(records, by="service")
+        assert [c.label for c in chunks] == ["service ['api']", "service {'name': 'db'}"]
+
+    def test_empty(self):
+        assert chunk_records([]) == []
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            chunk_records(_records(3), by="host")
+        with pytest.raises(ValueError):
+            chunk_records(_records(3), chunk_size=0)
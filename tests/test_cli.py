@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import gzip
+
+import pytest
 from click.testing import CliRunner
 
 from logsight.cli import main
@@ -22,3 +25,175 @@ class TestHealthCommand:
         runner = CliRunner()
         result = runner.invoke(main, ["health"])
         assert "version" in result.output.lower()
+
+
+class TestAnalyzeCommand:
+    def test_format_option(self, tmp_path):
+        f = tmp_path / "app.log"
+        f.write_text("INFO started\nERROR failed\n")
+        runner = CliRunner()
+        result = runner.invoke(main, ["analyze", str(f), "--format", "generic"])
+        assert result.exit_code == 0
+        assert "Total entries : 2" in result.output
+
+    def test_invalid_format_rejected(self, tmp_path):
+        f = tmp_path / "app.log"
+        f.write_text("INFO started\n")
+        runner = CliRunner()
+        result = runner.invoke(main, ["analyze", str(f), "--format", "json"])
+        assert result.exit_code != 0
+
+    def test_spike_ranges_reported(self, tmp_path):
+        f = tmp_path / "app.log"
+        f.write_text("ERROR failed\n" * 10 + "INFO ok\n" * 10)
+        runner = CliRunner()
+        result = runner.invoke(main, ["analyze", str(f), "--window", "5", "--stride", "5"])
+        assert result.exit_code == 0
+        assert "0–9" in result.output
+
+    def test_time_window(self, tmp_path):
+        f = tmp_path / "app.log"
+        f.write_text(
+            "2024-01-01T00:00:01 ERROR failed\n"
+            "2024-01-01T00:00:02 ERROR failed\n"
+            "2024-01-01T00:05:00 INFO ok\n"
+        )
+        runner = CliRunner()
+        result = runner.invoke(main, ["analyze", str(f), "--time-window", "60s"])
+        assert result.exit_code == 0
+        assert "2024-01-01 00:00:00" in result.output
+        assert "2/2 errors" in result.output
+
+    def test_invalid_time_window(self, tmp_path):
+        f = tmp_path / "app.log"
+        f.write_text("2024-01-01T00:00:01 INFO ok\n")
+        runner = CliRunner()
+        result = runner.invoke(main, ["analyze", str(f), "--time-window", "soon"])
+        assert result.exit_code != 0
+
+    def test_stream_mode(self, tmp_path):
+        f = tmp_path / "app.log"
+        f.write_text("ERROR failed\n" * 10 + "INFO ok\n" * 10)
+        runner = CliRunner()
+        result = runner.invoke(main, ["analyze", str(f), "--stream", "--window", "5"])
+        assert result.exit_code == 0
+        assert "Total entries : 20" in result.output
+        assert "0–12" in result.output
+
+    @pytest.mark.parametrize("extra", [[], ["--stream"]])
+    def test_read_error_reported(self, tmp_path, monkeypatch, extra):
+        f = tmp_path / "app.log"
+        f.write_text("INFO ok\n")
+
+        def unreadable(*args, **kwargs):
+            raise OSError("disk gone")
+
+        monkeypatch.setattr("logsight.cli.analyze_stream", unreadable)
+        monkeypatch.setattr("logsight.cli.LogBatch.from_files", unreadable)
+        result = CliRunner().invoke(main, ["analyze", str(f), *extra])
+        assert result.exit_code == 1
+        assert "Error reading file: disk gone" in result.output
+
+    @pytest.mark.parametrize("extra", [[], ["--stream"], ["--reader", "mmap"]])
+    def test_truncated_gzip_reported(self, tmp_path, extra):
+        f = tmp_path / "app.log.gz"
+        f.write_bytes(gzip.compress(b"ERROR bad\n" * 10000)[:100])
+        result = CliRunner().invoke(main, ["analyze", str(f), *extra])
+        assert result.exit_code == 1
+        assert "Error reading file:" in result.output
+        assert "truncated or corrupt" in result.output
+
+    @pytest.mark.parametrize("extra", [[], ["--stream"], ["--reader", "mmap"], ["--time-window", "60s"]])
+    def test_out_of_range_timestamp(self, tmp_path, extra):
+        f = tmp_path / "app.log"
+        f.write_text("3000-01-01T00:00:00 INFO hi\n1600-01-01T00:00:00.5+01:00 ERROR old\n")
+        result = CliRunner().invoke(main, ["analyze", str(f), *extra])
+        assert result.exit_code == 0, result.output
+        assert "Total entries : 2" in result.output
+
+    def test_templates_groups_messages(self, tmp_path):
+        f = tmp_path / "app.log"
+        f.write_text("".join(f"ERROR timeout after {5000 + i}ms\n" for i in range(5)))
+        runner = CliRunner()
+        result = runner.invoke(main, ["analyze", str(f), "--templates", "--no-anomalies"])
+        assert result.exit_code == 0
+        assert "timeout after <*>" in result.output
+
+    def test_workers_match_serial(self, tmp_path):
+        f = tmp_path / "app.log"
+        f.write_text("".join(f"{'ERROR' if i % 3 else 'INFO'} event {i}\n" for i in range(300)))
+        runner = CliRunner()
+        serial = runner.invoke(main, ["analyze", str(f)])
+        parallel = runner.invoke(main, ["analyze", str(f), "--workers", "2"])
+        assert parallel.exit_code == 0
+        assert parallel.output == serial.output
+
+    def test_workers_rejected_with_stream(self, tmp_path):
+        f = tmp_path / "app.log"
+        f.write_text("INFO ok\n")
+        runner = CliRunner()
+        result = runner.invoke(main, ["analyze", str(f), "--stream", "--workers", "2"])
+        assert result.exit_code != 0
+
+    @pytest.mark.parametrize("extra", [[], ["--stream"]])
+    def test_mmap_reader_matches_text(self, tmp_path, extra):
+        f = tmp_path / "app.log"
+        f.write_text("".join(f"{'ERROR' if i % 4 else 'INFO'} event {i}\n" for i in range(200)))
+        runner = CliRunner()
+        text = runner.invoke(main, ["analyze", str(f), *extra])
+        mmapped = runner.invoke(main, ["analyze", str(f), "--reader", "mmap", *extra])
+        assert mmapped.exit_code == 0
+        assert mmapped.output == text.output
+
+    def test_multiple_files_and_globs(self, tmp_path):
+        (tmp_path / "app.log").write_text("INFO ok\n" * 10)
+        (tmp_path / "app.log.1.gz").write_bytes(gzip.compress(b"ERROR bad\n" * 5))
+        runner = CliRunner()
+        result = runner.invoke(main, ["analyze", str(tmp_path / "app.log*")])
+        assert result.exit_code == 0
+        assert "Total entries : 15" in result.output
+
+    def test_missing_file_rejected(self, tmp_path):
+        runner = CliRunner()
+        result = runner.invoke(main, ["analyze", str(tmp_path / "nope.log")])
+        assert result.exit_code == 2
+        assert "does not exist" in result.output
+
+class TestStdinCommand:
+    def test_reads_stdin(self):
+        runner = CliRunner()
+        result = runner.invoke(main, ["stdin"], input="INFO ok\nERROR failed\n\n")
+        assert result.exit_code == 0
+        assert "Total entries : 2" in result.output
+        assert "Anomalies detected: 1" in result.output
+
+    def test_empty_stdin(self):
+        runner = CliRunner()
+        result = runner.invoke(main, ["stdin"], input="")
+        assert result.exit_code == 0
+        assert "No log entries found" in result.output
+
+
+class TestTailCommand:
+    def test_from_start_with_timeout(self, tmp_path):
+        f = tmp_path / "app.log"
+        f.write_text("INFO ok\n" * 6 + "ERROR boom\n" * 4)
+        runner = CliRunner()
+        result = runner.invoke(
+            main, ["tail", str(f), "--from-start", "--window", "4", "--timeout", "0.2"]
+        )
+        assert result.exit_code == 0
+        assert "ANOMALY [ERROR] boom" in result.output
+        assert "SPIKE entries 3–9 peak 100.0%" in result.output
+        assert "Total entries : 10" in result.output
+
+    def test_prefixes_paths_for_several_files(self, tmp_path):
+        for name in ("a.log", "b.log"):
+            (tmp_path / name).write_text("ERROR boom\n")
+        runner = CliRunner()
+        result = runner.invoke(
+            main, ["tail", str(tmp_path / "*.log"), "--from-start", "--timeout", "0.2"]
+        )
+        assert result.exit_code == 0
+        assert "a.log:" in result.output
+        assert "b.log:" in result.output
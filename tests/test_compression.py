@@ -0,0 +1,137 @@
+"""Tests for logsight.compression."""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import io
+import itertools
+import lzma
+
+import numpy as np
+import pytest
+
+from logsight.batch import LogBatch
+from logsight.compression import _PrefetchReader, detect_compression, expand_paths, open_log
+from logsight.parser import parse_file, parse_files
+from logsight.reader import iter_mmap_batches
+
+TEXT = "".join(
+    f"2024-01-01T00:00:{i % 60:02d} {'ERROR' if i % 5 == 0 else 'INFO'} event {i} café\r\n"
+    for i in range(3000)
+)
+COMPRESSORS = {"gzip": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress}
+
+
+def _write(tmp_path, name: str, compression: str | None):
+    path = tmp_path / name
+    data = TEXT.encode()
+    path.write_bytes(COMPRESSORS[compression](data) if compression else data)
+    return str(path)
+
+
+class TestDetectCompression:
+    @pytest.mark.parametrize("compression", list(COMPRESSORS))
+    def test_magic_bytes(self, tmp_path, compression):
+        # The name says nothing; only the content identifies the format.
+        assert detect_compression(_write(tmp_path, "app.log.1", compression)) == compression
+
+    def test_plain_and_empty(self, tmp_path):
+        assert detect_compression(_write(tmp_path, "app.log", None)) is None
+        empty = tmp_path / "empty.log"
+        empty.write_bytes(b"")
+        assert detect_compression(str(empty)) is None
+
+    def test_zstd(self, tmp_path):
+        zstandard = pytest.importorskip("zstandard")
+        path = tmp_path / "app.log.zst"
+        path.write_bytes(zstandard.ZstdCompressor().compress(TEXT.encode()))
+        assert detect_compression(str(path)) == "zstd"
+        with open_log(str(path)) as fh:
+            assert fh.read() == TEXT.replace("\r\n", "\n")
+
+
+class TestOpenLog:
+    @pytest.mark.parametrize("compression", list(COMPRESSORS))
+    def test_same_lines_as_plain(self, tmp_path, compression):
+        plain = _write(tmp_path, "plain.log", None)
+        packed = _write(tmp_path, "packed.log", compression)
+        with open_log(plain) as a, open_log(packed) as b:
+            assert list(a) == list(b)
+
+    @pytest.mark.parametrize("compression", list(COMPRESSORS))
+    def test_parse_file(self, tmp_path, compression):
+        plain = list(parse_file(_write(tmp_path, "plain.log", None)))
+        packed = list(parse_file(_write(tmp_path, "packed.log", compression)))
+        assert packed == plain
+
+    def test_early_close_stops_thread(self, tmp_path):
+        path = _write(tmp_path, "app.log.gz", "gzip")
+        with open_log(path) as fh:
+            fh.readline()
+            thread = fh.buffer.raw._thread
+        assert not thread.is_alive()
+
+    @pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+    def test_truncated_file_raises_oserror(self, tmp_path, compression):
+        path = tmp_path / "broken"
+        path.write_bytes(COMPRESSORS[compression](TEXT.encode())[:200])
+        with pytest.raises(OSError, match="truncated or corrupt"), open_log(str(path)) as fh:
+            fh.read()
+
+    @pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+    def test_corrupt_file_raises_oserror(self, tmp_path, compression):
+        data = bytearray(COMPRESSORS[compression](TEXT.encode()))
+        data[20:40] = bytes(20)
+        path = tmp_path / "broken"
+        path.write_bytes(bytes(data))
+        with pytest.raises(OSError), open_log(str(path)) as fh:
+            fh.read()
+
+    def test_prefetch_reader_chunks(self):
+        raw = _PrefetchReader(io.BytesIO(b"abcdefghij"), chunk_size=3)
+        assert raw.read(4) == b"abc"
+        assert raw.readall() == b"defghij"
+        raw.close()
+
+
+class TestBatches:
+    @pytest.mark.parametrize("reader", ["text", "mmap"])
+    def test_from_file_compressed(self, tmp_path, reader):
+        plain = LogBatch.from_file(_write(tmp_path, "plain.log", None))
+        packed = LogBatch.from_file(_write(tmp_path, "packed.gz", "gzip"), reader=reader)
+        np.testing.assert_array_equal(plain.timestamps, packed.timestamps)
+        assert plain.vocabulary == packed.vocabulary
+
+    def test_parallel_falls_back_to_serial(self, tmp_path):
+        packed = LogBatch.from_file(_write(tmp_path, "packed.gz", "gzip"), workers=2)
+        assert len(packed) == 3000
+
+    def test_iter_mmap_batches_compressed(self, tmp_path):
+        batches = list(iter_mmap_batches(_write(tmp_path, "packed.bz2", "bz2"), chunk_size=1000))
+        assert [len(batch) for batch in batches] == [1000, 1000, 1000]
+
+    def test_from_files_in_order(self, tmp_path):
+        first = _write(tmp_path, "a.log", None)
+        second = _write(tmp_path, "b.gz", "gzip")
+        batch = LogBatch.from_files([first, second])
+        assert len(batch) == 6000
+        assert [e.raw for e in batch] == [e.raw for e in parse_files([first, second])]
+
+
+class TestExpandPaths:
+    def test_glob_sorted_and_order_kept(self, tmp_path):
+        for name in ("b.gz", "a.gz", "c.log"):
+            (tmp_path / name).write_bytes(b"")
+        paths = expand_paths([str(tmp_path / "c.log"), str(tmp_path / "*.gz")])
+        assert paths == [str(tmp_path / n) for n in ("c.log", "a.gz", "b.gz")]
+
+    def test_unmatched_kept(self, tmp_path):
+        missing = str(tmp_path / "none-*.log")
+        assert expand_paths([missing, "plain.log"]) == [missing, "plain.log"]
+
+
+class TestParseFiles:
+    def test_chains_files(self, tmp_path):
+        paths = [_write(tmp_path, f"{i}.log", c) for i, c in enumerate((None, "xz"))]
+        assert len(list(itertools.islice(parse_files(paths), 5000))) == 5000
@@ -0,0 +1,113 @@
+"""Tests for logsight.follow."""
+
+from __future__ import annotations
+
+import os
+import threading
+
+from logsight.follow import FileFollower, tail
+from logsight.stream import IncrementalAnalyzer
+
+
+def _append(path, text: str) -> None:
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(text)
+
+
+class TestFileFollower:
+    def test_starts_at_end(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_text("INFO old\n")
+        follower = FileFollower(str(path))
+        assert follower.poll() == []
+        _append(path, "INFO new\n")
+        assert follower.poll() == ["INFO new"]
+        assert follower.poll() == []
+
+    def test_from_start(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_text("INFO old\r\nINFO older\n")
+        assert FileFollower(str(path), from_start=True).poll() == ["INFO old", "INFO older"]
+
+    def test_from_start_reads_in_chunks(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_text("".join(f"INFO line {i:03d}\n" for i in range(100)))
+        follower = FileFollower(str(path), from_start=True, chunk_size=64)
+        first = follower.poll()
+        assert first == [f"INFO line {i:03d}" for i in range(4)]  # 14-byte lines
+        lines = first
+        while batch := follower.poll():
+            assert len(batch) <= 5
+            lines += batch
+        assert lines == [f"INFO line {i:03d}" for i in range(100)]
+
+    def test_partial_line_held_back(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_text("")
+        follower = FileFollower(str(path))
+        _append(path, "ERROR half")
+        assert follower.poll() == []
+        _append(path, " done\nINFO next\n")
+        assert follower.poll() == ["ERROR half done", "INFO next"]
+
+    def test_rotation_by_rename(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_text("")
+        follower = FileFollower(str(path))
+        _append(path, "INFO before\n")
+        os.rename(path, tmp_path / "app.log.1")
+        _append(tmp_path / "app.log.1", "INFO late write\n")
+        path.write_text("INFO after\n")
+        assert follower.poll() == ["INFO before", "INFO late write", "INFO after"]
+
+    def test_rotation_drains_backlog_in_chunks(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_text("")
+        follower = FileFollower(str(path), chunk_size=16)
+        _append(path, "".join(f"INFO old {i}\n" for i in range(10)))
+        os.rename(path, tmp_path / "app.log.1")
+        path.write_text("INFO new\n")
+        lines = []
+        while batch := follower.poll():
+            lines += batch
+        assert lines == [f"INFO old {i}" for i in range(10)] + ["INFO new"]
+
+    def test_truncation(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_text("INFO " + "x" * 100 + "\n")
+        follower = FileFollower(str(path))
+        path.write_text("INFO fresh\n")
+        assert follower.poll() == ["INFO fresh"]
+
+    def test_missing_file_appears(self, tmp_path):
+        path = tmp_path / "later.log"
+        follower = FileFollower(str(path))
+        assert follower.poll() == []
+        path.write_text("INFO hello\n")
+        assert follower.poll() == ["INFO hello"]
+
+
+class TestTail:
+    def test_alerts(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_text("")
+        stop = threading.Event()
+        analyzer = IncrementalAnalyzer(window_size=4, spike_threshold=0.5)
+        alerts = tail([str(path)], analyzer, poll_interval=0.01, stop=stop)
+
+        _append(path, "INFO ok\nINFO ok\nERROR boom\nERROR boom\n")
+        kinds = [next(alerts).kind for _ in range(3)]
+        assert kinds == ["anomaly", "anomaly", "spike"]
+        assert analyzer.count == 4
+
+        stop.set()
+        assert list(alerts) == []
+
+    def test_idle_stops(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_text("INFO ok\n")
+        stop = threading.Event()
+        timer = threading.Timer(0.1, stop.set)
+        timer.start()
+        assert list(tail([str(path)], IncrementalAnalyzer(), stop=stop)) == []
+        timer.join()
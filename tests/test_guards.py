@@ -0,0 +1,170 @@
+"""Tests for agents.guards, driven by a fake clock."""
+
+from __future__ import annotations
+
+import pytest
+
+from agents.guards import CircuitBreakerException, ExecutionCircuitBreaker, WorkerTimeout
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(clock: FakeClock, **kwargs) -> ExecutionCircuitBreaker:
+    settings = {"error_threshold": 2, "window": 60.0, "cooldown": 30.0}
+    settings.update(kwargs)
+    return ExecutionCircuitBreaker(clock=clock, **settings)
+
+
+def _trip(breaker: ExecutionCircuitBreaker) -> None:
+    with pytest.raises(CircuitBreakerException):
+        for _ in range(breaker.error_threshold):
+            breaker.record_error()
+
+
+class TestWindow:
+    def test_errors_within_window_open(self):
+        breaker = _breaker(FakeClock())
+        breaker.record_error()
+        with pytest.raises(CircuitBreakerException, match="error thresholds"):
+            breaker.record_error()
+        assert breaker.status == "OPEN"
+
+    def test_old_errors_expire(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        breaker.record_error()
+        clock.now += 61
+        assert breaker.current_errors == 0
+        breaker.record_error()
+        assert breaker.status == "CLOSED"
+
+    def test_error_rate(self):
+        clock = FakeClock()
+        breaker = _breaker(clock, error_threshold=100, max_error_rate=0.5, min_calls=4)
+        breaker.record_success()
+        breaker.record_error()
+        breaker.record_success()
+        with pytest.raises(CircuitBreakerException, match="Error rate 50%"):
+            breaker.record_error()
+
+    def test_rate_needs_min_calls(self):
+        breaker = _breaker(FakeClock(), error_threshold=100, max_error_rate=0.5, min_calls=4)
+        breaker.record_error()
+        breaker.record_error()
+        assert breaker.status == "CLOSED"
+
+
+class TestStateMachine:
+    def test_open_rejects_until_cooldown(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        _trip(breaker)
+        clock.now += 29
+        with pytest.raises(CircuitBreakerException, match="cools down"):
+            breaker.before_call()
+        clock.now += 1
+        breaker.before_call()
+        assert breaker.status == "HALF_OPEN"
+
+    def test_trial_success_closes(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        _trip(breaker)
+        clock.now += 30
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.status == "CLOSED"
+        assert breaker.current_errors == 0
+        breaker.record_error()  # the old errors no longer count
+        assert breaker.status == "CLOSED"
+
+    def test_trial_failure_reopens(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        _trip(breaker)
+        clock.now += 30
+        breaker.before_call()
+        with pytest.raises(CircuitBreakerException, match="half-open"):
+            breaker.record_error()
+        assert breaker.status == "OPEN"
+        # The cooldown starts again from the failed trial
+        clock.now += 29
+        with pytest.raises(CircuitBreakerException):
+            breaker.before_call()
+
+    def test_trial_calls_are_limited(self):
+        clock = FakeClock()
+        breaker = _breaker(clock, half_open_trials=2)
+        _trip(breaker)
+        clock.now += 30
+        breaker.before_call()
+        breaker.before_call()
+        with pytest.raises(CircuitBreakerException, match="Half-Open"):
+            breaker.before_call()
+
+    def test_released_trial_frees_its_slot(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        _trip(breaker)
+        clock.now += 30
+        breaker.before_call()
+        breaker.release()
+        breaker.before_call()
+        assert breaker.status == "HALF_OPEN"
+
+    def test_lost_trial_expires_after_cooldown(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        _trip(breaker)
+        clock.now += 30
+        breaker.before_call()  # never recorded
+        clock.now += 29
+        with pytest.raises(CircuitBreakerException, match="Half-Open"):
+            breaker.before_call()
+        clock.now += 1
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.status == "CLOSED"
+
+    def test_loop_bound_does_not_open(self):
+        breaker = _breaker(FakeClock(), max_loops=1)
+        with pytest.raises(CircuitBreakerException, match="loop count"):
+            breaker.verify_bounds(1)
+        breaker.before_call()
+
+
+class TestMetrics:
+    def test_counts(self):
+        clock = FakeClock()
+        breaker = _breaker(clock)
+        breaker.record_success()
+        breaker.record_error(WorkerTimeout("analysis", 5.0))
+        with pytest.raises(CircuitBreakerException):
+            breaker.record_error(RuntimeError("overloaded"))
+        with pytest.raises(CircuitBreakerException):
+            breaker.before_call()
+        assert breaker.metrics() == {
+            "status": "OPEN",
+            "window_calls": 3,
+            "window_errors": 2,
+            "error_rate": 2 / 3,
+            "successes": 1,
+            "errors": 2,
+            "timeouts": 1,
+            "rejected": 1,
+            "trips": 1,
+        }
+
+    def test_clone_is_fresh(self):
+        clock = FakeClock()
+        breaker = _breaker(clock, cooldown=5.0)
+        _trip(breaker)
+        clone = breaker.clone()
+        assert clone.status == "CLOSED" and clone.cooldown == 5.0 and clone.clock is clock
+        assert clone.metrics()["errors"] == 0
@@ -0,0 +1,201 @@
+"""Tests for logsight.ingest."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from logsight.ingest import IngestError, IngestServer, decode_records, records_to_batch
+from logsight.parser import LogLevel
+
+
+def _records(n: int, level: str = "INFO") -> list[dict]:
+    return [
+        {"timestamp": 1700000000.5, "component": "auth-service", "level": level, "message": f"handshake {i % 3}"}
+        for i in range(n)
+    ]
+
+
+async def _request(port: int, method: str, path: str, body: bytes = b"", headers: dict | None = None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    lines = [f"{method} {path} HTTP/1.1", "Host: test", f"Content-Length: {len(body)}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode()
+    status = int(head.split(" ", 2)[1])
+    response_headers = dict(line.split(": ", 1) for line in head.strip().split("\r\n")[1:])
+    data = await reader.readexactly(int(response_headers["Content-Length"]))
+    writer.close()
+    return status, response_headers, json.loads(data)
+
+
+def _run(test, **options):
+    async def main():
+        server = IngestServer(port=0, **options)
+        await server.start()
+        try:
+            return await test(server)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+class TestDecode:
+    def test_simulator_payload(self):
+        assert decode_records(json.dumps({"logs": _records(2)}).encode()) == _records(2)
+
+    def test_bare_array(self):
+        assert decode_records(json.dumps(_records(2)).encode()) == _records(2)
+
+    def test_ndjson(self):
+        body = b"\n".join(json.dumps(r).encode() for r in _records(3)) + b"\n\n"
+        assert decode_records(body, "application/x-ndjson") == _records(3)
+
+    def test_ndjson_bad_line(self):
+        body = json.dumps(_records(1)[0]).encode() + b"\n{oops\n"
+        assert decode_records(body, "application/x-ndjson; charset=utf-8") == [_records(1)[0], None]
+
+    @pytest.mark.parametrize("body", [b"{oops", b'{"logs": 3}', b'"text"'])
+    def test_rejects_non_batches(self, body):
+        with pytest.raises(IngestError):
+            decode_records(body)
+
+
+class TestRecordsToBatch:
+    def test_columns(self):
+        batch, rejected = records_to_batch(
+            [
+                {"timestamp": 1700000000.5, "component": "db", "level": "FATAL", "message": "down"},
+                {"timestamp": "2024-01-15T10:00:00Z", "level": "warn", "message": "slow"},
+                {"message": "no level"},
+            ]
+        )
+        assert rejected == 0
+        assert [e.level for e in batch] == [LogLevel.CRITICAL, LogLevel.WARNING, LogLevel.UNKNOWN]
+        assert batch[0].raw == "db: down" and batch[0].message == "down"
+        assert batch[0].timestamp == datetime(2023, 11, 14, 22, 13, 20, 500000)
+        assert batch[1].timestamp.isoformat() == "2024-01-15T10:00:00"
+        assert batch[2].timestamp is None
+        assert batch.vocabulary == ["down", "slow", "no level"]
+
+    def test_invalid_records_rejected(self):
+        batch, rejected = records_to_batch([{"message": 3}, "text", None, {"level": "INFO"}, {"message": "ok"}])
+        assert rejected == 4
+        assert [e.message for e in batch] == ["ok"]
+
+    @pytest.mark.parametrize(
+        "ts", [float("inf"), float("nan"), 1e300, 10**30, 1700000000000 * 10**6]
+    )
+    def test_unrepresentable_timestamps_rejected(self, ts):
+        batch, rejected = records_to_batch([{"timestamp": ts, "message": "m"}, {"message": "ok"}])
+        assert rejected == 1
+        assert [e.message for e in batch] == ["ok"]
+
+    def test_out_of_range_string_timestamp_is_missing(self):
+        batch, rejected = records_to_batch([{"timestamp": "9999-01-01T00:00:00", "message": "m"}])
+        assert rejected == 0
+        assert batch[0].timestamp is None
+
+    def test_non_ascii_digit_timestamp_is_missing(self):
+        batch, rejected = records_to_batch([{"timestamp": "2024-01-01T00:00:00.\u00b2", "message": "m"}])
+        assert rejected == 0
+        assert batch[0].timestamp is None
+
+    def test_non_string_levels_are_unknown(self):
+        batch, rejected = records_to_batch([{"level": ["ERROR"], "message": "m"}, {"level": {}, "message": "n"}])
+        assert rejected == 0
+        assert [e.level for e in batch] == [LogLevel.UNKNOWN, LogLevel.UNKNOWN]
+
+class TestIngestServer:
+    def test_ingest_then_stats(self):
+        async def test(server):
+            payload = json.dumps({"logs": _records(5) + _records(2, "ERROR")}).encode()
+            status, _, body = await _request(server.port, "POST", "/api/v1/ingest", payload)
+            assert (status, body) == (202, {"accepted": 7, "rejected": 0})
+            await server._queue.join()
+            status, _, stats = await _request(server.port, "GET", "/api/v1/stats")
+            assert status == 200
+            return stats
+
+        stats = _run(test)
+        assert stats["total"] == 7
+        assert stats["error_count"] == 2
+        assert stats["level_counts"] == {"INFO": 5, "ERROR": 2}
+        assert stats["window"]["records"] == 7 and stats["window"]["errors"] == 2
+        assert stats["ingest"]["accepted"] == 7
+        assert [a["raw"] for a in stats["recent_anomalies"]] == ["auth-service: handshake 0", "auth-service: handshake 1"]
+
+    def test_bad_fields_do_not_drop_the_connection(self):
+        async def test(server):
+            body = b'[{"message": "a", "timestamp": Infinity}, {"message": "b", "timestamp": NaN},'
+            body += b' {"message": "c", "level": ["ERROR"]}, {"message": "d", "timestamp": 1e300}]'
+            return await _request(server.port, "POST", "/api/v1/ingest", body)
+
+        status, _, body = _run(test)
+        assert (status, body) == (202, {"accepted": 1, "rejected": 3})
+
+    def test_ndjson_request(self):
+        async def test(server):
+            body = b"\n".join(json.dumps(r).encode() for r in _records(4))
+            return await _request(
+                server.port, "POST", "/api/v1/ingest", body, {"Content-Type": "application/x-ndjson"}
+            )
+
+        assert _run(test)[2] == {"accepted": 4, "rejected": 0}
+
+    def test_keep_alive(self):
+        async def test(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            body = json.dumps(_records(1)).encode()
+            request = f"POST /api/v1/ingest HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+            for _ in range(3):
+                writer.write(request)
+                await writer.drain()
+                head = await reader.readuntil(b"\r\n\r\n")
+                assert b"202 Accepted" in head and b"Connection: keep-alive" in head
+                length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+                await reader.readexactly(length)
+            writer.close()
+            await server._queue.join()
+            return server.accepted
+
+        assert _run(test) == 3
+
+    def test_full_queue_gets_503(self):
+        async def test(server):
+            server._consumer.cancel()  # nothing drains the queue
+            body = json.dumps(_records(1)).encode()
+            first = await _request(server.port, "POST", "/api/v1/ingest", body)
+            second = await _request(server.port, "POST", "/api/v1/ingest", body)
+            server._queue.get_nowait()
+            server._queue.task_done()
+            return first, second, server.throttled
+
+        first, second, throttled = _run(test, queue_size=1)
+        assert first[0] == 202
+        assert second[0] == 503 and second[1]["Retry-After"] == "1"
+        assert throttled == 1
+
+    def test_errors(self):
+        async def test(server):
+            return [
+                (await _request(server.port, "POST", "/api/v1/ingest", b"{oops"))[0],
+                (await _request(server.port, "GET", "/api/v1/ingest"))[:2],
+                (await _request(server.port, "GET", "/nowhere"))[0],
+                (await _request(server.port, "POST", "/api/v1/ingest", b"[]" * 40))[0],
+            ]
+
+        bad_json, wrong_method, missing, too_big = _run(test, max_body=64)
+        assert bad_json == 400
+        assert wrong_method[0] == 405 and wrong_method[1]["Allow"] == "POST"
+        assert missing == 404
+        assert too_big == 413
+
+    def test_rejects_empty_queue(self):
+        with pytest.raises(ValueError):
+            IngestServer(queue_size=0)
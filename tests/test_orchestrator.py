@@ -0,0 +1,613 @@
+"""Tests for agents.orchestrator, run against local fake model clients."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agents.cache import ResponseCache
+from agents.guards import CircuitBreakerException, ExecutionCircuitBreaker
+from agents.orchestrator import (
+    ANALYSIS_SYSTEM_PROMPT,
+    PARSER_SYSTEM_PROMPT,
+    LogSightOrchestrator,
+)
+
+PARSED = [{"timestamp": None, "level": "ERROR", "service": None, "message": "db down"}]
+
+
+def _reply(system: str, prompt: str) -> str:
+    if system == PARSER_SYSTEM_PROMPT:
+        lines = prompt.splitlines()[1:]
+        return json.dumps([{"level": "WARNING", "service": "model", "message": line} for line in lines])
+    if system == ANALYSIS_SYSTEM_PROMPT:
+        return "root cause: db down"
+    return "restart db"
+
+
+class FakeStream:
+    def __init__(self, text: str) -> None:
+        # Streams the reply a word at a time.
+        self.text_stream = iter(re.findall(r"\S+\s*", text))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeClient:
+    """Synchronous stand-in for ``Anthropic`` that records its calls."""
+
+    def __init__(self) -> None:
+        self.calls = []
+        self.messages = SimpleNamespace(create=self._create, stream=self._stream)
+
+    def _create(self, model, max_tokens, system, messages, timeout=None):
+        self.calls.append(system)
+        return SimpleNamespace(content=[SimpleNamespace(text=_reply(system, messages[0]["content"]))])
+
+    def _stream(self, model, max_tokens, system, messages, timeout=None):
+        self.calls.append(system)
+        return FakeStream(_reply(system, messages[0]["content"]))
+
+
+class FakeAsyncClient:
+    """Stand-in for ``AsyncAnthropic`` where every call takes *latency* seconds."""
+
+    def __init__(self, latency: float = 0.0, slow: str | None = None) -> None:
+        self.latency = latency
+        self.slow = slow
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.messages = SimpleNamespace(create=self._create)
+
+    async def _create(self, model, max_tokens, system, messages):
+        self.calls.append(system)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            slow = self.slow is not None and self.slow in messages[0]["content"]
+            await asyncio.sleep(10 if slow else self.latency)
+        finally:
+            self.in_flight -= 1
+        return SimpleNamespace(content=[SimpleNamespace(text=_reply(system, messages[0]["content"]))])
+
+
+def _orchestrator(**kwargs) -> LogSightOrchestrator:
+    return LogSightOrchestrator(client=FakeClient(), async_client=FakeAsyncClient(**kwargs))
+
+
+class TestProcessIncident:
+    def test_runs_all_workers(self):
+        orchestrator = _orchestrator()
+        state = orchestrator.process_incident("ERROR db down")
+        assert state.parsed_json == PARSED
+        assert state.root_cause_analysis == "root cause: db down"
+        assert state.recommended_actions == "restart db"
+        # The line is parsed locally, so only analysis and remediation reach the model.
+        assert len(orchestrator.client.calls) == 2
+
+    def test_async_matches_sync(self):
+        orchestrator = _orchestrator()
+        sync = orchestrator.process_incident("ERROR db down")
+        result = asyncio.run(orchestrator.process_incident_async("ERROR db down"))
+        assert result.model_dump() == sync.model_dump()
+
+    def test_unparseable_reply_keeps_local_records(self):
+        orchestrator = _orchestrator()
+        orchestrator.async_client.messages.create = _bad_parser(orchestrator.async_client)
+        state = asyncio.run(orchestrator.process_incident_async("ERROR db down\nsomething odd"))
+        assert state.parsed_json[1] == {
+            "timestamp": None, "level": "UNKNOWN", "service": None, "message": "something odd"
+        }
+        assert any("Parser warning" in step for step in state.execution_steps)
+        assert not state.circuit_tripped
+        assert state.recommended_actions == "restart db"
+
+    def test_parser_errors_trip_breaker(self):
+        orchestrator = _orchestrator()
+        orchestrator.async_client.messages.create = _bad_parser(orchestrator.async_client)
+        payload = "\n".join(f"free text line {i}" for i in range(60))  # three model batches
+        state = asyncio.run(orchestrator.process_incident_async(payload))
+        assert state.circuit_tripped
+        assert state.root_cause_analysis.startswith("ANALYSIS HALTED")
+
+    def test_timeout_degrades(self):
+        orchestrator = _orchestrator(slow="db down")
+        state = asyncio.run(orchestrator.process_incident_async("ERROR db down", timeout=0.05))
+        assert "timed out" in state.failure_reason
+        assert state.root_cause_analysis.startswith("ANALYSIS HALTED")
+        assert state.execution_steps[-1].startswith("TIMEOUT")
+
+
+def _bad_parser(client):
+    create = client.messages.create
+
+    async def wrapped(model, max_tokens, system, messages):
+        if system == PARSER_SYSTEM_PROMPT:
+            return SimpleNamespace(content=[SimpleNamespace(text="not json")])
+        return await create(model, max_tokens, system, messages)
+
+    return wrapped
+
+
+class TestLocalParsing:
+    def test_recognised_lines_skip_the_model(self):
+        orchestrator = _orchestrator()
+        state = orchestrator.process_incident(
+            "2024-01-15T10:00:00Z ERROR auth_service: DB connection timeout\n"
+            "Jan 15 10:00:01 web01 sshd[42]: Failed password for root\n"
+        )
+        assert state.parsed_json == [
+            {
+                "timestamp": "2024-01-15T10:00:00+00:00",
+                "level": "ERROR",
+                "service": "auth_service",
+                "message": "DB connection timeout",
+            },
+            {
+                "timestamp": state.parsed_json[1]["timestamp"],
+                "level": "UNKNOWN",
+                "service": "sshd",
+                "message": "Failed password for root",
+            },
+        ]
+        assert PARSER_SYSTEM_PROMPT not in orchestrator.client.calls
+
+    def test_free_text_lines_go_to_the_model_in_batches(self):
+        orchestrator = _orchestrator()
+        lines = ["ERROR known"] + [f"mystery {i}" for i in range(30)]
+        state = orchestrator.process_incident("\n".join(lines))
+        assert orchestrator.client.calls.count(PARSER_SYSTEM_PROMPT) == 2
+        assert state.parsed_json[0]["level"] == "ERROR"
+        assert state.parsed_json[1] == {
+            "timestamp": None, "level": "WARNING", "service": "model", "message": "mystery 0"
+        }
+        assert len(state.parsed_json) == 31
+        assert "30 sent to the model in 2 batches" in state.execution_steps[2]
+
+    def test_async_batches_match_sync(self):
+        orchestrator = _orchestrator()
+        payload = "\n".join(f"mystery {i}" for i in range(30))
+        sync = orchestrator.process_incident(payload)
+        result = asyncio.run(orchestrator.process_incident_async(payload))
+        assert result.parsed_json == sync.parsed_json
+
+
+class TestReduction:
+    def test_analysis_sees_reduced_context(self):
+        orchestrator = _orchestrator()
+        prompts = []
+        create = orchestrator.client.messages.create
+
+        def recording(model, max_tokens, system, messages, timeout=None):
+            prompts.append(messages[0]["content"])
+            return create(model, max_tokens, system, messages, timeout)
+
+        orchestrator.client.messages.create = recording
+        payload = "\n".join(f"ERROR payments: timeout after {i}ms" for i in range(300))
+        state = orchestrator.process_incident(payload)
+        assert len(state.parsed_json) == 300
+        assert len(state.context_json) == 1
+        assert state.context_json[0]["count"] == 300
+        assert state.compression_ratio > 100
+        assert json.dumps(state.context_json) in prompts[0]
+        assert any(step.startswith("Reduced 300 records to 1") for step in state.execution_steps)
+
+
+class TestResponseCache:
+    def test_repeated_incident_served_from_cache(self):
+        orchestrator = LogSightOrchestrator(client=FakeClient(), cache=ResponseCache())
+        payload = "ERROR db down\nsomething odd"
+        first = orchestrator.process_incident(payload)
+        calls = len(orchestrator.client.calls)
+        second = orchestrator.process_incident(payload + "\n")
+        assert len(orchestrator.client.calls) == calls
+        assert (first.cache_hits, first.cache_misses) == (0, 3)
+        assert (second.cache_hits, second.cache_misses) == (3, 0)
+        assert second.recommended_actions == first.recommended_actions
+        assert "Response cache: 3 hits, 0 misses." in second.execution_steps
+
+    def test_shared_between_sync_and_async(self):
+        orchestrator = _orchestrator()
+        orchestrator.cache = ResponseCache()
+        orchestrator.process_incident("ERROR db down")
+        state = asyncio.run(orchestrator.process_incident_async("ERROR db down"))
+        assert orchestrator.async_client.calls == []
+        assert state.cache_hits == 2
+
+    def test_invalid_parser_reply_is_not_cached(self):
+        client = FakeClient()
+        create = client.messages.create
+        bad_replies = ["not json"]
+
+        def bad_once(model, max_tokens, system, messages, timeout=None):
+            if system == PARSER_SYSTEM_PROMPT and bad_replies:
+                client.calls.append(system)
+                return SimpleNamespace(content=[SimpleNamespace(text=bad_replies.pop())])
+            return create(model, max_tokens, system, messages, timeout)
+
+        client.messages.create = bad_once
+        orchestrator = LogSightOrchestrator(client=client, cache=ResponseCache())
+        states = [orchestrator.process_incident("ERROR db down\nsomething odd") for _ in range(3)]
+        # The second submission asks the model again instead of replaying the bad reply
+        assert client.calls.count(PARSER_SYSTEM_PROMPT) == 2
+        assert states[-1].parsed_json[1]["service"] == "model"
+        assert states[-1].breaker_metrics["errors"] == 0
+        assert not any(s.circuit_tripped for s in states)
+
+    def test_invalid_cached_reply_is_evicted(self):
+        orchestrator = LogSightOrchestrator(client=FakeClient(), cache=ResponseCache())
+        payload = "ERROR db down\nsomething odd"
+        orchestrator.process_incident(payload)
+        parser_key = orchestrator._cache_lookup_key(
+            PARSER_SYSTEM_PROMPT, orchestrator._parser_prompt([(1, "something odd")])
+        )
+        orchestrator.cache.set(parser_key, "not json")  # e.g. written by an older version
+        state = orchestrator.process_incident(payload)
+        assert state.parsed_json[1]["service"] == "model"
+        assert orchestrator.client.calls.count(PARSER_SYSTEM_PROMPT) == 2
+        assert orchestrator.cache.get(parser_key) != "not json"
+
+    def test_no_cache_no_counters(self):
+        state = _orchestrator().process_incident("ERROR db down")
+        assert (state.cache_hits, state.cache_misses) == (0, 0)
+        assert not any(step.startswith("Response cache") for step in state.execution_steps)
+
+
+def _incident(lines: int) -> str:
+    return "\n".join(f"2024-01-15T10:00:00Z ERROR svc{i % 3}: failure kind {chr(97 + i % 26)}" for i in range(lines))
+
+
+class TestMapReduce:
+    def test_small_incidents_use_single_pass(self):
+        orchestrator = LogSightOrchestrator(client=FakeClient(), map_reduce=True, chunk_size=50)
+        state = orchestrator.process_incident(_incident(50))
+        assert state.partial_analyses == []
+        assert len(orchestrator.client.calls) == 2
+
+    def test_chunks_then_merge(self):
+        orchestrator = LogSightOrchestrator(client=FakeClient(), map_reduce=True, chunk_size=10)
+        state = orchestrator.process_incident(_incident(25))
+        # 3 chunk analyses, 1 merge, 1 remediation.
+        assert orchestrator.client.calls.count(ANALYSIS_SYSTEM_PROMPT) == 4
+        assert len(state.partial_analyses) == 3
+        assert state.partial_analyses[0].startswith("[2024-01-15T10:00:00+00:00 to")
+        assert state.root_cause_analysis == "root cause: db down"
+        assert state.recommended_actions == "restart db"
+        assert state.compression_ratio > 1
+        assert not state.circuit_tripped
+
+    def test_merges_in_rounds(self):
+        orchestrator = LogSightOrchestrator(client=FakeClient(), map_reduce=True, chunk_size=1)
+        orchestrator.process_incident(_incident(20))
+        # 20 chunks, merged 8 at a time: 3 merges, then 1.
+        assert orchestrator.client.calls.count(ANALYSIS_SYSTEM_PROMPT) == 24
+
+    def test_by_service(self):
+        orchestrator = LogSightOrchestrator(client=FakeClient(), map_reduce=True, chunk_size=10, chunk_by="service")
+        state = orchestrator.process_incident(_incident(30))
+        assert [p.split("]")[0] for p in state.partial_analyses] == ["[service svc0", "[service svc1", "[service svc2"]
+
+    def test_async_concurrency_is_bounded(self):
+        client = FakeAsyncClient(latency=0.005)
+        orchestrator = LogSightOrchestrator(
+            client=FakeClient(), async_client=client, map_reduce=True, chunk_size=2, map_concurrency=3
+        )
+        state = asyncio.run(orchestrator.process_incident_async(_incident(20)))
+        assert len(state.partial_analyses) == 10
+        assert client.max_in_flight == 3
+        assert state.root_cause_analysis == "root cause: db down"
+
+    def test_breaker_applies_per_chunk(self):
+        client = FakeClient()
+        create = client.messages.create
+
+        def flaky(model, max_tokens, system, messages, timeout=None):
+            if "svc1" in messages[0]["content"] and "partial" not in messages[0]["content"]:
+                raise RuntimeError("overloaded")
+            return create(model, max_tokens, system, messages, timeout)
+
+        client.messages.create = flaky
+        orchestrator = LogSightOrchestrator(client=client, map_reduce=True, chunk_size=10, chunk_by="service")
+        state = orchestrator.process_incident(_incident(30))
+        assert len(state.partial_analyses) == 2
+        assert any("(service svc1) skipped: Circuit Breaker Opened" in s for s in state.execution_steps)
+        assert not state.circuit_tripped
+
+    def test_failed_merge_is_retried(self):
+        client = FakeClient()
+        create = client.messages.create
+        failures = [RuntimeError("overloaded")]
+
+        def flaky(model, max_tokens, system, messages, timeout=None):
+            if "partial root-cause findings" in messages[0]["content"] and failures:
+                raise failures.pop()
+            return create(model, max_tokens, system, messages, timeout)
+
+        client.messages.create = flaky
+        orchestrator = LogSightOrchestrator(client=client, map_reduce=True, chunk_size=10)
+        state = orchestrator.process_incident(_incident(30))
+        assert state.root_cause_analysis == "root cause: db down"
+        assert state.breaker_metrics["errors"] == 1
+        assert not state.circuit_tripped
+
+    def test_failing_merge_trips(self):
+        client = FakeClient()
+        create = client.messages.create
+        async_client = FakeAsyncClient()
+        async_create = async_client.messages.create
+
+        def broken_merge(model, max_tokens, system, messages, timeout=None):
+            if "partial root-cause findings" in messages[0]["content"]:
+                raise RuntimeError("overloaded")
+            return create(model, max_tokens, system, messages, timeout)
+
+        async def async_broken_merge(model, max_tokens, system, messages):
+            if "partial root-cause findings" in messages[0]["content"]:
+                raise RuntimeError("overloaded")
+            return await async_create(model, max_tokens, system, messages)
+
+        client.messages.create = broken_merge
+        async_client.messages.create = async_broken_merge
+        states = [
+            LogSightOrchestrator(client=client, map_reduce=True, chunk_size=10).process_incident(_incident(30)),
+            list(
+                LogSightOrchestrator(client=client, map_reduce=True, chunk_size=10).stream_incident(_incident(30))
+            )[-1].state,
+            asyncio.run(
+                LogSightOrchestrator(client=client, async_client=async_client, map_reduce=True, chunk_size=10)
+                .process_many([_incident(30)])
+            )[0],
+        ]
+        for state in states:
+            assert state.circuit_tripped
+            assert state.root_cause_analysis.startswith("ANALYSIS HALTED")
+            assert "exceeded maximum continuous error thresholds" in state.failure_reason
+
+    def test_all_chunks_failing_trips(self):
+        client = FakeClient()
+
+        def down(model, max_tokens, system, messages, timeout=None):
+            raise RuntimeError("overloaded")
+
+        client.messages.create = down
+        orchestrator = LogSightOrchestrator(client=client, map_reduce=True, chunk_size=10)
+        state = orchestrator.process_incident(_incident(30))
+        assert state.circuit_tripped
+        assert state.root_cause_analysis.startswith("ANALYSIS HALTED")
+
+    def test_invalid_concurrency(self):
+        with pytest.raises(ValueError):
+            LogSightOrchestrator(client=FakeClient(), map_concurrency=0)
+
+
+class TestStreamIncident:
+    def test_events(self):
+        orchestrator = _orchestrator()
+        events = list(orchestrator.stream_incident("ERROR db down"))
+        assert events[-1].kind == "done"
+        state = events[-1].state
+        assert [e.text for e in events if e.kind == "step"] == state.execution_steps
+        deltas = [e for e in events if e.kind == "delta"]
+        assert [e.text for e in deltas if e.worker == "analysis"] == ["root ", "cause: ", "db ", "down"]
+        assert "".join(e.text for e in deltas if e.worker == "remediation") == "restart db"
+
+    def test_matches_process_incident(self):
+        streamed = list(_orchestrator().stream_incident("ERROR db down\nsomething odd"))[-1].state
+        assert streamed.model_dump() == _orchestrator().process_incident("ERROR db down\nsomething odd").model_dump()
+
+    def test_progress_precedes_deltas(self):
+        events = list(_orchestrator().stream_incident("ERROR db down"))
+        first_delta = next(i for i, e in enumerate(events) if e.kind == "delta")
+        assert events[first_delta - 1].text == "Invoking Infrastructure Root-Cause Analysis Worker."
+
+    def test_cached_reply_is_one_delta(self):
+        orchestrator = _orchestrator()
+        orchestrator.cache = ResponseCache()
+        list(orchestrator.stream_incident("ERROR db down"))
+        events = list(orchestrator.stream_incident("ERROR db down"))
+        assert [e.text for e in events if e.kind == "delta"] == ["root cause: db down", "restart db"]
+        assert events[-1].state.cache_hits == 2
+
+    def test_map_reduce_root_cause_is_emitted(self):
+        orchestrator = LogSightOrchestrator(client=FakeClient(), map_reduce=True, chunk_size=10)
+        events = list(orchestrator.stream_incident(_incident(25)))
+        assert [e.text for e in events if e.worker == "analysis"] == ["root cause: db down"]
+        assert len(events[-1].state.partial_analyses) == 3
+
+    def test_breaker_trip_still_finishes(self):
+        orchestrator = LogSightOrchestrator(client=FakeClient())
+        orchestrator.breaker.max_loops = 0
+        events = list(orchestrator.stream_incident("ERROR db down"))
+        assert events[-1].state.circuit_tripped
+        assert events[-2].kind == "step" and events[-2].text.startswith("CRITICAL FAULT")
+
+
+class TestProcessMany:
+    def test_preserves_order(self):
+        orchestrator = _orchestrator(latency=0.001)
+        payloads = [f"ERROR incident {i}" for i in range(10)]
+        states = asyncio.run(orchestrator.process_many(payloads, concurrency=4))
+        assert [s.raw_logs for s in states] == payloads
+        assert all(s.recommended_actions == "restart db" for s in states)
+
+    def test_concurrency_is_bounded(self):
+        orchestrator = _orchestrator(latency=0.005)
+        asyncio.run(orchestrator.process_many(["ERROR x"] * 20, concurrency=3))
+        assert orchestrator.async_client.max_in_flight == 3
+
+    def test_overlaps_latency(self):
+        orchestrator = _orchestrator(latency=0.02)
+        start = time.perf_counter()
+        asyncio.run(orchestrator.process_many(["ERROR x"] * 20, concurrency=20))
+        # Serially: 20 incidents x 2 calls x 20 ms = 0.8 s.
+        assert time.perf_counter() - start < 0.4
+
+    def test_timeout_is_per_incident(self):
+        orchestrator = _orchestrator(latency=0.001, slow="stuck")
+        states = asyncio.run(
+            orchestrator.process_many(["ERROR ok", "ERROR stuck", "ERROR ok"], timeout=0.1)
+        )
+        assert [s.failure_reason is None for s in states] == [True, False, True]
+
+    def test_rejects_zero_concurrency(self):
+        with pytest.raises(ValueError):
+            asyncio.run(_orchestrator().process_many(["x"], concurrency=0))
+
+
+class TestWorkerDeadlines:
+    def test_slow_async_call_is_cancelled(self):
+        orchestrator = LogSightOrchestrator(
+            client=FakeClient(),
+            async_client=FakeAsyncClient(slow="db down"),
+            worker_timeouts={"analysis": 0.02},
+        )
+        start = time.perf_counter()
+        state = asyncio.run(orchestrator.process_incident_async("ERROR db down"))
+        assert time.perf_counter() - start < 1
+        assert any("Analysis warning: analysis worker exceeded" in s for s in state.execution_steps)
+        assert state.circuit_tripped
+        assert state.breaker_metrics["timeouts"] == 2
+
+    def test_timeout_is_retried(self):
+        client = FakeClient()
+        create = client.messages.create
+        failures = [TimeoutError("read timed out")]
+
+        def once_slow(model, max_tokens, system, messages, timeout=None):
+            if system == ANALYSIS_SYSTEM_PROMPT and failures:
+                raise failures.pop()
+            return create(model, max_tokens, system, messages, timeout)
+
+        client.messages.create = once_slow
+        orchestrator = LogSightOrchestrator(client=client)
+        state = orchestrator.process_incident("ERROR db down")
+        assert state.recommended_actions == "restart db"
+        assert state.loop_count == 2
+        assert state.breaker_metrics["timeouts"] == 1
+        assert state.breaker_metrics["status"] == "CLOSED"
+
+    def test_slow_stream_is_cancelled(self):
+        client = FakeClient()
+
+        def slow_stream(model, max_tokens, system, messages, timeout=None):
+            stream = FakeStream("one two three")
+            stream.text_stream = (time.sleep(0.02) or t for t in stream.text_stream)
+            return stream
+
+        client.messages.stream = slow_stream
+        orchestrator = LogSightOrchestrator(client=client, worker_timeouts={"analysis": 0.01})
+        state = list(orchestrator.stream_incident("ERROR db down"))[-1].state
+        assert state.circuit_tripped
+        assert state.breaker_metrics["timeouts"] == 2
+
+    def test_sync_client_does_not_retry(self):
+        class RetryingClient(FakeClient):
+            max_retries = 2
+
+            def with_options(self, max_retries):
+                copy = RetryingClient()
+                copy.max_retries = max_retries
+                return copy
+
+        orchestrator = LogSightOrchestrator(client=RetryingClient())
+        assert orchestrator.client.max_retries == 0
+        assert orchestrator.process_incident("ERROR db down").recommended_actions == "restart db"
+
+
+class TestSharedBreaker:
+    def test_open_breaker_pauses_later_incidents(self):
+        clock_now = [0.0]
+        client = FakeClient()
+        create = client.messages.create
+        down = [True]
+
+        def flaky(model, max_tokens, system, messages, timeout=None):
+            if down[0]:
+                raise RuntimeError("overloaded")
+            return create(model, max_tokens, system, messages, timeout)
+
+        client.messages.create = flaky
+        breaker = ExecutionCircuitBreaker(cooldown=30.0, clock=lambda: clock_now[0])
+        orchestrator = LogSightOrchestrator(client=client, breaker=breaker)
+
+        assert orchestrator.process_incident("ERROR db down").circuit_tripped
+        down[0] = False
+        paused = orchestrator.process_incident("ERROR db down")
+        assert "cools down" in paused.failure_reason
+        assert len(client.calls) == 0
+
+        clock_now[0] = 30.0
+        state = orchestrator.process_incident("ERROR db down")
+        assert state.recommended_actions == "restart db"
+        assert state.breaker_metrics["status"] == "CLOSED"
+        assert state.breaker_metrics["trips"] == 1
+
+    def test_abandoned_stream_releases_trial(self):
+        clock_now = [0.0]
+        breaker = ExecutionCircuitBreaker(cooldown=30.0, clock=lambda: clock_now[0])
+        orchestrator = LogSightOrchestrator(client=FakeClient(), breaker=breaker)
+        _trip_breaker(breaker)
+        clock_now[0] = 30.0
+
+        events = orchestrator.stream_incident("ERROR db down")
+        next(e for e in events if e.kind == "delta")
+        events.close()  # e.g. the UI session went away mid-reply
+        assert breaker.metrics()["status"] == "HALF_OPEN"
+
+        state = orchestrator.process_incident("ERROR db down")
+        assert state.recommended_actions == "restart db"
+        assert state.breaker_metrics["status"] == "CLOSED"
+
+    def test_cancelled_call_releases_trial(self):
+        clock_now = [0.0]
+        breaker = ExecutionCircuitBreaker(cooldown=30.0, clock=lambda: clock_now[0])
+        orchestrator = LogSightOrchestrator(
+            client=FakeClient(), async_client=FakeAsyncClient(slow="db down"), breaker=breaker
+        )
+        _trip_breaker(breaker)
+        clock_now[0] = 30.0
+
+        async def cancelled():
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    orchestrator._create_async("analysis", ANALYSIS_SYSTEM_PROMPT, "db down", 10, breaker), 0.01
+                )
+
+        asyncio.run(cancelled())
+        assert orchestrator.process_incident("ERROR db down").breaker_metrics["status"] == "CLOSED"
+
+    def test_invalid_replies_stay_out_of_shared_breaker(self):
+        client = FakeClient()
+        create = client.messages.create
+
+        def bad_parser(model, max_tokens, system, messages, timeout=None):
+            if system == PARSER_SYSTEM_PROMPT:
+                client.calls.append(system)
+                return SimpleNamespace(content=[SimpleNamespace(text="not json")])
+            return create(model, max_tokens, system, messages, timeout)
+
+        client.messages.create = bad_parser
+        orchestrator = LogSightOrchestrator(client=client)
+        payload = "\n".join(f"free text line {i}" for i in range(60))  # three model batches
+        assert orchestrator.process_incident(payload).circuit_tripped
+        assert orchestrator.process_incident("ERROR db down\nsomething odd").recommended_actions == "restart db"
+        metrics = orchestrator.breaker.metrics()
+        assert metrics["status"] == "CLOSED"
+        assert metrics["errors"] == 0
+        assert metrics["trips"] == 0
+
+
+def _trip_breaker(breaker: ExecutionCircuitBreaker) -> None:
+    with pytest.raises(CircuitBreakerException):
+        for _ in range(breaker.error_threshold):
+            breaker.record_error()
@@ -0,0 +1,104 @@
+"""Tests for logsight.parallel."""
+
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+
+from logsight.analyzer import detect_anomalies, error_rate_spike
+from logsight.batch import LogBatch
+from logsight.parallel import parse_file_parallel, shard_ranges
+
+_COLUMNS = (
+    "levels",
+    "timestamps",
+    "formats",
+    "raw_offsets",
+    "raw_lengths",
+    "message_offsets",
+    "message_lengths",
+    "message_keys",
+)
+
+
+def _assert_same(a: LogBatch, b: LogBatch) -> None:
+    for name in _COLUMNS:
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
+    assert a.vocabulary == b.vocabulary
+    assert a.text == b.text
+
+
+def _write_log(path, n: int = 500, newline: str = "\n", seed: int = 0) -> None:
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n):
+        level = rng.choice(["INFO", "ERROR", "WARN", "DEBUG"])
+        message = rng.choice(["ok", "failed", "héllo wörld ✓", "x" * rng.randint(1, 300)])
+        lines.append(f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d} {level} {message}")
+        if rng.random() < 0.05:
+            lines.append("")
+    path.write_bytes(newline.join(lines).encode("utf-8") + b"\xff\n")
+
+
+class TestShardRanges:
+    def test_ranges_cover_file_on_line_boundaries(self, tmp_path):
+        f = tmp_path / "app.log"
+        _write_log(f)
+        data = f.read_bytes()
+        ranges = shard_ranges(str(f), 7, min_shard_size=1)
+        assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+            assert data[end - 1 : end] == b"\n"
+
+    def test_min_shard_size(self, tmp_path):
+        f = tmp_path / "app.log"
+        _write_log(f)
+        assert len(shard_ranges(str(f), 8)) == 1
+
+    def test_empty_file(self, tmp_path):
+        f = tmp_path / "empty.log"
+        f.write_bytes(b"")
+        assert shard_ranges(str(f), 4) == []
+        assert len(parse_file_parallel(str(f), 4)) == 0
+
+
+class TestParseFileParallel:
+    @pytest.mark.parametrize("newline", ["\n", "\r\n"])
+    def test_identical_to_serial(self, tmp_path, newline):
+        f = tmp_path / "app.log"
+        _write_log(f, newline=newline)
+        serial = LogBatch.from_file(str(f))
+        parallel = parse_file_parallel(str(f), workers=4, min_shard_size=1)
+        _assert_same(serial, parallel)
+
+    def test_analysis_identical(self, tmp_path):
+        f = tmp_path / "app.log"
+        _write_log(f, n=2000, seed=1)
+        serial = LogBatch.from_file(str(f))
+        parallel = parse_file_parallel(str(f), workers=3, min_shard_size=1)
+        a, b = detect_anomalies(serial), detect_anomalies(parallel)
+        assert a.indices.tolist() == b.indices.tolist()
+        assert a.stats == b.stats
+        assert error_rate_spike(serial, 20, 0.3, merge=True) == error_rate_spike(
+            parallel, 20, 0.3, merge=True
+        )
+
+    def test_forced_format(self, tmp_path):
+        f = tmp_path / "app.log"
+        _write_log(f)
+        serial = LogBatch.from_file(str(f), fmt="generic")
+        _assert_same(serial, parse_file_parallel(str(f), 2, fmt="generic", min_shard_size=1))
+
+
+class TestConcat:
+    def test_concat_matches_single_pass(self):
+        lines = ["INFO a", "ERROR b", "INFO a", "WARN c", "ERROR b", "INFO d"]
+        whole = LogBatch.from_lines(lines, fmt="generic")
+        parts = [LogBatch.from_lines(lines[i : i + 2], fmt="generic") for i in range(0, 6, 2)]
+        _assert_same(whole, LogBatch.concat(parts))
+
+    def test_concat_empty(self):
+        assert len(LogBatch.concat([])) == 0
@@ -3,8 +3,20 @@
 from __future__ import annotations
 
 import textwrap
+from datetime import datetime, timedelta, timezone
 
-from logsight.parser import LogEntry, LogLevel, parse_line, parse_lines
+import pytest
+
+from logsight.parser import (
+    _PATTERNS,
+    LogEntry,
+    LogLevel,
+    TimestampParser,
+    parse_file,
+    parse_line,
+    parse_lines,
+    sniff_format,
+)
 
 
 class TestParseLevel:
@@ -108,11 +120,40 @@ class TestLogEntry:
         entry = parse_line(raw)
         assert entry.raw == raw
 
+    def test_slotted(self):
+        entry = parse_line("INFO all good")
+        assert not hasattr(entry, "__dict__")
+
+    def test_extra_is_lazy(self):
+        entry = parse_line("Jan 15 12:34:56 myhost myapp: Something happened")
+        assert entry._extra is None
+        assert entry.extra == {"host": "myhost", "process": "myapp"}
+        assert entry.extra is entry.extra
+
+    def test_fields_assignable(self):
+        entry = parse_line("INFO all good")
+        entry.message = "rewritten"
+        entry.extra = {"k": "v"}
+        assert entry.message == "rewritten"
+        assert entry.extra == {"k": "v"}
+        assert entry.raw == "INFO all good"
+
+    def test_constructor_defaults(self):
+        entry = LogEntry(raw="x")
+        assert entry.format == "unknown"
+        assert entry.message == ""
+        assert entry.extra == {}
+
+    def test_equality(self):
+        assert parse_line("ERROR boom") == parse_line("ERROR boom\n")
+        assert parse_line("ERROR boom") != parse_line("ERROR bang")
+        assert parse_line("WARN w") == LogEntry(
+            raw="WARN w", format="generic", level=LogLevel.WARNING, message="w"
+        )
+
 
 class TestParseFile:
     def test_parse_file(self, tmp_path):
-        from logsight.parser import parse_file
-
         log_content = textwrap.dedent("""\
             2024-01-01T00:00:01 INFO  startup complete
             2024-01-01T00:00:02 ERROR disk full
@@ -125,3 +166,126 @@ class TestParseFile:
         assert len(entries) == 3
         assert entries[1].level == LogLevel.ERROR
         assert entries[2].level == LogLevel.WARNING
+
+
+class TestDispatch:
+    """parse_line must agree with a plain first-match scan over _PATTERNS."""
+
+    LINES = [
+        "Jan 15 12:34:56 myhost myapp: Something happened",
+        "Feb  3 01:02:03 db-02 postgres[88]: checkpoint complete",
+        "2024-01-15T12:34:56.123Z INFO [api] GET /v1/users",
+        "2024-01-15 12:34:57,481 error [worker] job failed",
+        "2024-01-15T12:34:56 - frank [10/Oct/2000:13:55:36 -0700] \"GET / HTTP/1.0\" 200 1",
+        '192.168.1.1 - frank [10/Oct/2000:13:55:36 -0700] "GET /apache_pb.gif HTTP/1.0" 200 2326',
+        "abc 1 12:00:00 host proc: looks like syslog",
+        "1234-ab not quite iso",
+        "WARN [x] \"quoted\" text",
+        "\tINFO indented line",
+        "fatal: lowercase level",
+        "x",
+        "",
+    ]
+
+    @staticmethod
+    def _cascade(line: str):
+        for fmt_name, pattern in _PATTERNS:
+            m = pattern.match(line)
+            if m:
+                return fmt_name, m.groupdict()
+        return "unknown", {}
+
+    def test_matches_cascade(self):
+        for line in self.LINES:
+            fmt_name, groups = self._cascade(line)
+            entry = parse_line(line)
+            assert entry.format == fmt_name, line
+            assert entry.message == (groups.get("message") or line), line
+            for key, value in groups.items():
+                if key not in {"timestamp", "level", "message"} and value is not None:
+                    assert entry.extra[key] == value, line
+
+
+class TestFormatSniffing:
+    def test_sniff_picks_majority_specific_format(self):
+        sample = [
+            "2024-01-01T00:00:00 INFO a",
+            "  at frame one",
+            "  at frame two",
+            "2024-01-01T00:00:01 ERROR b",
+        ]
+        assert sniff_format(sample) == "iso8601"
+
+    def test_sniff_generic_only_returns_none(self):
+        assert sniff_format(["INFO a", "ERROR b"]) is None
+
+    def test_locked_format_falls_back(self):
+        lines = ["2024-01-01T00:00:00 INFO start"] * 3 + ["ERROR plain line"]
+        entries = parse_lines(lines)
+        assert [e.format for e in entries] == ["iso8601"] * 3 + ["generic"]
+        assert entries[-1].level == LogLevel.ERROR
+
+    def test_forced_format(self):
+        entries = parse_lines(["Jan 15 12:34:56 myhost myapp: hi"], fmt="generic")
+        assert entries[0].format == "generic"
+
+    def test_unknown_format_rejected(self):
+        with pytest.raises(ValueError):
+            parse_lines(["INFO a"], fmt="json")
+
+    def test_parse_file_sniffs(self, tmp_path):
+        f = tmp_path / "mixed.log"
+        f.write_text("Jan 15 12:34:56 h app: one\nINFO two\nJan 15 12:34:57 h app: three\n")
+        entries = list(parse_file(str(f), sample_size=1))
+        assert [e.format for e in entries] == ["syslog", "generic", "syslog"]
+
+
+class TestTimestampParser:
+    def test_iso_variants(self):
+        parse = TimestampParser()
+        assert parse("2024-01-15T12:34:56") == datetime(2024, 1, 15, 12, 34, 56)
+        assert parse("2024-01-15 12:34:56,5") == datetime(2024, 1, 15, 12, 34, 56, 500000)
+        assert parse("2024-01-15T12:34:56.123Z") == datetime(
+            2024, 1, 15, 12, 34, 56, 123000, tzinfo=timezone.utc
+        )
+        assert parse("2024-01-15T12:34:56-0800") == datetime(
+            2024, 1, 15, 12, 34, 56, tzinfo=timezone(timedelta(hours=-8))
+        )
+
+    def test_invalid_stamps(self):
+        parse = TimestampParser()
+        assert parse("2024-02-30T00:00:00") is None
+        assert parse("2024-01-15T12:34:56.1234567") is None
+        assert parse("2024-01-15T12:34:56+25:00") is None
+        assert parse("10/Oct/2000:13:55:36 -0700") is None
+        assert parse("") is None
+
+    def test_non_ascii_digits_rejected(self):
+        parse = TimestampParser(year=2024)
+        assert parse("2024-01-01T00:00:00.\u00b2") is None
+        assert parse("2024-01-01T00:00:00+0\u00b2:00") is None
+        assert parse("2024-01-01T00:00:0\u00b2") is None
+        assert parse("Jan \u00b2 12:34:56") is None
+
+    def test_syslog_uses_configured_year(self):
+        parse = TimestampParser(year=2023)
+        assert parse("Jan 15 12:34:56") == datetime(2023, 1, 15, 12, 34, 56)
+        assert parse("Feb  3 01:02:03") == datetime(2023, 2, 3, 1, 2, 3)
+        assert parse("Feb 29 01:02:03") is None
+
+    def test_layout_switch(self):
+        parse = TimestampParser(year=2024)
+        assert parse("2024-01-15T12:34:56") is not None
+        assert parse("Jan 15 12:34:56") is not None
+        assert parse("2024-01-15T12:34:56") is not None
+        assert parse("Jan 15 12:34:57").second == 57
+
+    def test_cache_is_bounded(self):
+        parse = TimestampParser(cache_size=2)
+        for second in range(10):
+            assert parse(f"2024-01-15T12:34:{second:02d}").second == second
+        assert len(parse._iso_cache) <= 2
+
+    def test_syslog_line_year(self):
+        entries = parse_lines(["Jan 15 12:34:56 myhost myapp: hi"], year=2022)
+        assert entries[0].timestamp.year == 2022
@@ -0,0 +1,95 @@
+"""Tests for logsight.reader."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from logsight.batch import LogBatch
+from logsight.parallel import parse_file_parallel
+from logsight.parser import _PATTERNS, parse_file
+from logsight.reader import _bytes_pattern, iter_mmap_batches, parse_mmap
+from logsight.stream import analyze_batches, analyze_stream
+
+SAMPLES = [
+    b"2024-01-15T12:34:56.123Z INFO [api] GET /v1/users 200 in 12ms\n",
+    b"2024-01-15 12:34:56+02:00 ERROR disk full\n",
+    b"2024-01-15T12:34:57,5 warn slow\n",
+    b"Jan 15 12:34:56 web-01 sshd[4211]: Accepted publickey for deploy\r\n",
+    b'192.168.1.1 - frank [10/Oct/2000:13:55:36 -0700] "GET /a.gif HTTP/1.0" 200 2326\n',
+    b"WARNING disk usage at 91% on /var\n",
+    b"CRITICAL   \x1c\n",
+    "ERROR café fermé — retry\n".encode(),
+    b"\xff\xfe broken bytes ERROR\n",
+    b"first\rsecond\r\n",
+    b"\n",
+    b"  \t \n",
+    b"INFO " + b"x" * 300 + b"\n",
+    b"no level here\n",
+]
+
+
+def _write(path, lines: int = 400, tail: bytes = b"last line without newline") -> str:
+    data = b"".join(SAMPLES[i * 7 % len(SAMPLES)] for i in range(lines)) + tail
+    path.write_bytes(data)
+    return str(path)
+
+
+def _assert_equivalent(a: LogBatch, b: LogBatch) -> None:
+    assert len(a) == len(b)
+    for name in ("levels", "timestamps", "formats", "raw_lengths", "message_lengths", "message_keys"):
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
+    assert a.vocabulary == b.vocabulary
+    assert [a.raw(i) for i in range(len(a))] == [b.raw(i) for i in range(len(b))]
+    assert [a.message(i) for i in range(len(a))] == [b.message(i) for i in range(len(b))]
+
+
+class TestParseMmap:
+    @pytest.mark.parametrize("fmt", ["auto", "generic", "iso8601"])
+    def test_matches_text_reader(self, tmp_path, fmt):
+        path = _write(tmp_path / "app.log")
+        _assert_equivalent(LogBatch.from_file(path, fmt=fmt), parse_mmap(path, fmt=fmt))
+
+    def test_from_file_reader_option(self, tmp_path):
+        path = _write(tmp_path / "app.log")
+        _assert_equivalent(LogBatch.from_file(path), LogBatch.from_file(path, reader="mmap"))
+        with pytest.raises(ValueError):
+            LogBatch.from_file(path, reader="bogus")
+
+    def test_ascii_only(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_bytes(b"".join(SAMPLES[:7]) * 20)
+        _assert_equivalent(LogBatch.from_file(str(path)), parse_mmap(str(path)))
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.log"
+        path.write_bytes(b"")
+        assert len(parse_mmap(str(path))) == 0
+        assert list(iter_mmap_batches(str(path))) == []
+
+    def test_bytes_patterns_mirror_text_patterns(self):
+        for name, pattern in _PATTERNS:
+            assert _bytes_pattern(pattern).groupindex == pattern.groupindex, name
+
+    def test_parallel_mmap_shards(self, tmp_path):
+        path = _write(tmp_path / "app.log", lines=2000)
+        _assert_equivalent(
+            LogBatch.from_file(path),
+            parse_file_parallel(path, workers=3, min_shard_size=1, reader="mmap"),
+        )
+
+
+class TestIterMmapBatches:
+    def test_chunks_concatenate_to_whole(self, tmp_path):
+        path = _write(tmp_path / "app.log")
+        batches = list(iter_mmap_batches(path, chunk_size=37))
+        assert all(len(batch) == 37 for batch in batches[:-1])
+        _assert_equivalent(LogBatch.from_file(path), LogBatch.concat(batches))
+
+    def test_stream_analysis_matches(self, tmp_path):
+        path = _write(tmp_path / "app.log", lines=1000)
+        text = analyze_stream(parse_file(path), chunk_size=100, window_size=10)
+        mmapped = analyze_batches(iter_mmap_batches(path, chunk_size=100), window_size=10)
+        assert mmapped.snapshot().indices.tolist() == text.snapshot().indices.tolist()
+        assert mmapped.spikes == text.spikes
+        assert mmapped.stats == text.stats
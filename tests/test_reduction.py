@@ -0,0 +1,90 @@
+"""Tests for agents.reduction."""
+
+from __future__ import annotations
+
+from agents.reduction import estimate_tokens, reduce_records
+
+
+def _record(i, level="INFO", service="web", message=None):
+    return {
+        "timestamp": f"2024-01-15T10:00:{i % 60:02d}",
+        "level": level,
+        "service": service,
+        "message": message or f"GET /api/items/{i} 200 in {i % 50}ms",
+    }
+
+
+def _incident():
+    records = [_record(i) for i in range(500)]
+    for i in range(100, 110):
+        records[i] = _record(i, "ERROR", "db", f"connection refused to 10.0.0.{i}")
+    records.append(_record(500, "CRITICAL", "kernel", "OOM killer invoked"))
+    return records
+
+
+class TestReduceRecords:
+    def test_collapses_templates_with_counts(self):
+        reduction = reduce_records(_incident())
+        assert len(reduction.records) == 3
+        web, db, kernel = reduction.records
+        assert web["count"] == 490
+        assert web["template"] == "GET <*> <*> in <*>"
+        assert web["message"] == "GET /api/items/0 200 in 0ms"
+        assert db["count"] == 10 and db["level"] == "ERROR"
+        assert "count" not in kernel
+        assert reduction.input_records == 501
+
+    def test_identical_lines_have_no_template(self):
+        records = [_record(i, message="disk full") for i in range(3)]
+        (rep,) = reduce_records(records).records
+        assert rep["count"] == 3
+        assert "template" not in rep
+        assert rep["last_timestamp"] == records[-1]["timestamp"]
+
+    def test_budget_keeps_most_informative(self):
+        records = [
+            _record(i, service=f"svc{i}", message=f"unique event kind {chr(97 + i % 26)} {i}")
+            for i in range(200)
+        ]
+        records[150] = _record(150, "ERROR", "db", "replica lag exceeded")
+        reduction = reduce_records(records, token_budget=200)
+        assert reduction.output_tokens <= 200
+        assert any(r["message"] == "replica lag exceeded" for r in reduction.records)
+        assert len(reduction.records) < 20
+
+    def test_level_aliases_rank_by_severity(self):
+        records = [
+            _record(i, "ERROR", f"svc{i}", f"unique failure kind {chr(97 + i % 26)} {i}")
+            for i in range(200)
+        ]
+        records[50] = _record(50, "FATAL", "kernel", "kernel panic")
+        records[150] = _record(150, "WARN", "db", "replica lag rising")
+        kept = [r["message"] for r in reduce_records(records, token_budget=200).records]
+        assert "kernel panic" in kept
+        assert "replica lag rising" not in kept
+
+    def test_keeps_original_order(self):
+        records = [_record(0, "ERROR", "a", "first failure"), _record(1, "INFO", "b", "noise")]
+        records.append(_record(2, "CRITICAL", "c", "last failure"))
+        reduction = reduce_records(records)
+        assert [r["service"] for r in reduction.records] == ["a", "b", "c"]
+
+    def test_compression_ratio(self):
+        reduction = reduce_records(_incident())
+        assert reduction.input_tokens == estimate_tokens(_incident())
+        assert reduction.output_tokens == estimate_tokens(reduction.records)
+        assert reduction.compression_ratio > 50
+
+    def test_empty(self):
+        reduction = reduce_records([])
+        assert reduction.records == []
+        assert reduction.compression_ratio == 1.0
+
+    def test_unknown_levels_accepted(self):
+        (rep,) = reduce_records([{"level": "notice", "message": "hello"}]).records
+        assert rep == {"level": "notice", "message": "hello"}
+
+    def test_unhashable_services_accepted(self):
+        records = [_record(i, service=["web", "api"]) for i in range(3)] + [_record(3, service={"name": "db"})]
+        reduction = reduce_records(records)
+        assert [r.get("count") for r in reduction.records] == [3, None]
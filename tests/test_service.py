@@ -0,0 +1,258 @@
+"""Tests for agents.service, run against a local fake backend."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from agents.orchestrator import ANALYSIS_SYSTEM_PROMPT, REMEDIATION_SYSTEM_PROMPT
+from agents.service import (
+    AsyncMessageBatcher,
+    AsyncSingleFlight,
+    BatchRequestError,
+    MessageBatcher,
+    OrchestratorService,
+    SingleFlight,
+)
+
+
+def _message(system: str, prompt: str) -> SimpleNamespace:
+    # Root causes differ per prompt, so distinct incidents get distinct remediation prompts.
+    text = f"root cause {zlib.crc32(prompt.encode())}" if system == ANALYSIS_SYSTEM_PROMPT else "restart db"
+    return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+def _entry(custom_id: str, params: dict) -> SimpleNamespace:
+    content = params["messages"][0]["content"]
+    if "poison" in content:
+        result = SimpleNamespace(type="errored", error="invalid_request")
+    else:
+        result = SimpleNamespace(type="succeeded", message=_message(params["system"], content))
+    return SimpleNamespace(custom_id=custom_id, result=result)
+
+
+class FakeBackend:
+    """messages.create and messages.batches, each call taking *latency* seconds."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.calls = []
+        self.submitted = []  # request lists, one per batch
+        self.messages = SimpleNamespace(
+            create=self._create,
+            batches=SimpleNamespace(create=self._batch, retrieve=self._retrieve, results=self._results),
+        )
+
+    def _create(self, model, max_tokens, system, messages, timeout=None):
+        with self.lock:
+            self.calls.append(system)
+        time.sleep(self.latency)
+        return _message(system, messages[0]["content"])
+
+    def _batch(self, requests):
+        with self.lock:
+            self.submitted.append(list(requests))
+        return SimpleNamespace(id=str(len(self.submitted) - 1), processing_status="in_progress")
+
+    def _retrieve(self, batch_id):
+        time.sleep(self.latency)
+        return SimpleNamespace(id=batch_id, processing_status="ended")
+
+    def _results(self, batch_id):
+        return [_entry(r["custom_id"], r["params"]) for r in self.submitted[int(batch_id)]]
+
+
+class FakeAsyncBackend(FakeBackend):
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__(latency)
+        self.messages = SimpleNamespace(
+            create=self._acreate,
+            batches=SimpleNamespace(create=self._abatch, retrieve=self._aretrieve, results=self._aresults),
+        )
+
+    async def _acreate(self, model, max_tokens, system, messages):
+        self.calls.append(system)
+        await asyncio.sleep(self.latency)
+        return _message(system, messages[0]["content"])
+
+    async def _abatch(self, requests):
+        return self._batch(requests)
+
+    async def _aretrieve(self, batch_id):
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(id=batch_id, processing_status="ended")
+
+    async def _aresults(self, batch_id):
+        async def entries():
+            for entry in self._results(batch_id):
+                yield entry
+
+        return entries()
+
+
+def _params(prompt: str, system: str = ANALYSIS_SYSTEM_PROMPT) -> dict:
+    return {"model": "m", "max_tokens": 10, "system": system, "messages": [{"role": "user", "content": prompt}]}
+
+
+class TestSingleFlight:
+    def test_concurrent_identical_calls_run_once(self):
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.05)
+            return "result"
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: flight.do("key", slow), range(8)))
+        assert results == ["result"] * 8
+        assert len(calls) == 1
+        assert (flight.leaders, flight.followers) == (1, 7)
+
+    def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.05)
+            raise RuntimeError("overloaded")
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(flight.do, "key", failing)
+            started.wait()
+            follower = pool.submit(flight.do, "key", failing)
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError):
+                    future.result()
+        assert flight.leaders == 1
+
+    def test_sequential_calls_are_not_coalesced(self):
+        flight = SingleFlight()
+        assert flight.do("key", lambda: 1) == 1
+        assert flight.do("key", lambda: 2) == 2
+
+    def test_async_coalesces(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        async def main():
+            return await asyncio.gather(*(flight.do("key", slow) for _ in range(5)))
+
+        assert asyncio.run(main()) == ["result"] * 5
+        assert len(calls) == 1
+
+    def test_async_cancels_when_no_waiters(self):
+        flight = AsyncSingleFlight()
+        cancelled = []
+
+        async def stuck():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        async def main():
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(flight.do("key", stuck), 0.01)
+            await asyncio.sleep(0)
+
+        asyncio.run(main())
+        assert cancelled == [1]
+
+
+class TestMessageBatcher:
+    def test_window_groups_requests(self):
+        backend = FakeBackend()
+        batcher = MessageBatcher(backend, window=0.05, poll_interval=0.001)
+        with ThreadPoolExecutor(5) as pool:
+            replies = list(pool.map(lambda i: batcher.submit(_params(f"incident {i}")), range(5)))
+        assert all(r.content[0].text.startswith("root cause") for r in replies)
+        assert len(backend.submitted) == 1 and len(backend.submitted[0]) == 5
+        assert (batcher.batches, batcher.requests) == (1, 5)
+
+    def test_full_batch_is_submitted_early(self):
+        backend = FakeBackend()
+        batcher = MessageBatcher(backend, window=10, max_batch=2, poll_interval=0.001)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(2) as pool:
+            list(pool.map(lambda i: batcher.submit(_params(f"incident {i}")), range(2)))
+        assert time.perf_counter() - start < 1
+
+    def test_errored_request_raises(self):
+        batcher = MessageBatcher(FakeBackend(), window=0.01, poll_interval=0.001)
+        with pytest.raises(BatchRequestError, match="errored"):
+            batcher.submit(_params("poison"))
+
+    def test_timeout(self):
+        backend = FakeBackend(latency=0.5)
+        batcher = MessageBatcher(backend, window=0.01, poll_interval=0.001)
+        with pytest.raises(TimeoutError):
+            batcher.submit(_params("incident"), timeout=0.05)
+
+    def test_async_window_groups_requests(self):
+        backend = FakeAsyncBackend()
+        batcher = AsyncMessageBatcher(backend, window=0.01, poll_interval=0.001)
+
+        async def main():
+            return await asyncio.gather(*(batcher.submit(_params(f"incident {i}")) for i in range(5)))
+
+        assert len(asyncio.run(main())) == 5
+        assert len(backend.submitted) == 1 and len(backend.submitted[0]) == 5
+
+    def test_rejects_empty_batches(self):
+        with pytest.raises(ValueError):
+            MessageBatcher(FakeBackend(), max_batch=0)
+
+
+class TestOrchestratorService:
+    def test_identical_incidents_share_calls(self):
+        service = OrchestratorService(client=FakeBackend(latency=0.05), async_client=FakeAsyncBackend())
+        with ThreadPoolExecutor(6) as pool:
+            states = list(pool.map(service.process_incident, ["ERROR db down"] * 6))
+        assert all(s.recommended_actions == "restart db" for s in states)
+        assert len(service.client.client.calls) == 2
+        assert service.stats()["coalesced"] == 10
+
+    def test_async_identical_incidents_share_calls(self):
+        backend = FakeAsyncBackend(latency=0.01)
+        service = OrchestratorService(client=FakeBackend(), async_client=backend)
+        states = asyncio.run(service.process_many(["ERROR db down"] * 4 + ["ERROR other"]))
+        assert all(s.recommended_actions == "restart db" for s in states)
+        assert len(backend.calls) == 4
+
+    def test_batch_mode_batches_analysis_only(self):
+        backend = FakeBackend()
+        service = OrchestratorService(
+            client=backend, async_client=FakeAsyncBackend(), batch=True, batch_window=0.05, poll_interval=0.001
+        )
+        with ThreadPoolExecutor(4) as pool:
+            states = list(pool.map(service.process_incident, [f"ERROR incident {i}" for i in range(4)]))
+        assert all(s.root_cause_analysis.startswith("root cause") for s in states)
+        assert len(backend.submitted) == 1 and len(backend.submitted[0]) == 4
+        assert backend.calls == [REMEDIATION_SYSTEM_PROMPT] * 4
+        assert service.orchestrator.worker_timeouts["analysis"] > 60
+        assert service.stats() == {"calls": 8, "coalesced": 0, "batches": 1, "batched_requests": 4}
+
+    def test_async_batch_mode(self):
+        backend = FakeAsyncBackend()
+        service = OrchestratorService(
+            client=FakeBackend(), async_client=backend, batch=True, batch_window=0.01, poll_interval=0.001
+        )
+        states = asyncio.run(service.process_many([f"ERROR incident {i}" for i in range(3)]))
+        assert all(s.recommended_actions == "restart db" for s in states)
+        assert len(backend.submitted) == 1 and len(backend.submitted[0]) == 3
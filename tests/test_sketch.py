@@ -0,0 +1,117 @@
+"""Tests for logsight.sketch."""
+
+from __future__ import annotations
+
+import random
+from collections import Counter
+
+import pytest
+
+from logsight.analyzer import compute_stats
+from logsight.batch import LogBatch
+from logsight.parser import parse_lines
+from logsight.sketch import CountMinTopK, ExactCounter, SpaceSaving
+
+
+def _zipf_keys(n: int = 20_000, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    keys = []
+    for i in range(n):
+        if rng.random() < 0.6:
+            keys.append(f"hot-{int(rng.paretovariate(1.2)) % 8}")
+        else:
+            keys.append(f"request {i} failed")
+    return keys
+
+
+class TestExactCounter:
+    def test_matches_counter(self):
+        keys = _zipf_keys(2000)
+        sketch = ExactCounter()
+        sketch.update(keys)
+        assert sketch.top(5) == Counter(keys).most_common(5)
+        assert sketch.error_bound == 0
+        assert sketch.total == len(keys)
+
+
+class TestSpaceSaving:
+    def test_exact_below_capacity(self):
+        sketch = SpaceSaving(capacity=10)
+        sketch.update(["a", "b", "a", "c", "a", "b"])
+        assert sketch.top(3) == [("a", 3), ("b", 2), ("c", 1)]
+        assert sketch.error_bound == 0
+
+    def test_bounded_memory(self):
+        sketch = SpaceSaving(capacity=50)
+        sketch.update(_zipf_keys())
+        assert len(sketch) <= 50
+
+    def test_counts_within_error_bound(self):
+        keys = _zipf_keys()
+        truth = Counter(keys)
+        sketch = SpaceSaving(capacity=100)
+        sketch.update(keys)
+        assert sketch.error_bound <= len(keys) // 100
+        for key, count in sketch.top(8):
+            assert truth[key] <= count <= truth[key] + sketch.error_bound
+        assert {k for k, _ in sketch.top(5)} == {k for k, _ in truth.most_common(5)}
+
+    def test_weighted_add(self):
+        sketch = SpaceSaving(capacity=2)
+        sketch.add("a", 5)
+        sketch.add("b", 2)
+        sketch.add("c", 1)
+        assert sketch.top(1) == [("a", 5)]
+        assert sketch.total == 8
+
+    def test_stale_minimum_does_not_evict_heavy_key(self):
+        sketch = SpaceSaving(capacity=2)
+        sketch.update(["v"] + ["B"] * 5 + ["v", "new"])
+        assert sketch.top(2) == [("B", 5), ("new", 3)]
+        assert sketch.error_bound == 2
+
+    def test_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            SpaceSaving(capacity=0)
+
+
+class TestCountMinTopK:
+    def test_never_underestimates(self):
+        keys = _zipf_keys()
+        truth = Counter(keys)
+        sketch = CountMinTopK(width=256, depth=4, k=20)
+        sketch.update(keys)
+        for key, count in sketch.top(8):
+            assert truth[key] <= count <= truth[key] + sketch.error_bound
+        assert {k for k, _ in sketch.top(5)} == {k for k, _ in truth.most_common(5)}
+
+    def test_from_error(self):
+        sketch = CountMinTopK.from_error(0.001, delta=0.01)
+        assert sketch.width >= 2718
+        assert sketch.depth >= 5
+
+
+class TestComputeStatsWithSketch:
+    def _lines(self) -> list[str]:
+        return [f"ERROR {key}" for key in _zipf_keys(5000)]
+
+    def test_default_is_exact(self):
+        stats = compute_stats(parse_lines(self._lines()))
+        assert stats.top_messages_error == 0
+
+    @pytest.mark.parametrize("as_batch", [False, True])
+    def test_sketch_top_messages(self, as_batch):
+        lines = self._lines()
+        entries = LogBatch.from_lines(lines) if as_batch else parse_lines(lines)
+        exact = compute_stats(entries)
+        approx = compute_stats(entries, heavy_hitters=SpaceSaving(capacity=100))
+        assert approx.level_counts == exact.level_counts
+        assert approx.error_count == exact.error_count
+        assert {k for k, _ in approx.top_messages[:5]} == {k for k, _ in exact.top_messages[:5]}
+        truth = dict(exact.top_messages)
+        for key, count in approx.top_messages[:5]:
+            assert truth[key] <= count <= truth[key] + approx.top_messages_error
+
+    def test_exact_counter_matches_default(self):
+        entries = parse_lines(self._lines())
+        assert compute_stats(entries, heavy_hitters=ExactCounter()) == compute_stats(entries)
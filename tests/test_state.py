@@ -0,0 +1,73 @@
+"""Tests for agents.state."""
+
+from __future__ import annotations
+
+import pydantic
+import pytest
+
+from agents.state import AgentState, StepTrace
+
+
+class TestStepTrace:
+    def test_append_returns_new_trace(self):
+        empty = StepTrace()
+        one = empty.append("a")
+        two = one.append("b")
+        assert list(empty) == [] and list(one) == ["a"] and list(two) == ["a", "b"]
+        assert two._items is one._items  # shared, not copied
+
+    def test_branching_does_not_change_existing_traces(self):
+        base = StepTrace(["a"])
+        left = base.append("left")
+        right = base.append("right")
+        assert list(left) == ["a", "left"]
+        assert list(right) == ["a", "right"]
+        assert list(left.append("more")) == ["a", "left", "more"]
+        assert list(base) == ["a"]
+
+    def test_sequence_protocol(self):
+        trace = StepTrace(["a", "b"]).append("c")
+        assert len(trace) == 3
+        assert trace[0] == "a" and trace[-1] == "c"
+        assert trace[1:] == ["b", "c"]
+        assert "b" in trace
+        assert trace == ["a", "b", "c"] and trace == StepTrace(["a", "b", "c"])
+        with pytest.raises(IndexError):
+            trace[3]
+
+    def test_older_view_ignores_later_appends(self):
+        short = StepTrace(["a"])
+        short.append("b")
+        assert short[-1] == "a"
+        assert short[:] == ["a"]
+        with pytest.raises(IndexError):
+            short[1]
+
+
+class TestAgentState:
+    def test_frozen(self):
+        state = AgentState(raw_logs="x")
+        with pytest.raises(pydantic.ValidationError):
+            state.loop_count = 1
+
+    def test_log_step_keeps_previous_state(self):
+        first = AgentState(raw_logs="x").log_step("one")
+        second = first.log_step("two")
+        assert first.execution_steps == ["one"]
+        assert second.execution_steps == ["one", "two"]
+
+    def test_payload_shared_by_reference(self):
+        records = [{"message": "m"}] * 1000
+        state = AgentState(raw_logs="x" * 10_000).model_copy(update={"parsed_json": records})
+        later = state.log_step("step")
+        assert later.parsed_json is records
+        assert later.raw_logs is state.raw_logs
+
+    def test_validates_and_serializes_lists(self):
+        state = AgentState(raw_logs="x", execution_steps=["a", "b"])
+        assert isinstance(state.execution_steps, StepTrace)
+        assert state.model_dump()["execution_steps"] == ["a", "b"]
+        restored = AgentState.model_validate_json(state.log_step("c").model_dump_json())
+        assert restored.execution_steps == ["a", "b", "c"]
+        with pytest.raises(pydantic.ValidationError):
+            AgentState(raw_logs="x", execution_steps=[1])
@@ -0,0 +1,87 @@
+"""Tests for logsight.stream."""
+
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+
+from logsight.analyzer import compute_stats, detect_anomalies, error_rate_spike
+from logsight.batch import LogBatch
+from logsight.parser import parse_lines
+from logsight.stream import IncrementalAnalyzer, analyze_stream, chunked
+
+
+def _lines(n: int = 3000, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    choices = ["INFO ok", "ERROR bad", "WARN hmm", "DEBUG trace"]
+    lines = []
+    for i in range(n):
+        if 1000 <= i < 1100:
+            lines.append("ERROR burst")
+        elif rng.random() < 0.05:
+            lines.append("INFO " + "x" * rng.randint(100, 400))
+        else:
+            lines.append(rng.choice(choices))
+    return lines
+
+
+class TestIncrementalAnalyzer:
+    @pytest.mark.parametrize("chunk_size", [1, 37, 1000, 10_000])
+    def test_matches_batch_analysis(self, chunk_size):
+        entries = parse_lines(_lines())
+        analyzer = analyze_stream(entries, chunk_size=chunk_size, window_size=50)
+        assert analyzer.stats == compute_stats(entries)
+        assert analyzer.spikes == error_rate_spike(entries, window_size=50, merge=True)
+        lengths = np.array([len(e.message) for e in entries], dtype=float)
+        assert analyzer.mean == pytest.approx(lengths.mean())
+        assert analyzer.std == pytest.approx(lengths.std())
+
+    def test_stride(self):
+        entries = parse_lines(_lines())
+        analyzer = analyze_stream(entries, chunk_size=333, window_size=50, stride=25)
+        assert analyzer.spikes == error_rate_spike(entries, window_size=50, stride=25, merge=True)
+
+    def test_accepts_batches(self):
+        lines = _lines()
+        analyzer = IncrementalAnalyzer(window_size=50)
+        for start in range(0, len(lines), 500):
+            analyzer.update(LogBatch.from_lines(lines[start : start + 500], fmt="generic"))
+        entries = parse_lines(lines)
+        assert analyzer.stats == compute_stats(entries)
+        assert analyzer.spikes == error_rate_spike(entries, window_size=50, merge=True)
+
+    def test_errors_flagged_with_stream_positions(self):
+        entries = parse_lines(["INFO a", "ERROR b", "INFO c", "ERROR d"])
+        analyzer = analyze_stream(entries, chunk_size=2)
+        report = analyzer.snapshot()
+        assert report.indices.tolist() == [1, 3]
+        assert [e.message for e in report.anomalies] == ["b", "d"]
+
+    def test_final_chunk_agrees_with_detect_anomalies(self):
+        # Once all data is in, z-scores use the same mean/std as the batch scan.
+        entries = parse_lines(_lines(500))
+        analyzer = IncrementalAnalyzer()
+        flagged = analyzer.update(entries)
+        assert flagged == detect_anomalies(entries).anomalies
+
+    def test_state_is_bounded(self):
+        analyzer = IncrementalAnalyzer(top_capacity=10, max_anomalies=5, window_size=20)
+        for chunk in chunked(parse_lines([f"ERROR unique {i}" for i in range(2000)]), 100):
+            analyzer.update(chunk)
+        assert len(analyzer._messages) == 10
+        assert len(analyzer.snapshot().anomalies) == 5
+        assert len(analyzer._tail) == 19
+        assert analyzer.snapshot().indices.tolist() == [1995, 1996, 1997, 1998, 1999]
+
+    def test_empty(self):
+        analyzer = IncrementalAnalyzer()
+        assert analyzer.update([]) == []
+        assert analyzer.stats.total == 0
+        assert analyzer.std == 0.0
+        assert not analyzer.snapshot().has_anomalies
+
+
+def test_chunked():
+    assert [len(c) for c in chunked(range(7), 3)] == [3, 3, 1]
@@ -0,0 +1,109 @@
+"""Tests for logsight.templates."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from logsight.analyzer import compute_stats, detect_anomalies
+from logsight.batch import LogBatch
+from logsight.parser import parse_lines
+from logsight.stream import IncrementalAnalyzer
+from logsight.templates import TemplateMiner
+
+
+class TestTemplateMiner:
+    def test_numbers_masked(self):
+        miner = TemplateMiner()
+        first = miner.add("timeout after 5001ms")
+        assert miner.add("timeout after 5002ms") == first
+        assert miner.template(first) == "timeout after <*>"
+
+    def test_mostly_numeric_messages_merged(self):
+        miner = TemplateMiner()
+        first = miner.add("GET /api/items/1 200 in 5ms")
+        assert miner.add("GET /api/items/2 200 in 7ms") == first
+        assert len(miner) == 1
+
+    def test_variable_words_merged(self):
+        miner = TemplateMiner()
+        first = miner.add("connection to db-primary closed by remote peer")
+        second = miner.add("connection to db-primary closed by local peer")
+        assert first == second
+        assert miner.template(first) == "connection to db-primary closed by <*> peer"
+
+    def test_dissimilar_messages_split(self):
+        miner = TemplateMiner()
+        assert miner.add("disk full on root") != miner.add("user not found here")
+        assert len(miner) == 2
+
+    def test_different_lengths_split(self):
+        miner = TemplateMiner()
+        assert miner.add("job started") != miner.add("job started again")
+
+    def test_ids_are_stable(self):
+        miner = TemplateMiner()
+        ids = [miner.add(f"request {i} took {i * 3}ms") for i in range(50)]
+        assert set(ids) == {0}
+        assert miner.templates == ["request <*> took <*>"]
+
+    def test_add_all(self):
+        miner = TemplateMiner()
+        ids = miner.add_all(["a 1", "b c", "a 2"])
+        assert ids.dtype == np.int32
+        assert ids.tolist() == [0, 1, 0]
+
+    def test_cache_is_bounded(self):
+        miner = TemplateMiner(cache_size=10)
+        for i in range(100):
+            miner.add(f"item {i}")
+        assert len(miner._cache) <= 10
+        assert len(miner) == 1
+
+    def test_max_children(self):
+        miner = TemplateMiner(max_children=2, similarity=1.0)
+        for word in ("alpha", "beta", "gamma", "delta"):
+            miner.add(f"{word} event")
+        assert len(miner._root[2]) == 3  # alpha, beta and the shared <*>
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            TemplateMiner(depth=2)
+        with pytest.raises(ValueError):
+            TemplateMiner(similarity=1.5)
+
+
+def _lines() -> list[str]:
+    lines = [f"ERROR timeout after {5000 + i}ms" for i in range(30)]
+    lines += [f"INFO user {i} logged in" for i in range(20)]
+    lines += ["WARN disk almost full"] * 5
+    return lines
+
+
+class TestTemplateStats:
+    @pytest.mark.parametrize("as_batch", [False, True])
+    def test_top_messages_by_template(self, as_batch):
+        lines = _lines()
+        entries = LogBatch.from_lines(lines) if as_batch else parse_lines(lines)
+        stats = compute_stats(entries, templates=TemplateMiner())
+        assert stats.top_messages == [
+            ("timeout after <*>", 30),
+            ("user <*> logged in", 20),
+            ("disk almost full", 5),
+        ]
+        assert stats.level_counts == compute_stats(entries).level_counts
+
+    def test_rare_templates_flagged(self):
+        lines = _lines() + ["INFO cache warmed"]
+        report = detect_anomalies(
+            parse_lines(lines), flag_errors=False, templates=TemplateMiner(), min_template_count=2
+        )
+        assert report.indices.tolist() == [len(lines) - 1]
+
+    def test_stream_matches_batch(self):
+        lines = _lines()
+        analyzer = IncrementalAnalyzer(templates=TemplateMiner())
+        for start in range(0, len(lines), 7):
+            analyzer.update(parse_lines(lines[start : start + 7]))
+        expected = compute_stats(parse_lines(lines), templates=TemplateMiner())
+        assert analyzer.stats.top_messages == expected.top_messages